@@ -0,0 +1,267 @@
+"""
+Benchmark suite of the utils modules. It times the loading of the csv files, each annotation stage of
+data_reconstruction, the WW, WdL and WbW rankings for one year and for all the years, and wbw_comparison() end to end,
+on the bundled data files, on data scaled from them and on synthetic data (see synthetic.py). The results are appended
+to a JSON history and compared to the previous run of the same benchmark on the same machine, so that regressions are
+caught. The default history, benchmarks/history.json, holds machine-specific results and is ignored by git.
+
+Usage, from the root of the repository:
+
+python benchmarks/run_benchmarks.py [--scale 1 4] [--synthetic 55 550] [--players 1000] [--seed 0] [--repeat 3]
+                                    [--only wbw] [--history benchmarks/history.json] [--threshold 1.25]
+                                    [--fail-on-regression]
+
+The synthetic datasets are given by their number of tournaments a year over the years 2007 to 2021, and are recorded
+in the history with the scale "synthetic-<tournaments>".
+
+"""
+
+import argparse
+import csv
+from datetime import datetime
+from glob import glob
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import synthetic
+from utils import data_reconstruction, wbw_performance, wbw_rank, wdl_rank, ww_rank
+from utils.match_table import MatchTable
+
+ONE_YEAR = 2021
+ALL_YEARS = list(range(2007, 2022))
+
+
+def scaled_files(files, scale, directory):
+    """
+    Function that writes in the given directory the csv files of a synthetic dataset scale times larger than the given
+    csv files and returns their paths. Each game is copied scale times, each copy of a tournament being renamed as a
+    new tournament ("name #k") played at the same dates by the same players, so that the copies are annotated like the
+    original tournaments while the rankings see scale times more games. The copies of the round robin tournaments are
+    annotated as knockout tournaments, their names not being in the list of round robin tournaments.
+
+    Args:
+
+    files: list of csv file paths
+    scale: number of copies of each game (type int)
+    directory: directory of the scaled csv files
+
+    """
+
+    if scale == 1:
+        return files
+
+    paths = []
+    for file in files:
+        with open(file, "r") as f:
+            csvreader = csv.reader(f)
+            header = next(csvreader)
+            rows = list(csvreader)
+
+        path = os.path.join(directory, os.path.basename(file))
+        with open(path, "w", newline="") as f:
+            csvwriter = csv.writer(f)
+            csvwriter.writerow(header)
+            for copy in range(scale):
+                for row in rows:
+                    if copy > 0:
+                        row = [row[0] + " #" + str(copy)] + row[1:]
+                        # the non standardized player name is only corrected by correct_error() in the original
+                        # tournament, so that the game would have no winner in the copies
+                        if row[5] == "Petkovic":
+                            row[5], row[11] = "Petkovic A.", "Petkovic A. Retired"
+                    csvwriter.writerow(row)
+        paths.append(path)
+    return paths
+
+
+def stages(files):
+    """
+    Function that returns the list of the benchmarks of the given csv files, as tuples (name, setup, run). setup()
+    builds a fresh input outside of the timed section and run(input) is timed.
+
+    Args:
+
+    files: list of csv file paths
+
+    """
+
+    # inputs of the annotation stages, each stage being timed on the output of the previous one
+    raw = sorted(data_reconstruction.load_matches(files), key=data_reconstruction._sort_key)
+    corrected = _copy(raw)
+    data_reconstruction.correct_error(corrected)
+    after_winner = _copy(corrected)
+    data_reconstruction.winner(after_winner)
+    after_round = _copy(after_winner)
+    data_reconstruction.round(after_round)
+    after_robin = _copy(after_round)
+    data_reconstruction.round_robin(after_robin)
+    dataset = _copy(after_robin)
+    data_reconstruction.proper_round(dataset)
+    table = MatchTable.from_rows(dataset)
+
+    def load_csv(_):
+        data_reconstruction._parse_date.cache_clear() # the dates are parsed again at each run
+        return list(data_reconstruction.load_matches(files))
+
+    return [
+        ("load_csv", lambda: None, load_csv),
+        ("build_dataset", lambda: data_reconstruction._parse_date.cache_clear(),
+         lambda _: data_reconstruction.build_dataset(files)),
+        ("correct_error", lambda: _copy(raw), data_reconstruction.correct_error),
+        ("winner", lambda: _copy(corrected), data_reconstruction.winner),
+        ("round", lambda: _copy(after_winner), data_reconstruction.round),
+        ("round_robin", lambda: _copy(after_round), data_reconstruction.round_robin),
+        ("proper_round", lambda: _copy(after_robin), data_reconstruction.proper_round),
+        ("annotate", lambda: _copy(corrected), data_reconstruction.annotate),
+        ("annotate_table", lambda: MatchTable.from_rows(corrected), data_reconstruction.annotate),
+        ("winners_win_year", lambda: dataset, lambda data: ww_rank.winners_win(data, ONE_YEAR)),
+        ("winners_win_all", lambda: dataset, lambda data: ww_rank.winners_win(data, ALL_YEARS)),
+        ("winners_win_table_all", lambda: table, lambda data: ww_rank.winners_win(data, ALL_YEARS)),
+        ("winners_dont_lose_year", lambda: dataset, lambda data: wdl_rank.winners_dont_lose(data, ONE_YEAR)),
+        ("winners_dont_lose_all", lambda: dataset, lambda data: wdl_rank.winners_dont_lose(data, ALL_YEARS)),
+        ("winners_dont_lose_table_all", lambda: table, lambda data: wdl_rank.winners_dont_lose(data, ALL_YEARS)),
+        ("wbw_ranking_year", lambda: dataset, lambda data: wbw_rank.wbw_ranking(data, ONE_YEAR, 5, 0)),
+        ("wbw_ranking_all", lambda: dataset, lambda data: wbw_rank.wbw_ranking(data, ALL_YEARS, 5, 0)),
+        ("wbw_ranking_sparse_all", lambda: dataset,
+         lambda data: wbw_rank.wbw_ranking(data, ALL_YEARS, 5, 0, backend="sparse")),
+        # wbw_comparison() sorts and modifies the start dates of the dataset in place
+        ("wbw_comparison", lambda: _copy(dataset), wbw_performance.wbw_comparison),
+        ("wbw_comparison_table", lambda: table.take(np.arange(len(table))), wbw_performance.wbw_comparison),
+    ]
+
+
+def _copy(data):
+    return [list(match) for match in data]
+
+
+def timed(setup, run, repeat):
+    """
+    Function that returns the list of the running times of run(setup()) over repeat runs, in seconds.
+    """
+
+    times = []
+    for _ in range(repeat):
+        argument = setup()
+        start = time.perf_counter()
+        run(argument)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def machine():
+    """
+    Function that returns the description of the machine and Python version, results being only compared between runs
+    of the same machine.
+    """
+
+    return platform.node() + " " + platform.machine() + " " + platform.python_implementation() + " " + \
+           platform.python_version()
+
+
+def commit():
+    """
+    Function that returns the hash of the current git commit, or None outside of a git repository.
+    """
+
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return
+
+
+def previous_results(history, scale):
+    """
+    Function that returns the dictionary of the last recorded best time of each benchmark for the given scale on this
+    machine (seeds and players of the synthetic datasets are not distinguished).
+    """
+
+    results = {}
+    for run in history:
+        if run["machine"] == machine() and run["scale"] == scale:
+            results.update({name: result["best"] for name, result in run["results"].items()})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark suite of the utils modules.")
+    parser.add_argument("--data", default=os.path.join(ROOT, "data", "*.csv"), help="glob pattern of the csv files")
+    parser.add_argument("--scale", type=int, nargs="+", default=None,
+                        help="sizes of the datasets, in copies of the data (1 by default if --synthetic isn't given)")
+    parser.add_argument("--synthetic", type=int, nargs="+", default=[],
+                        help="numbers of tournaments a year of the synthetic datasets written by synthetic.generate()")
+    parser.add_argument("--players", type=int, default=1000, help="number of players of the synthetic datasets")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic datasets")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs of each benchmark")
+    parser.add_argument("--only", default=None, help="regular expression selecting the benchmarks to run")
+    parser.add_argument("--history", default=os.path.join(ROOT, "benchmarks", "history.json"),
+                        help="JSON file where the results are appended (ignored by git by default)")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="ratio to the previous best time above which a benchmark is reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 if a regression is found")
+    args = parser.parse_args(argv)
+
+    files = sorted(glob(args.data))
+    if not files:
+        parser.error("no csv file matches " + args.data)
+
+    history = []
+    if os.path.exists(args.history):
+        with open(args.history, "r") as f:
+            history = json.load(f)
+
+    # datasets as tuples (scale recorded in the history, function writing the csv files in the given directory)
+    scales = args.scale if args.scale is not None else [] if args.synthetic else [1]
+    datasets = [(scale, lambda directory, scale=scale: scaled_files(files, scale, directory)) for scale in scales]
+    datasets += [("synthetic-" + str(tournaments), lambda directory, tournaments=tournaments: synthetic.generate(
+        directory, ALL_YEARS[0], ALL_YEARS[-1], tournaments, args.players, args.seed)) for tournaments in args.synthetic]
+
+    regressions = []
+    for scale, write_files in datasets:
+        with tempfile.TemporaryDirectory() as directory:
+            benchmarks = stages(write_files(directory))
+            previous = previous_results(history, scale)
+            results = {}
+
+            print("\nscale", scale)
+            for name, setup, run in benchmarks:
+                if args.only is not None and not re.search(args.only, name):
+                    continue
+                times = timed(setup, run, args.repeat)
+                results[name] = {"best": min(times), "mean": sum(times) / len(times), "repeat": len(times)}
+
+                line = "{:<30}{:>10.4f} s".format(name, min(times))
+                if name in previous:
+                    ratio = min(times) / previous[name]
+                    line += "{:>8.2f}x".format(ratio)
+                    if ratio > args.threshold:
+                        line += "  REGRESSION"
+                        regressions.append((scale, name, ratio))
+                print(line)
+
+        history.append({"date": datetime.now().isoformat(timespec="seconds"), "commit": commit(),
+                        "machine": machine(), "scale": scale, "results": results})
+
+    with open(args.history, "w") as f:
+        json.dump(history, f, indent=1)
+
+    if regressions:
+        print("\n" + str(len(regressions)), "regression(s) above", args.threshold, "times the previous best time")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
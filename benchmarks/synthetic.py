@@ -0,0 +1,296 @@
+"""
+Deterministic generator of synthetic tournament data, written as csv files with the schema of the data folder (one
+file per year, header Tournament,Start date,End date,Best of,Player 1,Player 2,Rank 1,Rank 2,Set 1,Set 2,Set 3,Comment).
+It is used to test the scaling of data_reconstruction, the rankings and wbw_comparison() offline.
+
+Each year has a calendar of knockout tournaments with the draws found in the data (28, 32, 56, 64, 96 and 128 players,
+the best seeds getting a bye in the first round of the 28, 56 and 96 draws), the games of a tournament being written
+round by round. The first tournament of each year starts at the end of the previous year, its first round being
+written in the previous year file as in the data, and each year ends with a round robin "WTA Finals" between the 8 best
+players (two groups of 4, semifinals and final). Games are won according to the skill of the players, some of them
+being retirements of the loser ("<player> Retired" comment), and some WTA ranks are missing.
+
+Usage, from the root of the repository:
+
+python benchmarks/synthetic.py <directory> [--years 2007 2021] [--tournaments 55] [--players 1000] [--seed 0]
+
+The data folder holds about 2,400 games a year, given by the default of 55 tournaments a year. The number of games
+grows linearly with the number of years and of tournaments, e.g. --years 1921 2020 --tournaments 3000 gives about
+10 million games.
+
+"""
+
+import argparse
+import csv
+from datetime import date, timedelta
+import os
+import random
+
+HEADER = ["Tournament", "Start date", "End date", "Best of", "Player 1", "Player 2", "Rank 1", "Rank 2", "Set 1",
+          "Set 2", "Set 3", "Comment"]
+
+# draw sizes of the knockout tournaments with their number of byes and their weight in the calendar
+DRAWS = {28: 4, 32: 0, 56: 8, 64: 0, 96: 32}
+DRAW_WEIGHTS = [15, 50, 20, 10, 5]
+GRAND_SLAM_DRAW = 128
+
+ROUND_ROBIN_NAME = "WTA Finals" # name of a round robin tournament known by round() and round_robin()
+
+SYLLABLES = ["ba", "ko", "ri", "na", "ve", "lo", "sa", "mi", "tu", "de", "ka", "zo", "pe", "li", "go", "ra", "ni",
+             "va", "so", "te", "ma", "du", "ze", "ho", "ci", "ja", "fe", "bu", "lu", "vo"]
+NAME_ENDINGS = ["va", "ova", "ic", "ska", "ez", "son", "er", "i", "o", "ard"]
+TOURNAMENT_KINDS = ["Open", "International", "Cup", "Grand Prix", "Championships", "Trophy", "Ladies Open"]
+
+WINNING_SETS = ["6-0", "6-1", "6-2", "6-3", "6-4", "7-5", "7-6"]
+
+
+def generate(directory, first_year=2007, last_year=2021, tournaments=55, players=1000, seed=0, retirement_rate=0.035,
+             missing_rank_rate=0.003):
+    """
+    Function that writes the synthetic csv files of the given years in the given directory and returns their paths. The
+    files only depend on the arguments, the same seed always giving the same files.
+
+    Args:
+
+    directory: directory of the csv files, created if needed
+    first_year, last_year: first and last year of the data (type int)
+    tournaments: number of knockout tournaments a year (type int, at least 4 for the 4 grand slams)
+    players: number of players of the circuit (type int, at least 128)
+    seed: seed of the random generator (type int)
+    retirement_rate: probability that a game ends by the retirement of the loser
+    missing_rank_rate: probability that the WTA rank of a player is missing in a game
+
+    """
+
+    if tournaments < 4 or players < GRAND_SLAM_DRAW:
+        raise ValueError("at least 4 tournaments a year and " + str(GRAND_SLAM_DRAW) + " players are needed.")
+
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    names = _player_names(rng, players)
+    skills = [rng.gauss(1500, 200) for _ in range(players)]
+    calendar = _calendar(rng, tournaments)
+    generator = _GameGenerator(rng, names, skills, retirement_rate, missing_rank_rate)
+
+    paths = []
+    pending = [] # games of the year-spanning tournament played after the end of the previous year
+    for year in range(first_year, last_year + 1):
+        path = os.path.join(directory, str(year) + ".csv")
+        with open(path, "w", newline="") as f:
+            csvwriter = csv.writer(f)
+            csvwriter.writerow(HEADER)
+            csvwriter.writerows(pending)
+            pending = []
+            generator.new_year()
+
+            for slot, (name, draw) in enumerate(calendar):
+                if slot == 0 and year > first_year: # already started at the end of the previous year
+                    continue
+                start = _start_date(year, slot, len(calendar))
+                csvwriter.writerows(generator.knockout(name, start, start + _length(draw), draw))
+
+            finals_start = date(year, 10, 25)
+            csvwriter.writerows(generator.round_robin(ROUND_ROBIN_NAME, finals_start, finals_start + timedelta(days=7)))
+
+            # the first tournament of the next year starts at the end of this year, its first round being written in
+            # this year file with the 31st of December as end date
+            if year < last_year:
+                name, draw = calendar[0]
+                start, end = date(year, 12, 30), date(year + 1, 1, 5)
+                games = generator.knockout(name, start, end, draw)
+                first_round = (draw - DRAWS.get(draw, 0)) // 2
+                for game in games[:first_round]:
+                    game[2] = date(year, 12, 31).isoformat()
+                for game in games[first_round:]:
+                    game[1] = date(year + 1, 1, 1).isoformat()
+                csvwriter.writerows(games[:first_round])
+                pending = games[first_round:]
+
+        paths.append(path)
+    return paths
+
+
+class _GameGenerator:
+    """
+    Auxiliary class of generate() that draws the games of the tournaments, keeping track of the yearly skills and WTA
+    ranks of the players.
+    """
+
+    def __init__(self, rng, names, skills, retirement_rate, missing_rank_rate):
+        self.rng = rng
+        self.names = names
+        self.skills = skills
+        self.retirement_rate = retirement_rate
+        self.missing_rank_rate = missing_rank_rate
+        self.ranks = []
+
+    def new_year(self):
+        # the skills drift from a year to the next, and the WTA ranks follow the skills
+        self.skills = [skill + self.rng.gauss(0, 50) for skill in self.skills]
+        order = sorted(range(len(self.skills)), key=lambda player: -self.skills[player])
+        self.ranks = [0] * len(order)
+        for rank, player in enumerate(order, 1):
+            self.ranks[player] = rank
+
+    def knockout(self, name, start, end, draw):
+        """
+        Function that returns the games of a knockout tournament, round by round. The best players of the draw get the
+        byes and play their first game against a winner of the first round.
+        """
+
+        entrants = sorted(self.rng.sample(range(len(self.names)), draw), key=lambda player: self.ranks[player])
+        byes = DRAWS.get(draw, 0)
+        seeds, others = entrants[:byes], entrants[byes:]
+        self.rng.shuffle(others)
+
+        games = []
+        winners = self._round(games, name, start, end, others)
+        if byes:
+            # each seed plays a winner of the first round, the other winners playing each other
+            players = []
+            for k, winner in enumerate(winners):
+                players.append(winner)
+                if k < byes:
+                    players.append(seeds[k])
+            winners = players
+
+        while len(winners) > 1:
+            winners = self._round(games, name, start, end, winners)
+        return games
+
+    def round_robin(self, name, start, end):
+        """
+        Function that returns the games of a round robin tournament between the 8 best players: three rounds in two
+        groups of 4, then the semifinals between the first of each group and the second of the other group and the
+        final. The games of both groups alternate as in the data, so that round_robin() recognizes the groups.
+        """
+
+        best = sorted(range(len(self.names)), key=lambda player: self.ranks[player])[:8]
+        groups = [best[0::2], best[1::2]]
+        wins = {player: 0 for player in best}
+
+        games = []
+        for a, b, c, d in ((0, 1, 2, 3), (0, 2, 1, 3), (0, 3, 1, 2)):
+            for group in groups:
+                for player1, player2 in ((group[a], group[b]), (group[c], group[d])):
+                    winner = self._game(games, name, start, end, player1, player2)
+                    wins[winner] += 1
+
+        standings = [sorted(group, key=lambda player: -wins[player]) for group in groups]
+        finalists = [self._game(games, name, start, end, standings[0][0], standings[1][1]),
+                     self._game(games, name, start, end, standings[1][0], standings[0][1])]
+        self._game(games, name, start, end, *finalists)
+        return games
+
+    def _round(self, games, name, start, end, players):
+        # players are paired in order, and the winners are returned in the order of their games
+        return [self._game(games, name, start, end, players[k], players[k + 1]) for k in range(0, len(players), 2)]
+
+    def _game(self, games, name, start, end, player1, player2):
+        """
+        Auxiliary function that appends a game between the two players to games and returns its winner.
+        """
+
+        rng = self.rng
+        if rng.random() < 0.5: # the winner isn't always the first player of the game
+            player1, player2 = player2, player1
+        probability = 1 / (1 + 10 ** ((self.skills[player2] - self.skills[player1]) / 400)) # of player1 winning
+        player1_won = rng.random() < probability
+        winner, loser = (player1, player2) if player1_won else (player2, player1)
+
+        # set scores from the winner's point of view, then from player1's point of view
+        if rng.random() < self.retirement_rate:
+            sets = [rng.choice(WINNING_SETS) if rng.random() < 0.5 else _reverse(rng.choice(WINNING_SETS)) for _ in
+                    range(rng.randrange(3))]
+            sets.append(str(rng.randrange(6)) + "-" + str(rng.randrange(6))) # set being played at the retirement
+            comment = self.names[loser] + " Retired"
+        else:
+            sets = [rng.choice(WINNING_SETS), rng.choice(WINNING_SETS)]
+            if rng.random() < 0.35: # three sets game
+                sets.insert(rng.randrange(2), _reverse(rng.choice(WINNING_SETS)))
+            comment = "Completed"
+        if not player1_won:
+            sets = [_reverse(score) for score in sets]
+        sets += [""] * (3 - len(sets))
+
+        games.append([name, start.isoformat(), end.isoformat(), "3", self.names[player1], self.names[player2],
+                      self._rank(player1), self._rank(player2)] + sets + [comment])
+        return winner
+
+    def _rank(self, player):
+        if self.rng.random() < self.missing_rank_rate:
+            return ""
+        return str(float(self.ranks[player]))
+
+
+def _reverse(score):
+    return score[::-1] # the scores only have one digit per player
+
+
+def _player_names(rng, players):
+    """
+    Auxiliary function that returns the list of the unique player names, written as in the data ("Surname A."). Two
+    letters are used for the first name when the surname and first letter are already taken, as "Pliskova Ka.".
+    """
+
+    names, taken = [], set()
+    while len(names) < players:
+        surname = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))) + rng.choice(NAME_ENDINGS)
+        surname = surname.capitalize()
+        first = chr(ord("A") + rng.randrange(26))
+        name = surname + " " + first + "."
+        if name in taken:
+            name = surname + " " + first + chr(ord("a") + rng.randrange(26)) + "."
+        if name not in taken:
+            taken.add(name)
+            names.append(name)
+    return names
+
+
+def _calendar(rng, tournaments):
+    """
+    Auxiliary function that returns the list of the (name, draw) of the knockout tournaments of a year, in calendar
+    order. The same tournaments are played every year, four of them being grand slams with a 128 players draw.
+    """
+
+    calendar, taken = [], {ROUND_ROBIN_NAME}
+    grand_slams = {tournaments * k // 4 + 1 for k in range(4)} if tournaments > 4 else set(range(4))
+    while len(calendar) < tournaments:
+        city = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+        name = city + " " + rng.choice(TOURNAMENT_KINDS)
+        if name in taken:
+            continue
+        taken.add(name)
+        if len(calendar) in grand_slams:
+            draw = GRAND_SLAM_DRAW
+        else:
+            draw = rng.choices(list(DRAWS), weights=DRAW_WEIGHTS)[0]
+        calendar.append((name, draw))
+    return calendar
+
+
+def _start_date(year, slot, slots):
+    # the tournaments are spread over the weeks of the year, from the first Monday to the beginning of December
+    first_monday = date(year, 1, 1) + timedelta(days=-date(year, 1, 1).weekday() % 7)
+    return first_monday + timedelta(weeks=slot * 48 // slots)
+
+
+def _length(draw):
+    return timedelta(days=13 if draw >= 96 else 6) # end date of the tournament after its start date
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deterministic generator of synthetic tournament data.")
+    parser.add_argument("directory", help="directory of the csv files")
+    parser.add_argument("--years", type=int, nargs=2, default=[2007, 2021], help="first and last year")
+    parser.add_argument("--tournaments", type=int, default=55, help="number of knockout tournaments a year")
+    parser.add_argument("--players", type=int, default=1000, help="number of players")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random generator")
+    args = parser.parse_args(argv)
+
+    paths = generate(args.directory, args.years[0], args.years[1], args.tournaments, args.players, args.seed)
+    print("Wrote", len(paths), "files in", args.directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import copy
+import os
+
+import pytest
+
+from utils import profiling
+from utils.data_reconstruction import (annotate, correct_error, load_matches, proper_round, round, round_robin,
+                                       winner, _sort_key)
+from utils.match_table import MatchTable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def raw():
+    data = sorted(load_matches(os.path.join(ROOT, "data", "*.csv")), key=_sort_key)
+    correct_error(data)
+    return data
+
+
+@pytest.fixture(scope="module")
+def stages(raw):
+    # reference annotation of the lists by the four stages, one after the other
+    data = copy.deepcopy(raw)
+    winner(data)
+    round(data)
+    round_robin(data)
+    proper_round(data)
+    return data
+
+
+def test_annotate_lists_matches_stages(raw, stages):
+    data = copy.deepcopy(raw)
+    annotate(data)
+    assert data == stages
+
+
+def test_profiled_annotate_lists_matches_stages(raw, stages):
+    # the winners and the rounds are appended by two loops instead of one while profiling
+    data = copy.deepcopy(raw)
+    with profiling.profile() as records:
+        annotate(data)
+    assert data == stages
+    assert [record["stage"] for record in records] == ["winner", "round", "round_robin", "proper_round", "annotate"]
+
+
+def test_annotate_table_matches_stages(raw, stages):
+    table = MatchTable.from_rows(raw)
+    annotate(table)
+    assert table.to_rows() == stages
+
+
+def test_table_stages_match_list_stages(raw, stages):
+    table = MatchTable.from_rows(raw)
+    winner(table)
+    round(table)
+    round_robin(table)
+    proper_round(table)
+    assert table.to_rows() == stages
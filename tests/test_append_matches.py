@@ -0,0 +1,66 @@
+import itertools
+import os
+from glob import glob
+
+import numpy as np
+import pytest
+
+from utils.data_reconstruction import (append_matches, build_dataset, edition_index, head_to_head_index, load_matches,
+                                       player_index)
+from utils.match_table import MatchTable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FILES = sorted(glob(os.path.join(ROOT, "data", "*.csv")))
+
+
+@pytest.fixture(scope="module")
+def full():
+    return build_dataset(FILES)
+
+
+def weeks(rows):
+    # games of a season grouped by week of their end date, as ingested during the season
+    rows = sorted(rows, key=lambda match: match[2])
+    return [list(games) for _, games in itertools.groupby(rows, key=lambda match: match[2].isocalendar()[:2])]
+
+
+@pytest.mark.parametrize("split", [-1, -3])
+def test_append_seasons_matches_rebuild(full, split):
+    dataset = build_dataset(FILES[:split])
+    indexes = edition_index(dataset), player_index(dataset), head_to_head_index(dataset)
+
+    append_matches(dataset, load_matches(FILES[split:]), *indexes)
+
+    assert dataset == full
+    assert indexes == (edition_index(full), player_index(full), head_to_head_index(full))
+
+
+def test_weekly_appends_match_rebuild(full):
+    dataset = build_dataset(FILES[:-1])
+    indexes = edition_index(dataset), player_index(dataset), head_to_head_index(dataset)
+
+    for games in weeks(load_matches(FILES[-1:])):
+        append_matches(dataset, games, *indexes)
+
+    assert dataset == full
+    assert indexes == (edition_index(full), player_index(full), head_to_head_index(full))
+
+
+def test_table_append_matches_rebuild(full):
+    table = MatchTable.from_rows(build_dataset(FILES[:-1]))
+    # indexes built before the appends, updated by MatchTable.splice()
+    table.edition_index(), table.player_index(), table.head_to_head_index(), table.date_index("start")
+
+    for games in weeks(load_matches(FILES[-1:])):
+        append_matches(table, games)
+
+    assert table.to_rows() == full
+    # the indexes were kept and updated instead of being dropped
+    assert {"edition", "player", "head_to_head", ("date", "start")} <= set(table._indexes)
+    rebuilt = MatchTable(table.columns(), table.players, table.tournaments, table.texts)
+    assert table.edition_index() == rebuilt.edition_index()
+    assert table.head_to_head_index() == rebuilt.head_to_head_index()
+    for updated, expected in zip(table.player_index(), rebuilt.player_index()):
+        assert np.array_equal(updated, expected)
+    for updated, expected in zip(table.date_index("start"), rebuilt.date_index("start")):
+        assert np.array_equal(updated, expected)
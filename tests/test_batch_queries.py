@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from utils.data_reconstruction import (build_dataset, edition_index, eliminations, finals_winners, head_to_heads,
+                                       round_played, rounds_confrontations, rounds_played, two_players_games,
+                                       which_round, who_played_who, who_won_final)
+from utils.match_table import MatchTable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUNDS = ["Final", "Semifinals", "Quarterfinals", "Third place match", "Round robin", 1, 2, 5]
+
+
+@pytest.fixture(scope="module")
+def data():
+    return build_dataset(os.path.join(ROOT, "data", "*.csv"))
+
+
+@pytest.fixture(scope="module", params=["list", "table"])
+def batch_data(request, data):
+    return data if request.param == "list" else MatchTable.from_rows(data)
+
+
+@pytest.fixture(scope="module")
+def editions(data):
+    # a few editions of every year, round robin tournaments included, and an edition that doesn't exist
+    editions = sorted(edition_index(data))
+    return editions[::25] + [("WTA Finals", 2019), ("Sony Ericsson Championships", 2008), ("Unknown Open", 2015)]
+
+
+def players_of(data, editions):
+    # players of the last game and of the first game of each edition
+    index = edition_index(data)
+    return [(player, tournament, year) for tournament, year in editions if (tournament, year) in index
+            for player in (data[index[(tournament, year)].stop - 1][3], data[index[(tournament, year)].start][4])]
+
+
+def printed(capsys, query, *args):
+    capsys.readouterr()
+    query(*args)
+    return capsys.readouterr().out
+
+
+def test_finals_winners(data, batch_data, editions, capsys):
+    for record in finals_winners(batch_data, editions):
+        out = printed(capsys, who_won_final, data, record["tournament"], record["year"])
+        if record["winner"] is None:
+            assert out == "The algorithm didn't find the winner. Please check the given year, tournament name and " \
+                          "round.\n"
+        else:
+            assert out == "The winner of the {} {} is {}\n".format(record["year"], record["tournament"],
+                                                                   record["winner"])
+
+
+def test_rounds_confrontations(data, batch_data, editions, capsys):
+    questions = [(tournament, year, round) for tournament, year in editions[:12] + editions[-3:] for round in ROUNDS]
+    for record in rounds_confrontations(batch_data, questions):
+        lines = printed(capsys, who_played_who, data, record["tournament"], record["year"],
+                        record["round"]).splitlines()[2:] # after the empty line and the title
+        if record["games"]:
+            assert lines == [str(game) for game in record["games"]]
+        else:
+            assert lines == ["The algorithm didn't find the required confrontations. Please check the given year, "
+                             "tournament name and round."]
+
+
+def test_eliminations(data, batch_data, editions, capsys):
+    for record in eliminations(batch_data, players_of(data, editions) + [("Nobody N.", "WTA Finals", 2019)]):
+        out = printed(capsys, which_round, data, record["player"], record["tournament"], record["year"])
+        player, tournament, year, eliminated = record["player"], record["tournament"], record["year"], record["round"]
+        if record["won"]:
+            expected = ["{} won the {} {}".format(player, year, tournament)]
+        elif eliminated == "Round robin":
+            expected = ["{} was eliminated from the {} {} at the round robin stage.".format(player, year, tournament)]
+        elif type(eliminated) == int:
+            expected = ["{} was eliminated from the {} {} at the round {}".format(player, year, tournament, eliminated)]
+        elif type(eliminated) == str:
+            expected = ["{} was eliminated from the {} {} at the {}".format(player, year, tournament, eliminated)]
+        else: # nothing is printed when the tournament isn't found
+            expected = [[], ["The algorithm didn't find the round. Please check the given year, tournament name and "
+                             "player name."]]
+            assert out.splitlines()[2:] in expected
+            continue
+        assert out.splitlines()[2:] == expected
+
+
+def test_rounds_played(data, batch_data, editions, capsys):
+    players = sorted({player for player, _, _ in players_of(data, editions)})[:10] + ["Nobody N."]
+    for record in rounds_played(batch_data, [(player, round) for player in players for round in ROUNDS]):
+        out = printed(capsys, round_played, data, record["player"], record["round"])
+        if type(record["round"]) == str:
+            assert out == "\n\n{} played {} {}\n".format(record["player"], record["count"], record["round"])
+        else:
+            assert out == "\n\n{} played {} round {}\n".format(record["player"], record["count"], record["round"])
+
+
+def test_head_to_heads(data, batch_data, editions, capsys):
+    players = sorted({player for player, _, _ in players_of(data, editions)})[:8] + ["Nobody N."]
+    for record in head_to_heads(batch_data, [(a, b) for a in players for b in players if a != b]):
+        out = printed(capsys, two_players_games, data, record["player1"], record["player2"])
+        player1, player2 = record["player1"], record["player2"]
+        if record["games"]:
+            expected = "{} played against {} {} times and {} won {} of these games and {} won {} of these games.".format(
+                player1, player2, record["games"], player1, record["player1_wins"], player2, record["player2_wins"])
+        else:
+            expected = "{} never played against {}".format(player1, player2)
+        assert out == "\n\n" + expected + "\n"
@@ -0,0 +1,84 @@
+import os
+import shutil
+from glob import glob
+
+import pytest
+
+from utils.data_reconstruction import build_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FILES = sorted(glob(os.path.join(ROOT, "data", "*.csv")))
+
+
+@pytest.fixture
+def files(tmp_path):
+    # copies of the csv files, which the tests modify
+    directory = tmp_path / "data"
+    directory.mkdir()
+    for path in FILES:
+        shutil.copy(path, directory)
+    return str(directory / "*.csv")
+
+
+def truncate(path, lines):
+    with open(path) as f:
+        content = f.readlines()
+    with open(path, "w") as f:
+        f.writelines(content[:-lines])
+
+
+def test_hit_and_miss_match_cold_build(files, tmp_path):
+    cache = str(tmp_path / "cache")
+    cold = build_dataset(files)
+
+    assert build_dataset(files, cache=cache) == cold # miss
+    assert build_dataset(files, cache=cache) == cold # hit
+    assert build_dataset(files, columnar=True, cache=cache).to_rows() == cold # MatchTable from the cached lists
+    assert build_dataset(files, columnar=True, cache=cache).to_rows() == cold # memory-mapped hit
+
+
+def test_partial_rebuild_matches_cold_build(files, tmp_path):
+    cache = str(tmp_path / "cache")
+    paths = sorted(glob(files))
+    build_dataset(files, cache=cache)
+    build_dataset(files, columnar=True, cache=cache)
+
+    # changed file in the middle of the years: only its tournaments are annotated again
+    truncate(paths[len(paths) // 2], 200)
+    assert build_dataset(files, cache=cache) == build_dataset(files)
+    assert build_dataset(files, columnar=True, cache=cache).to_rows() == build_dataset(files)
+
+    # removed file, then added back
+    removed = paths[3] + ".removed"
+    os.rename(paths[3], removed)
+    assert build_dataset(files, cache=cache) == build_dataset(files)
+    os.rename(removed, paths[3])
+    assert build_dataset(files, cache=cache, workers=2) == build_dataset(files)
+
+
+def test_interrupted_build_is_ignored(files, tmp_path):
+    cache = str(tmp_path / "cache")
+    cold = build_dataset(files)
+    build_dataset(files, cache=cache)
+
+    # a build written without its manifest, as left by an interrupted run, is never read
+    for manifest in glob(os.path.join(cache, "*.json")):
+        os.remove(manifest)
+    for build in glob(os.path.join(cache, "*.pickle")):
+        with open(build, "wb") as f:
+            f.write(b"\x80\x04truncated")
+    assert build_dataset(files, cache=cache) == cold
+
+
+def test_lists_are_not_read_from_a_columnar_build(files, tmp_path):
+    # WTA ranks written as "12" instead of "12.0", which a MatchTable can't give back
+    for path in glob(files):
+        with open(path) as f:
+            content = f.read()
+        with open(path, "w") as f:
+            f.write(content.replace(".0,", ","))
+    cache = str(tmp_path / "cache")
+    cold = build_dataset(files)
+
+    assert build_dataset(files, columnar=True, cache=cache).to_rows() == build_dataset(files, columnar=True).to_rows()
+    assert build_dataset(files, cache=cache) == cold
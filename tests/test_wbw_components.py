@@ -0,0 +1,47 @@
+import os
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import pytest
+
+from utils.data_reconstruction import build_dataset
+from utils.wbw_performance import past_graph
+from utils.wbw_rank import wbw_iteration
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAMPING = 0.85
+ITERATION_MAX = 100
+
+
+@pytest.fixture(scope="module")
+def window():
+    # loss graph of the year preceding the first ranking of 2016, as in wbw_comparison()
+    data = build_dataset(os.path.join(ROOT, "data", "*.csv"))
+    return past_graph(data, date(2016, 1, 4), timedelta(days=364))
+
+
+def run(window, backend, tolerance):
+    updated_rank, defeated_dic = window
+    return wbw_iteration(OrderedDict(updated_rank), {player: list(lost) for player, lost in defeated_dic.items()}, 10,
+                         ITERATION_MAX, backend, None, tolerance, "l1", DAMPING)
+
+
+@pytest.mark.parametrize("tolerance", [None, 1e-10])
+def test_components_match_solve(window, tolerance):
+    components = run(window, "components", tolerance)
+    solved = dict(run(window, "solve", None))
+
+    # without tolerance, each level converges on the change the global iterations reach within iteration_max
+    effective = tolerance if tolerance is not None else 2 * DAMPING ** (ITERATION_MAX - 1)
+    assert components.converged
+    assert components.iterations > 0
+    assert sorted(player for player, _ in components) == sorted(solved)
+    # the distance to the fixed point is bounded by the last change over 1 - damping
+    assert max(abs(score - solved[player]) for player, score in components) <= effective / (1 - DAMPING)
+
+
+def test_components_reject_damping_one():
+    # the undefeated player is alone in his component and would get 0 / 0 as score
+    updated_rank = OrderedDict((player, 0) for player in ("a", "b", "c"))
+    with pytest.raises(ValueError):
+        wbw_iteration(updated_rank, {"b": ["a"], "c": ["a", "b"]}, 10, 100, "components", None, None, "l1", 1)
@@ -0,0 +1,44 @@
+import os
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import pytest
+
+from utils.data_reconstruction import build_dataset
+from utils.wbw_performance import past_graph
+from utils.wbw_rank import wbw_iteration, wbw_ranking
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def data():
+    return build_dataset(os.path.join(ROOT, "data", "*.csv"))
+
+
+def run(graph, backend, tolerance=None):
+    updated_rank, defeated_dic = graph
+    return wbw_iteration(OrderedDict(updated_rank), {player: list(lost) for player, lost in defeated_dic.items()}, 10,
+                         500, backend, None, tolerance)
+
+
+@pytest.mark.parametrize("tolerance", [None, 1e-10])
+def test_sparse_matches_dict_on_window(data, tolerance):
+    # loss graph of the year preceding the first ranking of 2016, as in wbw_comparison()
+    graph = past_graph(data, date(2016, 1, 4), timedelta(days=364))
+    expected = run(graph, "dict", tolerance)
+    result = run(graph, "sparse", tolerance)
+
+    # same number of iterations and same scores up to floating point rounding
+    assert result.iterations == expected.iterations
+    assert result.converged == expected.converged
+    scores = dict(expected)
+    assert sorted(player for player, _ in result) == sorted(scores)
+    assert max(abs(score - scores[player]) for player, score in result) <= 1e-12
+
+
+@pytest.mark.parametrize("period", [2012, [2019, 2020]])
+def test_sparse_ranking_matches_dict(data, period):
+    expected = dict(wbw_ranking(data, period))
+    result = wbw_ranking(data, period, backend="sparse")
+    assert max(abs(score - expected[player]) for player, score in result) <= 1e-12
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+from utils.data_reconstruction import build_dataset
+from utils.match_table import MatchTable
+from utils.wdl_rank import scores_by_year, winners_dont_lose
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def data():
+    return build_dataset(os.path.join(ROOT, "data", "*.csv"))
+
+
+@pytest.mark.parametrize("period", [2007, 2012, 2016, 2020, [2010, 2011, 2012], [2019, 2020], list(range(2007, 2023))])
+def test_cube_and_table_match_list(data, period):
+    rank = winners_dont_lose(data, period)
+
+    # same players, same order of the players of equal score and same scores whatever the arguments
+    assert [list(item) for item in winners_dont_lose(MatchTable.from_rows(data), period)] == rank
+    assert [list(item) for item in winners_dont_lose(None, period, cube=scores_by_year(data))] == rank
@@ -1,9 +1,534 @@
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 import csv
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 from glob import iglob
+import hashlib
+import heapq
+import json
+import os
 import pickle
+import shutil
+import sys
 
+import numpy as np
 
+from .match_table import (MatchTable, NOT_ANNOTATED, ROUND_ROBIN, FINAL, SEMIFINALS, QUARTERFINALS, THIRD_PLACE,
+                          round_code, round_name)
+from . import profiling
+from .profiling import measure, stage
+
+# version of the dataset built from the csv files, to increase whenever a change of the parsing or of the annotation
+# stages changes the built dataset, so that the builds cached by build_dataset() are not reused
+PIPELINE_VERSION = 1
+
+
+def load_matches(paths):
+    """
+    Generator that yields the games of the given csv files one at a time, each game being parsed into the list format
+    of the dataset (tournament, start date, end date, player1, player2, rank1, rank2, set1, set2, set3, comment). The
+    files are only opened when their first game is requested, so calling the function does no I/O.
+
+    Args:
+
+    paths: glob pattern of the csv files (string) or list of csv file paths
+
+    """
+
+    if type(paths) == str:
+        paths = iglob(paths)
+
+    for file in paths: # iterating over the different csv files
+        with open(file, "r") as f:
+            csvreader = csv.reader(f) # reading the csv files
+            header = next(csvreader) # skipping the headers
+            for row in csvreader:
+                tournament, start, end, bestOf, player1, player2, rank1, rank2, set1, set2, set3, comment = row
+                yield [tournament.strip(), _parse_date(start), _parse_date(end), player1.strip(), player2.strip(),
+                       rank1, rank2, set1.strip(), set2.strip(), set3.strip(), comment.strip()]
+
+
+@lru_cache(maxsize=None)
+def _parse_date(text):
+    """
+    Auxiliary function that converts a "%Y-%m-%d" date string to a date object. The same few hundred dates are repeated
+    over the whole dataset, so each string is only parsed once.
+    """
+
+    return date.fromisoformat(text)
+
+
+def _sort_key(match):
+    return match[0], match[1] # tournament name and start date
+
+
+def _load_sorted(path):
+    """
+    Auxiliary function run by the worker processes of build_dataset(), returning the games of the given csv file sorted
+    by tournament and date.
+    """
+
+    return sorted(load_matches([path]), key=_sort_key)
+
+
+def _load_file(path):
+    """
+    Auxiliary function run by the worker processes of build_dataset() with a cache, returning the games of the given
+    csv file in the order of the file.
+    """
+
+    return list(load_matches([path]))
+
+
+def build_dataset(paths, out=None, workers=None, columnar=False, cache=None):
+    """
+    Function that builds the annotated dataset from the given csv files and returns it. The games streamed by
+    load_matches() are collected directly into the sorted list, which is then corrected in place by correct_error() and
+    annotated by annotate(), giving the same result as winner(), round(), round_robin() and proper_round() in a single
+    pass, so a single copy of the dataset is held in memory. With columnar set to True, the list is converted to a
+    MatchTable before annotate() writes the annotations into its columns.
+
+    Args:
+
+    paths: glob pattern of the csv files (string) or list of csv file paths
+    out: path of the pickle file, or of the directory if columnar is True, where the dataset is saved (None by default
+    to only return the dataset)
+    workers: number of worker processes (None by default to read the files in a single process). Each file is parsed
+    and sorted by a worker, then the sorted files are merged with a k-way merge. As both sorts are stable and the merge
+    keeps the order of the files for equal keys, the dataset is identical to the single process one. With a cache, the
+    workers only parse the files missing from the cache.
+    columnar: if set to True (False as default value), the dataset is returned as a MatchTable and saved with
+    MatchTable.save(), so that it can be memory-mapped with MatchTable.open() instead of being unpickled.
+    cache: directory of the build cache (None by default). Each build is stored under a key made of PIPELINE_VERSION
+    and the hashes of the input files, as a pickle file or as a MatchTable directory if columnar is True, and is reused
+    as long as the files are unchanged. Otherwise, the cached build sharing the most files with the input files is
+    reused: only the tournaments of the added, removed or changed files are annotated again, from the games of every
+    input file. The parsed games of each file are also cached, so only the changed files are parsed again, by the worker
+    processes if workers is given.
+
+    """
+
+    if cache is not None:
+        dataset = _cached_dataset(paths, cache, columnar, workers)
+    else:
+        with measure("ingest") as record:
+            if workers is None:
+                dataset = sorted(load_matches(paths), key=_sort_key) # sorting the data by tournament and date
+            else:
+                if type(paths) == str:
+                    paths = iglob(paths)
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    dataset = list(heapq.merge(*executor.map(_load_sorted, list(paths)), key=_sort_key))
+            record["rows"] = len(dataset)
+        correct_error(dataset) # correcting dataset errors
+        if columnar: # the annotations are directly written into the columns of the table
+            dataset = MatchTable.from_rows(dataset)
+        annotate(dataset)
+
+    if columnar:
+        if not isinstance(dataset, MatchTable):
+            dataset = MatchTable.from_rows(dataset)
+        if out is not None:
+            dataset.save(out)
+
+    # Converting dataset into pickle object
+    elif out is not None:
+        with open(out, 'wb') as fw:
+            pickle.dump(dataset, fw)
+
+    return dataset
+
+
+def _cached_dataset(paths, cache, columnar, workers=None):
+    """
+    Auxiliary function that returns the annotated dataset of the given csv files from the build cache of
+    build_dataset(), as a MatchTable if columnar is True, building and storing it on a miss. The files missing from the
+    cache are parsed by the given number of worker processes (None to parse them in a single process). A build is only
+    read when its manifest lists it, and every file of the cache is written under a temporary name before being renamed,
+    so an interrupted build is never mistaken for a complete one.
+    """
+
+    if type(paths) == str:
+        paths = sorted(iglob(paths)) # the same files always give the same key
+    paths = list(paths)
+    hashes = [_file_hash(path) for path in paths]
+    key = hashlib.sha256(json.dumps([PIPELINE_VERSION, hashes]).encode()).hexdigest()
+    form = "columnar" if columnar else "pickle"
+    os.makedirs(os.path.join(cache, "partitions"), exist_ok=True)
+
+    # a MatchTable stores the ranks as floats, so the lists are never read from a columnar build: they would hold "12.0"
+    # where the csv files have "12"
+    stored = _manifests(cache)
+    manifests = {build: manifest for build, manifest in stored.items() if columnar or "pickle" in manifest["formats"]}
+    if key in manifests and form in manifests[key]["formats"]: # cache hit
+        with measure("ingest") as record:
+            dataset = _load_build(cache, manifests[key], form, columnar)
+            record["rows"] = len(dataset)
+        return dataset
+
+    if key in manifests: # cache hit of the lists when the MatchTable is requested
+        with measure("ingest") as record:
+            dataset = _load_build(cache, manifests[key], form, columnar)
+            record["rows"] = len(dataset)
+    else:
+        base = _base_build(cache, manifests, hashes)
+        if base is not None: # annotating again only the tournaments of the files that changed
+            with measure("ingest") as record:
+                _parse_partitions(cache, paths, hashes, workers)
+                files = dict(zip(hashes, paths)) # removed files are only known by their hash
+                changed = Counter(base["files"]) - Counter(hashes) + (Counter(hashes) - Counter(base["files"]))
+                touched = {match[0] for digest in changed for match in _partition(cache, files.get(digest), digest)}
+                tournaments = {name: [] for name in touched} # games of each tournament, in the order of the files
+                for path, digest in zip(paths, hashes):
+                    for match in _partition(cache, path, digest):
+                        if match[0] in tournaments:
+                            tournaments[match[0]].append(match)
+                dataset = _load_build(cache, base, form, columnar)
+                record["rows"] = len(dataset)
+            _update_tournaments(dataset, tournaments, False)
+        else:
+            with measure("ingest") as record:
+                _parse_partitions(cache, paths, hashes, workers)
+                dataset = sorted((match for path, digest in zip(paths, hashes) for match in
+                                  _partition(cache, path, digest)), key=_sort_key)
+                record["rows"] = len(dataset)
+            _annotate(dataset)
+            if columnar:
+                dataset = MatchTable.from_rows(dataset)
+
+    if form == "pickle":
+        _replace_atomic(os.path.join(cache, key + ".pickle"), lambda path: _dump(dataset, path))
+    else:
+        _replace_atomic(os.path.join(cache, key + ".columns"), dataset.save)
+    manifest = stored.get(key, {"key": key, "version": PIPELINE_VERSION, "files": hashes, "paths": paths,
+                                "formats": []})
+    manifest["formats"] = sorted(set(manifest["formats"]) | {form})
+    # written last, once the build is complete
+    _replace_atomic(os.path.join(cache, key + ".json"), lambda path: _dump(manifest, path, json))
+    return dataset
+
+
+def _manifests(cache):
+    """
+    Auxiliary function that returns the dictionary where each key is the key of a complete build of the cache and its
+    value is the manifest of the build.
+    """
+
+    manifests = {}
+    for manifest_path in iglob(os.path.join(cache, "*.json")):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest["version"] == PIPELINE_VERSION:
+            manifest.setdefault("formats", ["pickle"])
+            manifests[manifest["key"]] = manifest
+    return manifests
+
+
+def _base_build(cache, manifests, hashes):
+    """
+    Auxiliary function that returns the manifest of the cached build sharing the most files with the given file hashes,
+    or None if no build shares a file. The parsed games of the files that differ must be in the cache, so that their
+    tournaments are known.
+    """
+
+    base, shared = None, 0
+    for manifest in manifests.values():
+        common = sum((Counter(manifest["files"]) & Counter(hashes)).values())
+        if common > shared and all(os.path.exists(_partition_path(cache, digest)) for digest in
+                                   set(manifest["files"]) - set(hashes)):
+            base, shared = manifest, common
+    return base
+
+
+def _load_build(cache, manifest, form, columnar):
+    """
+    Auxiliary function that loads a cached build, stored in the given form if available, and returns it as a list of
+    list or as a MatchTable if columnar is True. The columnar form is memory-mapped with MatchTable.open(). The lists
+    must be stored in the pickle form.
+    """
+
+    if form not in manifest["formats"]:
+        form = manifest["formats"][0]
+    if form == "columnar":
+        return MatchTable.open(os.path.join(cache, manifest["key"] + ".columns"))
+
+    with open(os.path.join(cache, manifest["key"] + ".pickle"), "rb") as fr:
+        dataset = pickle.load(fr)
+    return MatchTable.from_rows(dataset) if columnar else dataset
+
+
+def _replace_atomic(path, write):
+    """
+    Auxiliary function that calls write() on a temporary path, then renames the written file or directory to the given
+    path. A file is replaced in a single atomic rename. A directory can't be renamed over another one, so a previous
+    directory is first moved aside to a staging path and only removed once the new one is in place: the replacement
+    isn't atomic, but an interruption never loses the previous directory, which is moved back if the new one couldn't
+    be renamed.
+    """
+
+    temporary = "{}.{}.tmp".format(path, os.getpid())
+    previous = "{}.{}.old".format(path, os.getpid()) # staging path of a previous directory
+    try:
+        write(temporary)
+        if os.path.isdir(path):
+            os.replace(path, previous)
+        os.replace(temporary, path)
+    finally:
+        if os.path.isdir(previous):
+            if os.path.exists(path):
+                shutil.rmtree(previous)
+            else:
+                os.replace(previous, path)
+        if os.path.isdir(temporary):
+            shutil.rmtree(temporary)
+        elif os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def _dump(value, path, module=pickle):
+    """
+    Auxiliary function that writes the given value to the given path with pickle or json.
+    """
+
+    with open(path, "wb" if module is pickle else "w") as fw:
+        module.dump(value, fw)
+
+
+def _file_hash(path):
+    """
+    Auxiliary function that returns the SHA-256 hash of the content of the given file.
+    """
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _partition(cache, path, digest):
+    """
+    Auxiliary function that returns the parsed games of the given csv file, read from the build cache when the file
+    was already parsed. The path may be None for a file known only by its hash, whose games must be in the cache.
+    """
+
+    partition = _partition_path(cache, digest)
+    if os.path.exists(partition):
+        with open(partition, "rb") as fr:
+            return pickle.load(fr)
+
+    games = list(load_matches([path]))
+    _replace_atomic(partition, lambda temporary: _dump(games, temporary))
+    return games
+
+
+def _parse_partitions(cache, paths, hashes, workers):
+    """
+    Auxiliary function that parses with the given number of worker processes the csv files whose games aren't in the
+    build cache yet, and stores them in the cache. Nothing is done if workers is None, the files being then parsed one
+    by one by _partition().
+    """
+
+    missing = {digest: path for path, digest in zip(paths, hashes)
+               if not os.path.exists(_partition_path(cache, digest))}
+    if workers is None or not missing:
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for digest, games in zip(missing, executor.map(_load_file, list(missing.values()))):
+            _replace_atomic(_partition_path(cache, digest), lambda temporary: _dump(games, temporary))
+
+
+def _partition_path(cache, digest):
+    return os.path.join(cache, "partitions", "{}-{}.pickle".format(PIPELINE_VERSION, digest))
+
+
+def _annotate(data):
+    """
+    Auxiliary function that runs in place the annotation stages on a list of games ordered by tournament and date.
+    annotate() gives the same result as winner(), round(), round_robin() and proper_round() in a single pass.
+    """
+
+    correct_error(data) # correcting dataset errors
+    annotate(data) # determining the winner, the round and the round name of each game
+
+
+def append_matches(dataset, new_rows, edition=None, players=None, head_to_head=None):
+    """
+    Function that adds in place new games, for instance the games of a new season or of the last week, to an annotated
+    dataset without rebuilding it. The annotation stages only depend on the games of the same tournament, so only the
+    tournaments of the new games are annotated again: their games already in the dataset are merged by start date with
+    the new ones and go through correct_error(), winner(), round(), round_robin() and proper_round(). This covers the
+    tournaments stretching over the new year, whose end dates are corrected by correct_error(). The games of the other
+    tournaments are left untouched.
+
+    Args:
+
+    dataset: annotated list of list, where the inner list consists of the game details, or MatchTable
+    new_rows: new games in the format yielded by load_matches(), for instance load_matches("data/2022.csv")
+    edition, players, head_to_head: dictionaries returned by edition_index(), player_index() and head_to_head_index()
+    on the dataset, updated in place instead of being rebuilt (None by default). The indexes already built on a
+    MatchTable are updated in place by MatchTable.splice(). The per-year aggregates of wins_by_year() and
+    scores_by_year() aren't updated: they store the position of the first appearance of each player, which the new
+    games shift in all the years, so they should be built again after the games are appended.
+
+    Prerequisite:
+    The dataset should be ordered by first tournament name and secondly by tournament start date.
+
+    """
+
+    tournaments = {} # dictionary where each key is a tournament name and its value is the list of its new games
+    for match in new_rows:
+        tournaments.setdefault(match[0], []).append(list(match[:11]))
+
+    _update_tournaments(dataset, tournaments, True, edition, players, head_to_head)
+
+
+def _update_tournaments(dataset, tournaments, keep, edition=None, players=None, head_to_head=None):
+    """
+    Auxiliary function of append_matches() that annotates again in place the given tournaments of the dataset and
+    updates the given indexes.
+
+    Args:
+
+    dataset: annotated list of list, where the inner list consists of the game details, or MatchTable
+    tournaments: dictionary where each key is a tournament name and its value is the list of its games to add
+    keep: if set to True, the games of the tournaments already in the dataset are kept and merged with the given games.
+    Otherwise, they are replaced by the given games, which should be all the games of the tournament in the order of
+    the csv files.
+    edition, players, head_to_head: see append_matches()
+
+    """
+
+    if isinstance(dataset, MatchTable):
+        _append_table(dataset, tournaments, keep)
+        return
+
+    splices = [] # list of (first, last, games) where games replaced dataset[first:last]
+    # starting with the last tournament, so that the positions of the previous ones don't move
+    for name in sorted(tournaments, reverse=True):
+        first = bisect_left(dataset, name, key=lambda x: x[0])
+        last = bisect_right(dataset, name, key=lambda x: x[0])
+        games = dataset[first:last]
+        if head_to_head is not None:
+            _count_head_to_head(head_to_head, games, -1)
+        if keep:
+            for match in games:
+                del match[11:] # removing the annotations before annotating the tournament again
+        else:
+            games = []
+
+        games = sorted(games + tournaments[name], key=_sort_key)
+        if games:
+            _annotate(games)
+        dataset[first:last] = games
+        splices.insert(0, (first, last, games))
+
+    # shifts[k] is the number of games added before the end of the k-th annotated tournament
+    lasts = [last for first, last, games in splices]
+    shifts = [0]
+    for first, last, games in splices:
+        shifts.append(shifts[-1] + len(games) - (last - first))
+    starts = [first + shift for (first, last, games), shift in zip(splices, shifts)] # new first game positions
+
+    # proper_round() detects the third place match of the last edition of a tournament with the next game of the
+    # dataset, which isn't part of the annotated games
+    for start, (first, last, games) in zip(starts, splices):
+        _third_place(dataset, start - 1)
+        _third_place(dataset, start + len(games) - 1)
+
+    if edition is not None:
+        for key in [key for key in edition if key[0] in tournaments]:
+            del edition[key]
+        for key, part in edition.items():
+            edition[key] = slice(_moved(part.start, lasts, shifts), _moved(part.stop - 1, lasts, shifts) + 1)
+        for start, (first, last, games) in zip(starts, splices):
+            _add_editions(edition, games, start)
+
+    if players is not None:
+        firsts = [first for first, last, games in splices]
+        for player, games in players.items():
+            # keeping the games outside of the annotated tournaments at their new position
+            players[player] = [_moved(i, lasts, shifts) for i in games if
+                               bisect_right(firsts, i) == bisect_right(lasts, i)]
+        updated = set()
+        for start, (first, last, games) in zip(starts, splices):
+            for i, match in enumerate(games, start):
+                players.setdefault(match[3], []).append(i)
+                players.setdefault(match[4], []).append(i)
+                updated.update((match[3], match[4]))
+        for player in updated:
+            players[player].sort()
+
+    if head_to_head is not None:
+        for first, last, games in splices:
+            _count_head_to_head(head_to_head, games, 1)
+
+
+def _append_table(table, tournaments, keep):
+    """
+    MatchTable version of _update_tournaments(). Only the games of the given tournaments are converted to lists and
+    annotated again, then the columns are spliced with MatchTable.splice(), which also updates the indexes of the table.
+    """
+
+    # first game of each tournament, the tournaments being ordered by name
+    starts = np.flatnonzero(np.diff(table.tournament, prepend=-1)).tolist()
+    names = [table.tournaments[tournament] for tournament in table.tournament[starts].tolist()]
+    bounds = starts + [len(table)]
+
+    splices = [] # list of (first, last, games) where games replace the games [first, last) of the table
+    for name in sorted(tournaments):
+        k = bisect_left(names, name)
+        first = bounds[k]
+        last = bounds[k + 1] if k < len(names) and names[k] == name else first
+        games = [table.row(i)[:11] for i in range(first, last)] if keep else [] # removing the annotations
+        games = sorted(games + tournaments[name], key=_sort_key)
+        if games:
+            _annotate(games)
+        splices.append((first, last, games))
+    table.splice(splices)
+
+    # third place matches detected with the next game of the table, see append_matches()
+    shift = 0
+    for first, last, games in splices:
+        start = first + shift
+        _third_place_table(table, start - 1)
+        _third_place_table(table, start + len(games) - 1)
+        shift += len(games) - (last - first)
+
+
+def _third_place_table(table, i):
+    """
+    MatchTable version of _third_place().
+    """
+
+    if 0 < i < len(table) - 1 and table.tournament[i - 1] == table.tournament[i] and \
+            abs(int(table.round[i + 1]) - int(table.round[i])) > 1 and table.round[i - 1] == table.round[i]:
+        table.label[i - 1] = THIRD_PLACE
+
+
+def _moved(i, lasts, shifts):
+    """
+    Auxiliary function that returns the position after append_matches() of the game i, which doesn't belong to an
+    annotated tournament.
+    """
+
+    return i + shifts[bisect_right(lasts, i)]
+
+
+def _third_place(data, i):
+    """
+    Auxiliary function that runs the third place match detection of proper_round() on the last game i of a tournament.
+    """
+
+    if 0 < i < len(data) - 1 and data[i - 1][0] == data[i][0] and abs(data[i + 1][12] - data[i][12]) > 1 and \
+            data[i - 1][12] == data[i][12]:
+        data[i - 1][-1] = "Third place match"
+
+
+@stage("correct_error")
 def correct_error(data):
     """
     Function that corrects in place the dataset errors. For tournaments beginning at the end of a given year and ending
@@ -12,11 +537,15 @@ def correct_error(data):
 
     Args:
 
-    data: list of list where the inner list contains the game's details. Data should be ordered by firstly tournament
-    name and secondly by tournament start date.
+    data: list of list where the inner list contains the game's details, or MatchTable. Data should be ordered by
+    firstly tournament name and secondly by tournament start date.
 
     """
 
+    if isinstance(data, MatchTable):
+        _on_rows(data, correct_error)
+        return
+
     # variables detecting when moving to a new tournament
     tournament_name = None
     tournament_start_date = None
@@ -53,18 +582,24 @@ def correct_error(data):
             data[i][2] = tournament_end_date
 
 
+@stage("winner")
 def winner(data):
     """
     Function that modifies in place the given dataset, and append the winner name to each match list.
 
     Args:
 
-    data: list of list, where the inner list consists of the game details.
+    data: list of list, where the inner list consists of the game details, or MatchTable.
 
     Prerequisite: run correct_error() before running function
 
     """
 
+    if isinstance(data, MatchTable): # the winners are written into their column, as in annotate()
+        data.winner = _winner_column(data)
+        data.clear_indexes()
+        return
+
     for match in data:
         if match[10] != "Completed":  # if match not completed, then find which player retired
             if match[-1].split()[-1] == "Retired":
@@ -98,6 +633,7 @@ def winner(data):
                 match.append(match[4])
 
 
+@stage("round")
 def round(data, robin_tourn = None):
     """
     Function that modifies in place the given dataset to identify the different rounds of non round robin
@@ -108,7 +644,7 @@ def round(data, robin_tourn = None):
 
     Args:
 
-    data: list of list, where the inner list consists of the game details.
+    data: list of list, where the inner list consists of the game details, or MatchTable.
     robin_tourn: list of round robin tournaments (string) where each tournament within the list never changes to knockout
     tournament over the considered period. If "robin_tourn" not specified, the function uses the list of round robin
     tournaments for single women over the 2007-2021 period (current dataset).
@@ -123,6 +659,11 @@ def round(data, robin_tourn = None):
     robin_excpt = "Commonwealth Bank Tournament of Champions"
     robin_excpt_date = 2009
 
+    if isinstance(data, MatchTable): # the rounds are written into their column, as in annotate()
+        _update_columns(data, lambda rounds, labels, filled, append:
+                        _round_column(data, robin_tourn, robin_excpt, robin_excpt_date, append))
+        return
+
     # variable keeping track of the tournament
     tournament_name = data[0][0]
     tournament_end_date = data[0][2]
@@ -159,6 +700,7 @@ def round(data, robin_tourn = None):
             match.append(round_counter)
 
 
+@stage("round_robin")
 def round_robin(data, robin_tourn = None):
     """
     Function that modifies in place the given dataset to identify the different rounds of round robin tournaments.
@@ -171,7 +713,7 @@ def round_robin(data, robin_tourn = None):
 
     Args:
 
-    data: list of list, where the inner list consists of the game details.
+    data: list of list, where the inner list consists of the game details, or MatchTable.
     robin_tourn: list of round robin tournaments (string) where each tournament within the list never changes to knockout
     tournament over the considered period. If "robin_tourn" not specified, the function uses the list of round robin
     tournaments for single women over the 2007-2021 period (current dataset).
@@ -187,6 +729,14 @@ def round_robin(data, robin_tourn = None):
                       "WTA Elite Trophy"]
     robin_excpt = "Commonwealth Bank Tournament of Champions"
     robin_excpt_date = 2009
+
+    if isinstance(data, MatchTable): # the rounds and labels are written into their columns, as in annotate()
+        def step(rounds, labels, filled, append):
+            for games in _round_column(data, robin_tourn, robin_excpt, robin_excpt_date, append, knockout=False):
+                _round_robin_group(games, data.player1, data.player2, append)
+
+        _update_columns(data, step)
+        return
     tournament_end_date = None
 
     # variable used for establishing groups
@@ -392,6 +942,7 @@ def round_robin(data, robin_tourn = None):
                 data[i].append(round_count)
 
 
+@stage("proper_round")
 def proper_round(data):
     """
     Function that modifies in place the given dataset to give appropriate name to each tournament rounds. This
@@ -402,7 +953,7 @@ def proper_round(data):
 
     Arg:
 
-    data: list of list, where the inner list consists of the game details.
+    data: list of list, where the inner list consists of the game details, or MatchTable.
 
     Prerequisite:
     The dataset should be ordered by first tournament name and secondly by tournament start date.
@@ -410,6 +961,10 @@ def proper_round(data):
 
     """
 
+    if isinstance(data, MatchTable): # the labels are written into their column, as in annotate()
+        _update_columns(data, lambda rounds, labels, filled, append: _label_column(data, rounds, labels, filled))
+        return
+
     # variables used for detecting when moving to a new tournament
     tournament_name = data[-1][0]
     tournament_end_date = data[-1][2]
@@ -442,16 +997,485 @@ def proper_round(data):
                 data[i].append(data[i][12])
 
 
-def who_won_final(data, tournament_name, tournament_year, printer=True):
+@stage("annotate")
+def annotate(data, robin_tourn = None):
+    """
+    Function that annotates in place the given dataset in a single forward pass, giving the same result as running
+    winner(), round(), round_robin() and proper_round() one after the other. The winner, round and round label of each
+    game are written into preallocated columns: the winners are found with vectorized lookups into the set scores and
+    comments vocabularies, the rounds with one pass over the games of each tournament edition, and the round labels
+    with vectorized comparisons of the rounds. A list of list is annotated in place instead, see _annotate_rows().
+
+    Args:
+
+    data: list of list, where the inner list consists of the game details, or MatchTable. The games shouldn't be
+    annotated yet.
+    robin_tourn: list of round robin tournaments (string), see round() and round_robin().
+
+    Prerequisite:
+    The dataset should be ordered by first tournament name and secondly by tournament start date.
+    correct_error() should be run on the dataset before running the function.
+
+    """
+
+    if not robin_tourn:
+        robin_tourn = ["BNP Paribas WTA Finals", "WTA Finals", "Sony Ericsson Championships",
+                      "Qatar Airways Tournament of Champions Sofia", "Garanti Koza WTA Tournament of Champions",
+                      "WTA Elite Trophy"]
+    robin_excpt = "Commonwealth Bank Tournament of Champions"
+    robin_excpt_date = 2009
+
+    if not isinstance(data, MatchTable):
+        _annotate_rows(data, robin_tourn, robin_excpt, robin_excpt_date)
+        return
+
+    n = len(data)
+    with measure("winner") as record:
+        winner_column = _winner_column(data)
+        record["rows"] = n
+    rounds = np.zeros(n, dtype=np.int8)
+    labels = np.zeros(n, dtype=np.int8)
+    filled = np.zeros(n, dtype=np.int8) # number of annotations given to each game after its winner
+    append = _appender(rounds, labels, filled)
+
+    with measure("round") as record:
+        robin_groups = _round_column(data, robin_tourn, robin_excpt, robin_excpt_date, append)
+        record["rows"] = n
+
+    with measure("round_robin") as record:
+        for games in robin_groups:
+            _round_robin_group(games, data.player1, data.player2, append)
+        record["rows"] = sum(len(games) for games in robin_groups)
+
+    with measure("proper_round") as record:
+        _label_column(data, rounds, labels, filled)
+        record["rows"] = n
+
+    data.winner = winner_column
+    data.round = rounds
+    data.label = labels
+    data.clear_indexes()
+
+
+def _annotate_rows(data, robin_tourn, robin_excpt, robin_excpt_date):
+    """
+    List of list version of annotate(). The winner and the round of each game are appended in place in a single loop,
+    the round robin tournaments being gathered and given their rounds by _round_robin_group(), then the round labels
+    are appended by proper_round(). The set scores are only parsed once per distinct text. While a profile() context is
+    open, the winners and the rounds are appended by two loops instead, so that each step is recorded.
+    """
+
+    if profiling.enabled():
+        with measure("winner") as record:
+            _annotate_loop(data, True, False, robin_tourn, robin_excpt, robin_excpt_date)
+            record["rows"] = len(data)
+        with measure("round") as record:
+            robin_groups = _annotate_loop(data, False, True, robin_tourn, robin_excpt, robin_excpt_date)
+            record["rows"] = len(data)
+    else:
+        robin_groups = _annotate_loop(data, True, True, robin_tourn, robin_excpt, robin_excpt_date)
+
+    with measure("round_robin") as record:
+        for games in robin_groups:
+            _round_robin_group(games, {i: data[i][3] for i in games}, {i: data[i][4] for i in games},
+                               lambda i, value: data[i].append(value))
+        record["rows"] = sum(len(games) for games in robin_groups)
+
+    if data:
+        proper_round(data)
+
+
+def _annotate_loop(data, winners, rounds, robin_tourn, robin_excpt, robin_excpt_date):
+    """
+    Auxiliary function of _annotate_rows() that appends in place the winner of each game if winners is True, and the
+    round of each knockout game if rounds is True. Returns the list of the games of each round robin tournament.
+    """
+
+    robin_names = set(robin_tourn)
+    player1_set = {} # whether player1 won the set, for each set score text
+
+    # variables keeping track of the tournament of round()
+    tournament_name = data[0][0] if data else None
+    tournament_end_date = data[0][2] if data else None
+    track = set()
+    round_counter = 1
+
+    robin_groups = [] # games of each round robin tournament of round_robin()
+
+    for i, match in enumerate(data):
+        # winner of the game, see winner()
+        if winners and match[10] == "Completed": # counting who is the first to have won two sets
+            for text in match[7:10]:
+                if text not in player1_set:
+                    player1_set[text] = len(text) > 2 and text[0] > text[2]
+            sets_won = player1_set[match[7]] + player1_set[match[8]]
+            if sets_won == 1: # the third set is only considered when both players won a set
+                sets_won += player1_set[match[9]]
+            match.append(match[3] if sets_won >= 2 else match[4])
+        elif winners: # finding which player retired
+            words = match[10].split()
+            if words and words[-1] == "Retired":
+                retired = match[10].split(". ")[0] + "." # obtaining name of player who retired
+                if retired == match[3]:
+                    match.append(match[4])
+                elif retired == match[4]:
+                    match.append(match[3])
+
+        # round of the game, see round()
+        if not rounds:
+            continue
+        if match[0] in robin_names or (match[0] == robin_excpt and match[1].year == robin_excpt_date):
+            if not robin_groups or data[robin_groups[-1][0]][2] != match[2]: # new round robin tournament
+                robin_groups.append([])
+            robin_groups[-1].append(i)
+
+        elif match[0] != tournament_name or match[2] != tournament_end_date: # new tournament
+            tournament_name = match[0]
+            tournament_end_date = match[2]
+            round_counter = 1
+            track = {match[3], match[4]}
+            match.append(round_counter)
+
+        elif match[3] in track or match[4] in track: # one of the players already played, moving to next round
+            round_counter += 1
+            track = {match[3], match[4]}
+            match.append(round_counter)
+
+        else: # still in the same round of the same tournament
+            track.update((match[3], match[4]))
+            match.append(round_counter)
+
+    return robin_groups
+
+
+def _winner_column(table):
+    """
+    Auxiliary function of annotate() that returns the winner column of the given MatchTable, in the same way as winner().
+    The set scores and comments are only parsed once per distinct text.
+    """
+
+    # whether player1 won the set of each set score text, and the player who retired for each comment text
+    player1_set = np.array([len(text) > 2 and text[0] > text[2] for text in table.texts], dtype=np.int64)
+    completed = np.array([text == "Completed" for text in table.texts], dtype=bool)
+    retired = np.array([text != "Completed" and len(text.split()) > 0 and text.split()[-1] == "Retired" for text in
+                        table.texts], dtype=bool)
+    retired_player = np.array([table.player_id(text.split(". ")[0] + ".") for text in table.texts], dtype=np.int64)
+
+    # counting the sets won by player1, the third set being only considered when both players won a set
+    sets_won = player1_set[table.set1] + player1_set[table.set2]
+    sets_won += (sets_won == 1) & player1_set[table.set3]
+    completed_winner = np.where(sets_won >= 2, table.player1, table.player2)
+
+    retired_player = retired_player[table.comment]
+    retired_winner = np.where(retired_player == table.player1, table.player2,
+                              np.where(retired_player == table.player2, table.player1, -1))
+
+    return np.where(completed[table.comment], completed_winner,
+                    np.where(retired[table.comment], retired_winner, -1)).astype(np.int32)
+
+
+def _appender(rounds, labels, filled):
+    """
+    Auxiliary function of annotate() that returns the function appending an annotation to a game of a MatchTable, in
+    the same fields as the ones appended to the game list by round() and round_robin(): the first annotation after the
+    winner is written into rounds and the second one into labels.
+    """
+
+    def append(i, value):
+        if filled[i] == 0:
+            rounds[i] = value
+        elif filled[i] == 1:
+            labels[i] = round_code(value)
+        filled[i] += 1
+
+    return append
+
+
+def _round_column(table, robin_tourn, robin_excpt, robin_excpt_date, append, knockout=True):
+    """
+    Auxiliary function of annotate() that gives with append() the round of each knockout game of the given MatchTable,
+    in the same way as round(), if knockout is True. Returns the list of the games of each round robin tournament.
+    """
+
+    n = len(table)
+    robin = np.isin(table.tournament, [table.tournament_id(name) for name in robin_tourn]) | \
+            ((table.tournament == table.tournament_id(robin_excpt)) & (table.years("start") == robin_excpt_date))
+
+    tournaments = table.tournament.tolist()
+    ends = table.end.astype(np.int64).tolist()
+    player1 = table.player1.tolist()
+    player2 = table.player2.tolist()
+
+    # variables keeping track of the tournament of round()
+    tournament_name = tournaments[0] if n else None
+    tournament_end_date = ends[0] if n else None
+    track = set()
+    round_counter = 1
+
+    robin_groups = [] # games of each round robin tournament of round_robin()
+
+    for i, is_robin in enumerate(robin.tolist()):
+        if is_robin:
+            if not robin_groups or ends[robin_groups[-1][0]] != ends[i]: # new round robin tournament
+                robin_groups.append([])
+            robin_groups[-1].append(i)
+
+        elif not knockout:
+            continue
+
+        elif tournaments[i] != tournament_name or ends[i] != tournament_end_date: # new tournament
+            tournament_name = tournaments[i]
+            tournament_end_date = ends[i]
+            round_counter = 1
+            track = {player1[i], player2[i]}
+            append(i, round_counter)
+
+        elif player1[i] in track or player2[i] in track: # one of the players already played, next round
+            round_counter += 1
+            track = {player1[i], player2[i]}
+            append(i, round_counter)
+
+        else: # still in the same round of the same tournament
+            track.update((player1[i], player2[i]))
+            append(i, round_counter)
+
+    return robin_groups
+
+
+def _label_column(table, rounds, labels, filled):
+    """
+    Auxiliary function of annotate() that writes into labels the round labels of proper_round(), which only names the
+    games whose label is still free, given the rounds and the number of annotations of each game of the MatchTable.
+    """
+
+    n = len(table)
+    if not n:
+        return
+
+    last = np.zeros(n, dtype=bool) # last game of each tournament edition
+    last[-1] = True
+    last[:-1] = (table.tournament[1:] != table.tournament[:-1]) | (table.end[1:] != table.end[:-1])
+    edition = np.cumsum(np.concatenate(([False], last[:-1]))) # edition number of each game
+    r = rounds.astype(np.int64)
+    final_round = r[np.flatnonzero(last)][edition] # round of the last game of the edition of each game
+
+    # third place match: the game before a final played in the same round, detected on the round of the next game
+    third_place = np.zeros(n, dtype=bool)
+    third_place[:-2] = (np.abs(r[2:] - r[1:-1]) > 1) & (r[:-2] == r[1:-1])
+
+    label = np.where((r == final_round - 2) & (final_round - 2 > 0), QUARTERFINALS, r)
+    label = np.where((r == final_round - 1) & (final_round - 1 > 0), SEMIFINALS, label)
+    label = np.where(last, FINAL, label)
+    label = np.where(third_place, THIRD_PLACE, label)
+    label[-1] = FINAL
+    free = filled == 1
+    labels[free] = label[free]
+
+
+def _update_columns(table, step):
+    """
+    Auxiliary function that runs a step of annotate() on the round and label columns of a MatchTable annotated by the
+    previous stages, so that each annotation stage is run on the columns instead of converting the table to a list of
+    list. step is called with the rounds, the labels, the number of annotations of each game after its winner and the
+    append() function of _appender(), then the columns are written back.
+    """
+
+    rounds = table.round.astype(np.int8) # copies of the columns, which may be memory-mapped
+    labels = table.label.astype(np.int8)
+    filled = (rounds > 0).astype(np.int8) + (labels != NOT_ANNOTATED)
+    step(rounds, labels, filled, _appender(rounds, labels, filled))
+    table.round = rounds
+    table.label = labels
+    table.clear_indexes()
+
+
+def _round_robin_group(games, player1, player2, append):
+    """
+    Auxiliary function of annotate() that gives the rounds of a round robin tournament to its games, in the same way as
+    round_robin().
+    """
+
+    # first game of the tournament
+    round_count = 1
+    append(games[0], round_count)
+    append(games[0], "Round robin")
+    first_eight_games = [[player1[games[0]], player2[games[0]]]]
+
+    # variable used for establishing groups
+    group_established = False
+    group1, group2, group3, group4 = set(), set(), set(), set()
+    unique_player = set()
+
+    # variable used for identifying rounds above round robin round
+    round_robin_passed = False
+    lst_tracker = [] # list that tracks player for next round
+
+    for i in games[1:]:
+        p1, p2 = player1[i], player2[i]
+
+        # obtaining the first 8 round robin matches to identify groups attribution
+        if len(first_eight_games) < 8:
+            first_eight_games.append([p1, p2])
+            append(i, round_count)
+            append(i, "Round robin")
+            unique_player.add(p1)
+            unique_player.add(p2)
+
+        # once first 8 matches collected, the groups are established
+        elif len(first_eight_games) == 8 and not group_established:
+            group_established = True
+            append(i, round_count)
+            append(i, "Round robin")
+            group1.add(first_eight_games[0][0])
+            group1.add(first_eight_games[0][1])
+
+            # establishing the first group
+            for rep in range(2):
+                for game in first_eight_games:
+                    if game[0] in group1 or game[1] in group1:
+                        group1.update(game)
+
+            # establishing the second group
+            base_case = 0 # variable that enables the one-time initialization of the second group
+            for rep in range(2):
+                for game in first_eight_games:
+                    if game[0] not in group1 and game[1] not in group1:
+                        if base_case == 0: # initialize second group
+                            group2.update(game)
+                            base_case += 1
+                        elif game[0] in group2 or game[1] in group2: # constructing second group
+                            group2.update(game)
+
+            # case if more than two round robin groups
+            if (len(group1) + len(group2)) != len(unique_player):
+                base_case = 0
+                # establishing the third group
+                for rep in range(2):
+                    for game in first_eight_games:
+                        if game[0] not in group1 and game[1] not in group1 and game[0] not in group2 and \
+                                game[1] not in group2:
+                            if base_case == 0: # initialize third group
+                                group3.update(game)
+                                base_case += 1
+                            elif game[0] in group3 or game[1] in group3: # constructing third group
+                                group3.update(game)
+
+                # establishing the fourth group which is assumed to consist of the remaining players
+                for game in first_eight_games:
+                    if game[0] not in group1 and game[1] not in group1 and game[0] not in group2 and \
+                            game[1] not in group2 and game[0] not in group3 and game[1] not in group3:
+                        group4.update(game)
+
+        # now that groups established, we can safely recognize round robin rounds over next iterations
+        elif not round_robin_passed:
+            groups = (group1, group2, group3, group4) if group3 else (group1, group2)
+
+            if any(p1 in group and p2 in group for group in groups):
+                append(i, round_count)
+                append(i, "Round robin")
+
+            elif p2 not in unique_player: # case if player2 replaced by another new player
+                unique_player.add(p2)
+                append(i, round_count)
+                append(i, "Round robin")
+                for group in groups: # finding the group of the new added player
+                    if p1 in group:
+                        group.add(p2)
+                        break
+
+            elif p1 not in unique_player: # case if player1 replaced by another new player
+                unique_player.add(p1)
+                append(i, round_count)
+                append(i, "Round robin")
+                for group in groups:
+                    if p2 in group:
+                        group.add(p1)
+                        break
+
+        # checking if we passed round robin rounds, when two players of different groups play against each other
+        groups = (group1, group2, group3, group4) if group3 else (group1, group2)
+        if p1 in unique_player and p2 in unique_player and any(p1 in group and p2 not in group for group in groups):
+            if p1 not in lst_tracker and p2 not in lst_tracker and not round_robin_passed:
+                round_robin_passed = True
+                round_count += 1
+                lst_tracker.append(p1)
+                lst_tracker.append(p2)
+                append(i, round_count)
+
+        # once round robin stages have been passed, the method of direct elimination is used
+        if round_robin_passed and p1 not in lst_tracker and p2 not in lst_tracker: # still at the same round
+            lst_tracker.append(p1)
+            lst_tracker.append(p2)
+            append(i, round_count)
+
+        elif round_robin_passed and (p1 in lst_tracker or p2 in lst_tracker) and lst_tracker != [p1, p2]:
+            # one of the player is already in lst_tracker, moving to the next round
+            lst_tracker = [p1, p2]
+            round_count += 1
+            append(i, round_count)
+
+
+
+def edition_index(data):
+    """
+    Function that returns the dictionary where each key is a (tournament name, year) tuple and its value is the slice
+    of the dataset spanning the games of that tournament edition, the year being the year of the end date. As the
+    dataset is ordered by tournament name and start date, the games of an edition are contiguous and the bracket
+    queries given this index only read the slice of the edition instead of the whole dataset. A MatchTable builds the
+    same index on its own (MatchTable.edition_index()).
+
+    Args:
+
+    data: list of list, where the inner list consists of the game details.
+
+    Prerequisite:
+    The dataset should be ordered by first tournament name and secondly by tournament start date.
+
+    """
+
+    index = {}
+    _add_editions(index, data, 0)
+    return index
+
+
+def _add_editions(index, games, start):
+    """
+    Auxiliary function that adds to the edition index the given games, the first one being at the position start of
+    the dataset.
+    """
+
+    for i, match in enumerate(games, start):
+        edition = (match[0], match[2].year)
+        if edition in index:
+            index[edition] = slice(index[edition].start, i + 1)
+        else:
+            index[edition] = slice(i, i + 1)
+
+
+def _edition_range(data, tournament_name, tournament_year, index):
+    """
+    Auxiliary function that returns the range of game indexes to scan for the given tournament edition: the slice of
+    the edition if an index is given, the whole dataset otherwise.
+    """
+
+    if index is None:
+        return range(len(data))
+    edition = index.get((tournament_name, tournament_year), slice(0, 0))
+    return range(edition.start, edition.stop)
+
+
+def who_won_final(data, tournament_name, tournament_year, printer=True, index=None):
     """
     Function that returns the winner of the considered tournament.
 
     Args:
 
-    data: list of list, where the inner list consists of the game details
+    data: list of list, where the inner list consists of the game details, or MatchTable
     tournament_name: the considered tournament name (string)
     tournament_year: the given year when the tournament took place (string or int)
     printer: if set to True (default value), the function prints the winner of the given tournament.
+    index: dictionary returned by edition_index(data), so that only the games of the tournament are read (None by
+    default to read the whole dataset). A MatchTable always uses its own index.
 
     Prerequisite:
     The dataset should be ordered by first tournament name and secondly by tournament start date.
@@ -460,29 +1484,45 @@ def who_won_final(data, tournament_name, tournament_year, printer=True):
 
     """
 
-    found = False # determines whether the winner has been found
-    for i in range(len(data)):
-        if data[i][0] == tournament_name and data[i][2].year == tournament_year and data[i][13] == "Final":
-            if printer == True:
-                print("The winner of the", tournament_year, tournament_name, "is", data[i][11])
-            return data[i][11]
-
-    if not found:
-        if printer == True:
+    winner_name = _final_winner(data, tournament_name, tournament_year, index)
+    if printer == True:
+        if winner_name is not None:
+            print("The winner of the", tournament_year, tournament_name, "is", winner_name)
+        else:
             print("The algorithm didn't find the winner. Please check the given year, tournament name and round.")
+    return winner_name
+
 
+def _final_winner(data, tournament_name, tournament_year, index):
+    """
+    Auxiliary function of who_won_final() that returns the winner of the given tournament, or None if its final isn't
+    found.
+    """
 
+    if isinstance(data, MatchTable):
+        games = data.edition_rows(tournament_name, tournament_year)
+        final = games[data.label[games] == FINAL]
+        if len(final) > 0:
+            return data.players[data.winner[final[0]]]
+        return
 
-def who_played_who(data, tournament_name, tournament_year, round):
+    for i in _edition_range(data, tournament_name, tournament_year, index):
+        if data[i][0] == tournament_name and data[i][2].year == tournament_year and data[i][13] == "Final":
+            return data[i][11]
+
+
+def who_played_who(data, tournament_name, tournament_year, round, index=None):
     """
     The function prints the different confrontations for the given tournament round.
 
     Args:
 
-    data: list of list, where the inner list consists of the game details.
+    data: list of list, where the inner list consists of the game details, or MatchTable.
     tournament_name: the considered tournament name (string)
     tournament_year: the given year when the tournament took place (string or int)
     round: the considered round of type int or string which can be "Quarterfinals, Semifinals, Final"
+    index: dictionary returned by edition_index(data), so that only the games of the tournament are read (None by
+    default to read the whole dataset). A MatchTable always uses its own index.
 
     Prerequisite:
     The dataset should be ordered by first tournament name and secondly by tournament start date.
@@ -491,7 +1531,6 @@ def who_played_who(data, tournament_name, tournament_year, round):
 
     """
 
-    found = False
     if type(tournament_year) == str:
         tournament_year = int(tournament_year)
 
@@ -502,30 +1541,50 @@ def who_played_who(data, tournament_name, tournament_year, round):
     if round == "Final" or round == "Third place match":
         print("\nThe confrontation for the", round, "of the", tournament_year, tournament_name, "is:")
 
-    for i in range(len(data)):
-        if data[i][0] == tournament_name and data[i][2].year == tournament_year and data[i][13] == round:
-            found = True
-            print([data[i][3], data[i][4]])
+    confrontations = _confrontations(data, tournament_name, tournament_year, round, index)
+    for game in confrontations:
+        print(game)
+    if not confrontations:
+        print("The algorithm didn't find the required confrontations. Please check the given year, tournament name and round.")
+
+
+def _confrontations(data, tournament_name, tournament_year, round, index):
+    """
+    Auxiliary function of who_played_who() that returns the list of the confrontations [player1, player2] of the given
+    tournament round, in the order of the dataset.
+    """
+
+    if isinstance(data, MatchTable):
+        edition = data.edition_rows(tournament_name, tournament_year)
+        code = round_code(round)
+        games = edition[data.label[edition] == code] if code != NOT_ANNOTATED else []
+        # case when confrontations are quarterfinals, or semifinals or final and the inserted round is of type int
+        if len(games) == 0 and type(round) == int:
+            games = edition[data.round[edition] == round]
+        return [[data.players[data.player1[i]], data.players[data.player2[i]]] for i in games]
+
+    games = _edition_range(data, tournament_name, tournament_year, index)
+    confrontations = [[data[i][3], data[i][4]] for i in games
+                      if data[i][0] == tournament_name and data[i][2].year == tournament_year and data[i][13] == round]
 
     # case when confrontations are quarterfinals, or semifinals or final and the inserted round is of type int
-    if not found:
-        for i in range(len(data)):
-            if data[i][0] == tournament_name and data[i][2].year == tournament_year and data[i][12] == round:
-                found = True
-                print([data[i][3], data[i][4]])
-        if not found:
-            print("The algorithm didn't find the required confrontations. Please check the given year, tournament name and round.")
+    if not confrontations:
+        confrontations = [[data[i][3], data[i][4]] for i in games if data[i][0] == tournament_name and
+                          data[i][2].year == tournament_year and data[i][12] == round]
+    return confrontations
 
-def which_round(data, player, tournament_name, tournament_year):
+def which_round(data, player, tournament_name, tournament_year, index=None):
     """
     Function that prints the round in which the player has been eliminated from the given tournament.
 
     Args:
 
-    data: list of list, where the inner list consists of the game details
+    data: list of list, where the inner list consists of the game details, or MatchTable
     player: considered player of type string=
     tournament_name: the considered tournament name (string)
     tournament_year: the given year when the tournament took place (string or int)
+    index: dictionary returned by edition_index(data), so that only the games of the tournament are read (None by
+    default to read the whole dataset). A MatchTable always uses its own index.
 
     Prerequisite:
     The dataset should be ordered by first tournament name and secondly by tournament start date.
@@ -535,47 +1594,119 @@ def which_round(data, player, tournament_name, tournament_year):
     print("\n")
     if type(tournament_year) == str:
         tournament_year = int(tournament_year)
-    for i in reversed(range(len(data))):
+
+    elimination = _elimination(data, player, tournament_name, tournament_year, index)
+    if elimination is None: # the tournament wasn't found
+        return
+
+    won, eliminated = elimination
+    if won:
+        print(player, "won the", tournament_year, tournament_name)
+    elif eliminated == "Round robin":
+        print(player, "was eliminated from the", tournament_year, tournament_name, "at the round robin stage.")
+    elif type(eliminated) == int:
+        print(player, "was eliminated from the", tournament_year, tournament_name, "at the round", eliminated)
+    elif type(eliminated) == str:
+        print(player, "was eliminated from the", tournament_year, tournament_name, "at the", eliminated)
+    else:
+        print("The algorithm didn't find the round. Please check the given year, tournament name and player name.")
+
+
+def _elimination(data, player, tournament_name, tournament_year, index):
+    """
+    Auxiliary function of which_round() that returns the tuple (won, eliminated) of the player in the given
+    tournament, where won is True if the player won the tournament and eliminated is the round label of the game in
+    which the player has been eliminated (None if the player won or wasn't found). Returns None if the tournament
+    isn't found.
+    """
+
+    if isinstance(data, MatchTable):
+        return _elimination_table(data, player, tournament_name, tournament_year)
+
+    for i in reversed(_edition_range(data, tournament_name, tournament_year, index)):
         if data[i][0] == tournament_name and data[i][2].year == tournament_year:
             if (data[i][3] == player or data[i][4] == player) and data[i][11] != player:
                 if data[i][13] != "Round robin":
-                    if type(data[i][13]) == int:
-                        print(player, "was eliminated from the", tournament_year, tournament_name, "at the round",
-                              data[i][13])
-                        break
-                    elif type(data[i][13]) == str:
-                        print(player, "was eliminated from the", tournament_year, tournament_name, "at the",
-                              data[i][13])
-                        break
-                elif data[i][13] == "Round robin":
-                    # avoiding case where winner of the tournament lost a game in the robin rounds
-                    if who_won_final(data, tournament_name, tournament_year, False) == player:
-                        print(player, "won the", tournament_year, tournament_name)
-                        break
-                    else:
-                        print(player, "was eliminated from the", tournament_year, tournament_name, "at the round robin stage.")
-                        break
+                    return False, data[i][13]
+
+                # avoiding case where winner of the tournament lost a game in the robin rounds
+                if _final_winner(data, tournament_name, tournament_year, index) == player:
+                    return True, None
+                return False, "Round robin"
 
             # moving to the next tournament after having iterated through all possible games either player all games
             elif data[i-1][0] != tournament_name or (data[i-1][0] == tournament_name and data[i-1][2].year != tournament_year):
                 # case where player won all of his games
-                if who_won_final(data, tournament_name, tournament_year, False) == player:
-                    print(player, "won the", tournament_year, tournament_name)
-                    break
+                return _final_winner(data, tournament_name, tournament_year, index) == player, None
+
+def player_index(data):
+    """
+    Function that returns the dictionary where each key is a player and its value is the list of the indexes of the
+    games he played, in the order of the dataset. Given this index, round_played() only reads the games of the player
+    instead of the whole dataset. A MatchTable builds the same index on its own (MatchTable.player_index()).
+
+    Args:
+
+    data: list of list, where the inner list consists of the game details.
+
+    """
+
+    index = {}
+    for i in range(len(data)):
+        index.setdefault(data[i][3], []).append(i)
+        index.setdefault(data[i][4], []).append(i)
+    return index
+
+
+def head_to_head_index(data):
+    """
+    Function that returns the dictionary where each key is a pair of players who played each other, ordered by name,
+    and its value is the list [number of games, games won by the first player, games won by the second player]. Given
+    this index, two_players_games() is a dictionary lookup. A MatchTable builds the same index on its own
+    (MatchTable.head_to_head_index()).
+
+    Args:
+
+    data: list of list, where the inner list consists of the game details.
+
+    Prerequisite:
+    correct_error() and winner() should be run on the dataset before running the function.
+
+    """
+
+    index = {}
+    _count_head_to_head(index, data, 1)
+    return index
+
+
+def _count_head_to_head(index, games, sign):
+    """
+    Auxiliary function that adds (sign = 1) or removes (sign = -1) the given games from the head-to-head index.
+    """
+
+    for match in games:
+        pair = tuple(sorted((match[3], match[4])))
+        counts = index.setdefault(pair, [0, 0, 0])
+        counts[0] += sign
+        if match[11] == pair[0]:
+            counts[1] += sign
+        elif match[11] == pair[1]:
+            counts[2] += sign
+        if counts[0] == 0: # the players don't play each other anymore
+            del index[pair]
 
-                else:
-                    print("The algorithm didn't find the round. Please check the given year, tournament name and player name.")
-                    break
 
-def round_played(data, player, round):
+def round_played(data, player, round, index=None):
     """
     Function that prints the number of time a given player played in a given round.
 
     Args:
 
-    data: list of list, where the inner list consists of the game details
+    data: list of list, where the inner list consists of the game details, or MatchTable
     player: considered player of type string
     round: the considered round of type int or string which can be "Quarterfinals, Semifinals, Final"
+    index: dictionary returned by player_index(data), so that only the games of the player are read (None by default
+    to read the whole dataset). A MatchTable always uses its own index.
 
     Prerequisite:
     The dataset should be ordered by first tournament name and secondly by tournament start date.
@@ -584,40 +1715,57 @@ def round_played(data, player, round):
 
     """
 
-    round_counter = 0
     print("\n")
+    round_counter = _round_count(data, player, round, index)
     if type(round) == str:
-        for i in range(len(data)):
+        print(player, "played", round_counter, round)
+    elif type(round) == int:
+        print(player, "played", round_counter, "round", round)
+
+
+def _round_count(data, player, round, index):
+    """
+    Auxiliary function of round_played() that returns the number of time the given player played in the given round.
+    """
+
+    round_counter = 0
+    if isinstance(data, MatchTable):
+        played = data.player_rows(player)
+        if type(round) == str:
+            code = round_code(round)
+            round_counter = np.count_nonzero(data.label[played] == code) if code != NOT_ANNOTATED else 0
+        elif type(round) == int:
+            round_counter = np.count_nonzero(data.round[played] == round)
+        return int(round_counter)
+
+    games = range(len(data)) if index is None else index.get(player, [])
+    if type(round) == str:
+        for i in games:
             if (data[i][3] == player or data[i][4] == player) and round == data[i][13]:
                 round_counter += 1
-        print(player, "played", round_counter, round)
     elif type(round) == int:
-        for i in range(len(data)):
+        for i in games:
             if (data[i][3] == player or data[i][4] == player) and round == data[i][12]:
                 round_counter += 1
-        print(player, "played", round_counter, "round", round)
+    return round_counter
 
-def two_players_games(data, player1, player2):
+def two_players_games(data, player1, player2, head_to_head=None):
     """
     Function that prints how many games player1 played against player2, and how many times player1 won and player 2 won.
 
     Args:
-    data: list of list, where the inner list consists of the game details
+    data: list of list, where the inner list consists of the game details, or MatchTable
     player1, player2: considered players of type string
+    head_to_head: dictionary returned by head_to_head_index(data), so that the games are read from it instead of
+    scanning the dataset (None by default). A MatchTable always uses its own index.
 
     Prerequisite:
     The dataset should be ordered by first tournament name and secondly by tournament start date.
     correct_error(), winner(), round(), round_robin() and proper_round() should be run on the dataset before running the
     function.
     """
-    total_games = 0
-    player1_count = 0
     print("\n")
-    for i in range(len(data)):
-        if (data[i][3] == player1 and data[i][4] == player2) or (data[i][3] == player2 and data[i][4] == player1) :
-            total_games += 1
-            if data[i][11] == player1:
-                player1_count += 1
+    total_games, player1_count = _games_between(data, player1, player2, head_to_head)
     if total_games != 0:
         print(player1, "played against", player2, total_games, "times and", player1, "won",
               player1_count, "of these games and", player2, "won", (total_games-player1_count), "of these games.")
@@ -625,34 +1773,227 @@ def two_players_games(data, player1, player2):
         print(player1, "never played against", player2)
 
 
-# Building dataset
-file_path = '../assignment-final-data/*.csv'
-dataset = [] # dataset that will store each tennis game details
+def _games_between(data, player1, player2, head_to_head):
+    """
+    Auxiliary function of two_players_games() that returns the tuple (number of games between player1 and player2,
+    games won by player1).
+    """
 
-for file in iglob(file_path): # iterating over the different csv files in the folder
-    with open(file, "r") as f:
-        csvreader = csv.reader(f) # reading the csv files
-        header = next(csvreader) # skipping the headers
-        for row in csvreader:
-            tournament, start, end, bestOf, player1, player2, rank1, rank2, set1, set2, set3, comment = row
-            dataset.append([tournament.strip(), datetime.strptime(start, "%Y-%m-%d").date(),
-                         datetime.strptime(end, "%Y-%m-%d").date(), player1.strip(), player2.strip(), rank1, rank2,
-                         set1.strip(), set2.strip(), set3.strip(), comment.strip()]) # appending the dataset
+    total_games = 0
+    player1_count = 0
+    if isinstance(data, MatchTable):
+        total_games, player1_count, _ = data.head_to_head(player1, player2)
+    elif head_to_head is not None:
+        if player1 <= player2:
+            total_games, player1_count, _ = head_to_head.get((player1, player2), [0, 0, 0])
+        else:
+            total_games, _, player1_count = head_to_head.get((player2, player1), [0, 0, 0])
+    else:
+        for i in range(len(data)):
+            if (data[i][3] == player1 and data[i][4] == player2) or (data[i][3] == player2 and data[i][4] == player1) :
+                total_games += 1
+                if data[i][11] == player1:
+                    player1_count += 1
+    return total_games, player1_count
+
+
+def finals_winners(data, editions, index=None):
+    """
+    Batch version of who_won_final(). Function that returns, for each given tournament edition, the record
+    {"tournament": tournament name, "year": year, "winner": winner of the final or None if the final isn't found}, in
+    the order of the given editions. Nothing is printed.
+
+    Args:
+
+    data: list of list, where the inner list consists of the game details, or MatchTable
+    editions: iterable of (tournament name, year) tuples, the year being of type string or int
+    index: dictionary returned by edition_index(data). For a list of list it is built once for the whole batch if not
+    given, so that each question only reads the games of its tournament. A MatchTable always uses its own index.
+
+    Prerequisite:
+    The dataset should be ordered by first tournament name and secondly by tournament start date.
+    correct_error(), winner(), round(), round_robin() and proper_round() should be run on the dataset before running the
+    function.
+
+    """
+
+    if index is None and not isinstance(data, MatchTable):
+        index = edition_index(data)
+
+    records = []
+    for tournament_name, tournament_year in editions:
+        tournament_year = int(tournament_year)
+        records.append({"tournament": tournament_name, "year": tournament_year,
+                        "winner": _final_winner(data, tournament_name, tournament_year, index)})
+    return records
+
+
+def rounds_confrontations(data, questions, index=None):
+    """
+    Batch version of who_played_who(). Function that returns, for each given tournament round, the record
+    {"tournament": tournament name, "year": year, "round": round, "games": list of the confrontations [player1,
+    player2]}, in the order of the given questions. The list of confrontations is empty if the round isn't found.
+    Nothing is printed.
 
-dataset.sort(key=lambda x: (x[0], x[1]))  # sorting the data by tournament and date
-correct_error(dataset) # correcting dataset errors
-winner(dataset)  # determine each winner for each game
-round(dataset)  # determining the round of the match being played
-round_robin(dataset)  # determining the round of round robin tournament
-proper_round(dataset) # setting proper name for tournaments
+    Args:
+
+    data: list of list, where the inner list consists of the game details, or MatchTable
+    questions: iterable of (tournament name, year, round) tuples, the round being of type int or string which can be
+    "Quarterfinals, Semifinals, Final"
+    index: dictionary returned by edition_index(data). For a list of list it is built once for the whole batch if not
+    given. A MatchTable always uses its own index.
+
+    Prerequisite:
+    The dataset should be ordered by first tournament name and secondly by tournament start date.
+    correct_error(), winner(), round(), round_robin() and proper_round() should be run on the dataset before running the
+    function.
 
-# Converting dataset into pickle object
-with open('dataset', 'wb') as fw:
-    pickle.dump(dataset, fw)
+    """
+
+    if index is None and not isinstance(data, MatchTable):
+        index = edition_index(data)
+
+    records = []
+    for tournament_name, tournament_year, round in questions:
+        tournament_year = int(tournament_year)
+        records.append({"tournament": tournament_name, "year": tournament_year, "round": round,
+                        "games": _confrontations(data, tournament_name, tournament_year, round, index)})
+    return records
+
+
+def eliminations(data, questions, index=None):
+    """
+    Batch version of which_round(). Function that returns, for each given player and tournament, the record
+    {"player": player, "tournament": tournament name, "year": year, "won": True if the player won the tournament,
+    "round": round label of the game in which the player has been eliminated}, in the order of the given questions.
+    The round is None if the player won the tournament or if the player or the tournament isn't found. Nothing is
+    printed.
+
+    Args:
+
+    data: list of list, where the inner list consists of the game details, or MatchTable
+    questions: iterable of (player, tournament name, year) tuples
+    index: dictionary returned by edition_index(data). For a list of list it is built once for the whole batch if not
+    given. A MatchTable always uses its own index.
+
+    Prerequisite:
+    The dataset should be ordered by first tournament name and secondly by tournament start date.
+    correct_error(), winner(), round(), round_robin() and proper_round() should be run on the dataset before running the
+    function.
+
+    """
+
+    if index is None and not isinstance(data, MatchTable):
+        index = edition_index(data)
+
+    records = []
+    for player, tournament_name, tournament_year in questions:
+        tournament_year = int(tournament_year)
+        won, eliminated = _elimination(data, player, tournament_name, tournament_year, index) or (False, None)
+        records.append({"player": player, "tournament": tournament_name, "year": tournament_year, "won": won,
+                        "round": eliminated})
+    return records
+
+
+def rounds_played(data, questions, index=None):
+    """
+    Batch version of round_played(). Function that returns, for each given player and round, the record {"player":
+    player, "round": round, "count": number of time the player played in the round}, in the order of the given
+    questions. Nothing is printed.
+
+    Args:
+
+    data: list of list, where the inner list consists of the game details, or MatchTable
+    questions: iterable of (player, round) tuples, the round being of type int or string which can be "Quarterfinals,
+    Semifinals, Final"
+    index: dictionary returned by player_index(data). For a list of list it is built once for the whole batch if not
+    given, so that each question only reads the games of its player. A MatchTable always uses its own index.
+
+    Prerequisite:
+    The dataset should be ordered by first tournament name and secondly by tournament start date.
+    correct_error(), winner(), round(), round_robin() and proper_round() should be run on the dataset before running the
+    function.
+
+    """
+
+    if index is None and not isinstance(data, MatchTable):
+        index = player_index(data)
+
+    return [{"player": player, "round": round, "count": _round_count(data, player, round, index)}
+            for player, round in questions]
+
+
+def head_to_heads(data, pairs, head_to_head=None):
+    """
+    Batch version of two_players_games(). Function that returns, for each given pair of players, the record
+    {"player1": player1, "player2": player2, "games": number of games between them, "player1_wins": games won by
+    player1, "player2_wins": games won by player2}, in the order of the given pairs. Nothing is printed.
+
+    Args:
+
+    data: list of list, where the inner list consists of the game details, or MatchTable
+    pairs: iterable of (player1, player2) tuples
+    head_to_head: dictionary returned by head_to_head_index(data). For a list of list it is built once for the whole
+    batch if not given, so that each question is a dictionary lookup. A MatchTable always uses its own index.
+
+    Prerequisite:
+    correct_error() and winner() should be run on the dataset before running the function.
+
+    """
+
+    if head_to_head is None and not isinstance(data, MatchTable):
+        head_to_head = head_to_head_index(data)
+
+    records = []
+    for player1, player2 in pairs:
+        total_games, player1_count = _games_between(data, player1, player2, head_to_head)
+        records.append({"player1": player1, "player2": player2, "games": total_games, "player1_wins": player1_count,
+                        "player2_wins": total_games - player1_count})
+    return records
+
+
+def _on_rows(table, stage, *args):
+    """
+    Auxiliary function that runs an annotation stage written for the list of list dataset on a MatchTable: the table
+    is converted to a list of list, annotated by the stage and converted back in place. This compatibility path costs
+    two full conversions, so it is only used by correct_error(), which build_dataset() runs on the list of list before
+    the table is built. The other stages write directly into the columns, as annotate().
+    """
+
+    data = table.to_rows()
+    stage(data, *args)
+    table.assign(data)
+
+
+def _elimination_table(table, player, tournament_name, tournament_year):
+    """
+    MatchTable version of _elimination(). As in the list version, only the last block of consecutive games of the
+    tournament is considered and the elimination is the last game the player lost in it.
+    """
 
+    games = table.edition_rows(tournament_name, tournament_year)
+    if len(games) == 0:
+        return
+    breaks = np.flatnonzero(np.diff(games) != 1)
+    if len(breaks) > 0:
+        games = games[breaks[-1] + 1:]
 
+    player_id = table.player_id(player)
+    lost = games[((table.player1[games] == player_id) | (table.player2[games] == player_id)) &
+                 (table.winner[games] != player_id)]
 
+    if len(lost) > 0 and table.label[lost[-1]] != ROUND_ROBIN:
+        return False, round_name(table.label[lost[-1]])
 
+    if _final_winner(table, tournament_name, tournament_year, None) == player:
+        # avoiding case where winner of the tournament lost a game in the robin rounds
+        return True, None
 
+    if len(lost) > 0:
+        return False, "Round robin"
+    return False, None
 
 
+if __name__ == "__main__":
+    # building the dataset pickle from the csv files given in argument (data folder by default)
+    build_dataset(sys.argv[1:] or "data/*.csv", "dataset")
@@ -0,0 +1,692 @@
+import json
+import os
+
+import numpy as np
+
+# The MatchTable stores the dataset column by column instead of as a list of list. Each column is a numpy array of a
+# fixed type, so filters and aggregations over the whole dataset become vectorized masks instead of Python loops over
+# hundreds of thousands of boxed objects. Players, tournaments, set scores and comments are stored as int32 codes into
+# vocabulary lists.
+
+# int8 codes used by the label column for the named rounds (numbered rounds keep their positive round number)
+FINAL = -1
+SEMIFINALS = -2
+QUARTERFINALS = -3
+ROUND_ROBIN = -4
+THIRD_PLACE = -5
+NOT_ANNOTATED = 0
+
+ROUND_NAMES = {FINAL: "Final", SEMIFINALS: "Semifinals", QUARTERFINALS: "Quarterfinals", ROUND_ROBIN: "Round robin",
+               THIRD_PLACE: "Third place match"}
+ROUND_CODES = {name: code for code, name in ROUND_NAMES.items()}
+
+# column names in the order of the fields of a game list (data[i][0] ... data[i][13])
+COLUMNS = ("tournament", "start", "end", "player1", "player2", "rank1", "rank2", "set1", "set2", "set3", "comment",
+           "winner", "round", "label")
+
+DTYPES = {"tournament": np.int32, "start": "datetime64[D]", "end": "datetime64[D]", "player1": np.int32,
+          "player2": np.int32, "rank1": np.float32, "rank2": np.float32, "set1": np.int32, "set2": np.int32,
+          "set3": np.int32, "comment": np.int32, "winner": np.int32, "round": np.int8, "label": np.int8}
+
+# day number of 1970-01-01 given by date.toordinal(), the origin of datetime64
+EPOCH_ORDINAL = 719163
+
+# first appearance position of a player who didn't play, see first_appearance_by_year()
+NO_APPEARANCE = np.iinfo(np.int64).max
+
+# columns holding codes into each vocabulary
+PLAYER_COLUMNS = ("player1", "player2", "winner")
+TEXT_COLUMNS = ("set1", "set2", "set3", "comment")
+
+
+def round_code(round):
+    """
+    Function that returns the int8 code of the given round as stored in the label column.
+
+    Args:
+
+    round: the considered round of type int or string which can be "Quarterfinals, Semifinals, Final, Round robin,
+    Third place match"
+
+    """
+
+    if type(round) == str:
+        return ROUND_CODES.get(round, NOT_ANNOTATED)
+    return round
+
+
+def round_name(code):
+    """
+    Function that converts a label code back to the value used in the list of list dataset (int or string).
+
+    Args:
+
+    code: label code of type int
+
+    """
+
+    code = int(code)
+    if code < 0:
+        return ROUND_NAMES[code]
+    return code
+
+
+def years(dates):
+    """
+    Function that returns the year of each date of a datetime64 array as an int array.
+
+    Args:
+
+    dates: numpy array of type datetime64
+
+    """
+
+    return dates.astype("datetime64[Y]").astype(np.int64) + 1970
+
+
+class MatchTable:
+    """
+    Columnar representation of the dataset. Each field of the game list is stored in its own numpy array (see COLUMNS)
+    and players, tournaments, set scores and comments are stored as int32 codes into the players, tournaments and texts
+    vocabularies. Missing WTA ranks are stored as NaN, unknown winners as -1 and missing rounds or labels as 0.
+
+    A MatchTable can be given to every function of the utils modules in place of the list of list dataset.
+
+    """
+
+    def __init__(self, columns, players, tournaments, texts):
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+        self.players = players
+        self.tournaments = tournaments
+        self.texts = texts
+        self._player_index = {name: i for i, name in enumerate(players)}
+        self._tournament_index = {name: i for i, name in enumerate(tournaments)}
+        self._text_index = {text: i for i, text in enumerate(texts)}
+        self._indexes = {} # indexes built on demand, cleared when the table is modified
+
+    @classmethod
+    def from_rows(cls, data):
+        """
+        Function that builds a MatchTable from the list of list dataset. The inner lists can either be raw games
+        (11 fields) or games annotated by winner(), round(), round_robin() and proper_round() (14 fields).
+
+        Args:
+
+        data: list of list, where the inner list consists of the game details.
+
+        """
+
+        players, tournaments, texts = {}, {}, {}
+        columns = cls._encode(data, players, tournaments, texts)
+        return cls(columns, list(players), list(tournaments), list(texts))
+
+    @staticmethod
+    def _encode(data, players, tournaments, texts):
+        """
+        Auxiliary function that returns the columns of the given list of list games, the players, tournaments and texts
+        being coded with the given dictionaries (name -> code), to which the new names are added.
+        """
+
+        values = {name: [] for name in COLUMNS} # values of each column, converted to arrays at the end
+
+        for match in data:
+            values["tournament"].append(tournaments.setdefault(match[0], len(tournaments)))
+            values["start"].append(match[1].toordinal()) # dates are converted as day numbers, much faster
+            values["end"].append(match[2].toordinal())
+            values["player1"].append(players.setdefault(match[3], len(players)))
+            values["player2"].append(players.setdefault(match[4], len(players)))
+            values["rank1"].append(float(match[5]) if match[5] else np.nan) # missing WTA ranks are empty strings
+            values["rank2"].append(float(match[6]) if match[6] else np.nan)
+            values["set1"].append(texts.setdefault(match[7], len(texts)))
+            values["set2"].append(texts.setdefault(match[8], len(texts)))
+            values["set3"].append(texts.setdefault(match[9], len(texts)))
+            values["comment"].append(texts.setdefault(match[10], len(texts)))
+            # annotation fields appended by winner(), round(), round_robin() and proper_round()
+            values["winner"].append(players.setdefault(match[11], len(players)) if len(match) > 11 else -1)
+            values["round"].append(match[12] if len(match) > 12 else 0)
+            values["label"].append(round_code(match[13]) if len(match) > 13 else NOT_ANNOTATED)
+
+        for name in ("start", "end"):
+            values[name] = np.array(values[name], dtype=np.int64) - EPOCH_ORDINAL
+        return {name: np.array(values[name]).astype(DTYPES[name]) for name in COLUMNS}
+
+    def save(self, path):
+        """
+        Function that saves the table in the columnar format read by MatchTable.open(): a directory holding one .npy file
+        of fixed-width values per column and a vocabulary.json file with the players, tournaments and texts
+        vocabularies.
+
+        Args:
+
+        path: path of the directory (created if needed)
+
+        """
+
+        os.makedirs(path, exist_ok=True)
+        for name in COLUMNS:
+            np.save(os.path.join(path, name + ".npy"), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(path, "vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump({"players": self.players, "tournaments": self.tournaments, "texts": self.texts}, f)
+
+    @classmethod
+    def open(cls, path, mode="c"):
+        """
+        Function that opens a MatchTable saved with save(). The columns are memory-mapped with numpy.memmap instead of
+        being read: opening the table takes milliseconds, each column is only read from disk when it is accessed and the
+        pages are shared by every process opening the same files.
+
+        Args:
+
+        path: path of the directory written by save()
+        mode: "c" (default value) so that the columns can be modified in memory without changing the files, as
+        modif_start_date() does, or "r" for read-only columns
+
+        """
+
+        with open(os.path.join(path, "vocabulary.json"), encoding="utf-8") as f:
+            vocabulary = json.load(f)
+        columns = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mode) for name in COLUMNS}
+        return cls(columns, vocabulary["players"], vocabulary["tournaments"], vocabulary["texts"])
+
+    def assign(self, data):
+        """
+        Function that replaces in place the content of the table by the given list of list dataset.
+
+        Args:
+
+        data: list of list, where the inner list consists of the game details.
+
+        """
+
+        table = MatchTable.from_rows(data)
+        self.__init__(table.columns(), table.players, table.tournaments, table.texts)
+
+    def splice(self, segments):
+        """
+        Function that replaces in place ranges of games of the table by the given list of list games, in the same way as
+        data[first:last] = games on the list of list dataset. New players, tournaments and texts are added at the end of
+        the vocabularies, so the codes of the other games don't change. Instead of being dropped, the indexes already
+        built on the table are updated: the games of the other ranges are moved and the new games are merged into them,
+        which costs a few vectorized passes over the table without sorting it again.
+
+        Args:
+
+        segments: list of (first, last, games) tuples ordered by first and not overlapping, where games is the list of
+        list replacing the games [first, last) of the table. Each range should hold all the games of its tournaments,
+        as in append_matches(), for the edition index to stay exact.
+
+        """
+
+        if not segments:
+            return
+
+        encoded = [self._encode(games, self._player_index, self._tournament_index, self._text_index) for
+                   first, last, games in segments]
+        for vocabulary, index in ((self.players, self._player_index), (self.tournaments, self._tournament_index),
+                                  (self.texts, self._text_index)):
+            vocabulary.extend(list(index)[len(vocabulary):])
+
+        old = self.columns()
+        pieces = {name: [] for name in COLUMNS}
+        position = 0 # first game of the table not copied yet
+        for (first, last, games), columns in zip(segments, encoded):
+            for name in COLUMNS:
+                pieces[name] += [old[name][position:first], columns[name]]
+            position = last
+        for name in COLUMNS:
+            pieces[name].append(old[name][position:])
+            setattr(self, name, np.concatenate(pieces[name]))
+
+        if self._indexes:
+            self._update_indexes(old, [(first, last, len(games)) for first, last, games in segments])
+
+    def _update_indexes(self, old, segments):
+        """
+        Auxiliary function of splice() that updates the indexes built on the table, given the columns before the splice
+        and the (first, last, number of new games) of each replaced range.
+        """
+
+        firsts = np.array([first for first, last, length in segments], dtype=np.int64)
+        lasts = np.array([last for first, last, length in segments], dtype=np.int64)
+        shifts = np.concatenate(([0], np.cumsum([length - (last - first) for first, last, length in segments])))
+        starts = firsts + shifts[:-1] # first position of the new games of each range
+        new_rows = np.concatenate([np.arange(start, start + length) for start, (first, last, length) in
+                                   zip(starts.tolist(), segments)] + [np.empty(0, dtype=np.int64)])
+
+        def kept(rows): # whether each game of the old table is outside of the replaced ranges
+            k = np.searchsorted(lasts, rows, side="right")
+            return (k == len(lasts)) | (rows < firsts[np.minimum(k, len(lasts) - 1)])
+
+        def moved(rows): # new positions of games of the old table outside of the replaced ranges
+            return rows + shifts[np.searchsorted(lasts, rows, side="right")]
+
+        def merge(keys, values, new_keys, new_values): # inserts the new sorted keys into the sorted keys
+            at = np.searchsorted(keys, new_keys)
+            return [np.insert(value, at, new_value) for value, new_value in zip(values, new_values)]
+
+        for key, index in list(self._indexes.items()):
+            if type(key) == tuple: # ("date", column): games sorted by (date, position)
+                column = getattr(self, key[1])
+                order, dates = index
+                keep = kept(order)
+                order, dates = moved(order[keep]), dates[keep]
+                new_order = new_rows[np.argsort(column[new_rows], kind="stable")]
+                self._indexes[key] = tuple(merge(dates.astype(np.int64) * len(self) + order,
+                                                 (order, dates), column[new_order].astype(np.int64) * len(self) +
+                                                 new_order, (new_order, column[new_order])))
+
+            elif key == "edition":
+                touched = set(old["tournament"][np.concatenate(
+                    [np.arange(first, last) for first, last, length in segments] + [np.empty(0, dtype=np.int64)])]
+                    .tolist()) | set(self.tournament[new_rows].tolist())
+                edition = {}
+                for (name, year), part in index.items():
+                    if self.tournament_id(name) not in touched:
+                        begin, end = moved(np.array([part.start, part.stop - 1])).tolist()
+                        edition[(name, year)] = slice(begin, end + 1)
+                for start, (first, last, length) in zip(starts.tolist(), segments):
+                    edition.update(self._editions(start, start + length))
+                self._indexes[key] = edition
+
+            elif key == "player": # games sorted by (player, position)
+                rows, offsets = index
+                players = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+                keep = kept(rows)
+                rows, players = moved(rows[keep]), players[keep]
+                new_players = np.concatenate((self.player1[new_rows], self.player2[new_rows])).astype(np.int64)
+                new_games = np.tile(new_rows, 2)
+                order = np.lexsort((new_games, new_players))
+                rows, players = merge(players * len(self) + rows, (rows, players),
+                                      new_players[order] * len(self) + new_games[order],
+                                      (new_games[order], new_players[order]))
+                offsets = np.zeros(len(self.players) + 1, dtype=np.int64)
+                offsets[1:] = np.cumsum(np.bincount(players, minlength=len(self.players)))
+                self._indexes[key] = (rows, offsets)
+
+            elif key == "head_to_head":
+                removed = np.flatnonzero(~kept(np.arange(len(old["player1"]))))
+                _count_pairs(index, old["player1"][removed], old["player2"][removed], old["winner"][removed], -1)
+                _count_pairs(index, self.player1[new_rows], self.player2[new_rows], self.winner[new_rows], 1)
+
+    def __len__(self):
+        return len(self.tournament)
+
+    def columns(self):
+        """
+        Function that returns a dictionary where each key is a column name and its value the column array.
+        """
+
+        return {name: getattr(self, name) for name in COLUMNS}
+
+    def row(self, i):
+        """
+        Function that returns the i-th game as a list, in the same format as the list of list dataset.
+
+        Args:
+
+        i: index of the game (int)
+
+        """
+
+        match = [self.tournaments[self.tournament[i]], self.start[i].item(), self.end[i].item(),
+                 self.players[self.player1[i]], self.players[self.player2[i]],
+                 "" if np.isnan(self.rank1[i]) else str(float(self.rank1[i])),
+                 "" if np.isnan(self.rank2[i]) else str(float(self.rank2[i])),
+                 self.texts[self.set1[i]], self.texts[self.set2[i]], self.texts[self.set3[i]],
+                 self.texts[self.comment[i]]]
+        # annotation fields, only for the stages that have been run
+        if self.winner[i] >= 0:
+            match.append(self.players[self.winner[i]])
+        if self.round[i] > 0:
+            match.append(int(self.round[i]))
+        if self.label[i] != NOT_ANNOTATED:
+            match.append(round_name(self.label[i]))
+        return match
+
+    def to_rows(self):
+        """
+        Function that converts the MatchTable back to the list of list dataset. The WTA ranks are stored as floats, so
+        they are written back as "12.0" whatever their text in the csv files.
+        """
+
+        return [self.row(i) for i in range(len(self))]
+
+    def player_id(self, player):
+        """
+        Function that returns the integer id of the given player name, or -1 if the player never played.
+
+        Args:
+
+        player: player name (string)
+
+        """
+
+        return self._player_index.get(player, -1)
+
+    def tournament_id(self, tournament_name):
+        """
+        Function that returns the integer id of the given tournament name, or -1 if the tournament is unknown.
+
+        Args:
+
+        tournament_name: tournament name (string)
+
+        """
+
+        return self._tournament_index.get(tournament_name, -1)
+
+    def years(self, column="start"):
+        """
+        Function that returns the year of each game for the given date column ("start" or "end") as an int array.
+        """
+
+        return years(getattr(self, column))
+
+    def mask_years(self, period, column="start"):
+        """
+        Function that returns the boolean mask of the games whose date column falls within the given period.
+
+        Args:
+
+        period: considered period of type int or list
+        column: considered date column ("start" or "end")
+
+        """
+
+        if type(period) == int:
+            period = [period]
+        return np.isin(self.years(column), period)
+
+    def date_index(self, column="end"):
+        """
+        Function that returns the index of the games sorted by the given date column, as a tuple (order, dates) where
+        order is the array of game indexes sorted by date (stable) and dates the sorted dates. The index is built once
+        and kept until the table is modified.
+
+        Args:
+
+        column: considered date column ("start" or "end", default value "end")
+
+        """
+
+        if ("date", column) not in self._indexes:
+            order = np.argsort(getattr(self, column), kind="stable")
+            self._indexes[("date", column)] = (order, getattr(self, column)[order])
+        return self._indexes[("date", column)]
+
+    def between(self, start, stop, column="end"):
+        """
+        Function that returns the indexes, in the order of the table, of the games whose date column falls within
+        [start, stop). The window is found by binary search in date_index(), so it costs O(log n + k) for k games.
+
+        Args:
+
+        start: first date of the window (date object, included)
+        stop: last date of the window (date object, excluded)
+        column: considered date column ("start" or "end", default value "end")
+
+        """
+
+        order, dates = self.date_index(column)
+        first, last = np.searchsorted(dates, [np.datetime64(start, "D"), np.datetime64(stop, "D")])
+        return np.sort(order[first:last])
+
+    def rows_in_years(self, period, column="start"):
+        """
+        Function that returns the indexes, in the order of the table, of the games whose date column falls within the
+        given period. Each year is resolved by binary search in date_index().
+
+        Args:
+
+        period: considered period of type int or list
+        column: considered date column ("start" or "end", default value "start")
+
+        """
+
+        if type(period) == int:
+            period = [period]
+
+        order, dates = self.date_index(column)
+        bounds = np.array([str(year) for year in sorted(set(period))], dtype="datetime64[Y]")
+        firsts = np.searchsorted(dates, bounds.astype("datetime64[D]"))
+        lasts = np.searchsorted(dates, (bounds + 1).astype("datetime64[D]"))
+        return np.sort(np.concatenate([order[first:last] for first, last in zip(firsts, lasts)] +
+                                      [np.empty(0, dtype=order.dtype)]))
+
+    def edition_index(self):
+        """
+        Function that returns the dictionary where each key is a (tournament name, year) tuple and its value is the slice
+        of the table spanning the games of that tournament edition, the year being the year of the end date. When the
+        table is ordered by tournament name and start date, the games of an edition are contiguous, so a bracket query
+        only reads its slice. The index is built once and kept until the table is modified.
+        """
+
+        if "edition" not in self._indexes:
+            self._indexes["edition"] = self._editions(0, len(self))
+        return self._indexes["edition"]
+
+    def _editions(self, first, last):
+        """
+        Auxiliary function that returns the edition_index() entries of the games [first, last) of the table.
+        """
+
+        key = self.tournament[first:last].astype(np.int64) * 10000 + years(self.end[first:last]) # (tournament, year)
+        editions, begin = np.unique(key, return_index=True)
+        end = len(key) - np.unique(key[::-1], return_index=True)[1]
+        return {(self.tournaments[edition // 10000], int(edition % 10000)): slice(a, b) for
+                edition, a, b in zip(editions.tolist(), (begin + first).tolist(), (end + first).tolist())}
+
+    def edition_rows(self, tournament_name, year):
+        """
+        Function that returns the indexes, in the order of the table, of the games of the given tournament edition. Only
+        the slice of the edition in edition_index() is read.
+
+        Args:
+
+        tournament_name: the considered tournament name (string)
+        year: the year when the tournament ended (int)
+
+        """
+
+        edition = self.edition_index().get((tournament_name, year), slice(0, 0))
+        rows = np.arange(edition.start, edition.stop)
+        return rows[(self.tournament[edition] == self.tournament_id(tournament_name)) &
+                    (years(self.end[edition]) == year)]
+
+    def player_index(self):
+        """
+        Function that returns the posting lists of the players as a tuple (rows, offsets), where rows[offsets[p]:
+        offsets[p + 1]] are the indexes, in the order of the table, of the games played by the player of id p. The index
+        is built once and kept until the table is modified.
+        """
+
+        if "player" not in self._indexes:
+            players = np.concatenate((self.player1, self.player2))
+            games = np.tile(np.arange(len(self)), 2)
+            order = np.lexsort((games, players)) # games of each player in the order of the table
+            offsets = np.zeros(len(self.players) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(np.bincount(players, minlength=len(self.players)))
+            self._indexes["player"] = (games[order], offsets)
+        return self._indexes["player"]
+
+    def player_rows(self, player):
+        """
+        Function that returns the indexes, in the order of the table, of the games played by the given player.
+
+        Args:
+
+        player: player name (string)
+
+        """
+
+        rows, offsets = self.player_index()
+        player_id = self.player_id(player)
+        if player_id < 0:
+            return rows[:0]
+        return rows[offsets[player_id]:offsets[player_id + 1]]
+
+    def head_to_head_index(self):
+        """
+        Function that returns the dictionary where each key is a pair of player ids (lowest id first) who played each
+        other and its value is the tuple (number of games, games won by the first player, games won by the second
+        player). The index is built once and kept until the table is modified.
+        """
+
+        if "head_to_head" not in self._indexes:
+            low = np.minimum(self.player1, self.player2).astype(np.int64)
+            high = np.maximum(self.player1, self.player2).astype(np.int64)
+            pairs, inverse = np.unique(low * len(self.players) + high, return_inverse=True)
+            games = np.bincount(inverse, minlength=len(pairs))
+            low_wins = np.bincount(inverse, weights=self.winner == low, minlength=len(pairs)).astype(np.int64)
+            high_wins = np.bincount(inverse, weights=self.winner == high, minlength=len(pairs)).astype(np.int64)
+            self._indexes["head_to_head"] = {
+                divmod(pair, len(self.players)): counts for pair, counts in
+                zip(pairs.tolist(), zip(games.tolist(), low_wins.tolist(), high_wins.tolist()))}
+        return self._indexes["head_to_head"]
+
+    def head_to_head(self, player1, player2):
+        """
+        Function that returns the tuple (number of games, games won by player1, games won by player2) of the games
+        between the two given players, read from head_to_head_index().
+
+        Args:
+
+        player1, player2: player names (string)
+
+        """
+
+        id1, id2 = self.player_id(player1), self.player_id(player2)
+        games, low_wins, high_wins = self.head_to_head_index().get((min(id1, id2), max(id1, id2)), (0, 0, 0))
+        if id1 <= id2:
+            return games, low_wins, high_wins
+        return games, high_wins, low_wins
+
+    def clear_indexes(self):
+        """
+        Function that drops the indexes built on the table. It must be called after modifying a column in place.
+        """
+
+        self._indexes = {}
+
+    def sort_key(self, column):
+        """
+        Function that returns an array that sorts like the given column. Code columns are mapped to the alphabetical
+        rank of their vocabulary entry, so sorting by "tournament" sorts by tournament name.
+        """
+
+        values = getattr(self, column)
+        if column == "tournament":
+            vocabulary = self.tournaments
+        elif column in PLAYER_COLUMNS:
+            vocabulary = self.players
+        elif column in TEXT_COLUMNS:
+            vocabulary = self.texts
+        else:
+            return values
+
+        alphabetical = np.empty(len(vocabulary), dtype=np.int64)
+        alphabetical[np.argsort(np.array(vocabulary, dtype=object), kind="stable")] = np.arange(len(vocabulary))
+        return alphabetical[values]
+
+    def sort(self, *columns):
+        """
+        Function that sorts the table in place by the given columns, in the same way as data.sort(key=lambda x: (...)).
+        The sort is stable.
+
+        Args:
+
+        columns: column names, the first one being the primary key
+
+        """
+
+        order = np.lexsort([self.sort_key(column) for column in reversed(columns)])
+        self.reorder(order)
+
+    def reorder(self, order):
+        """
+        Function that reorders in place every column of the table according to the given index array.
+        """
+
+        for name in COLUMNS:
+            setattr(self, name, getattr(self, name)[order])
+        self.clear_indexes()
+
+    def take(self, indices):
+        """
+        Function that returns a new MatchTable made of the given games (index array or boolean mask). The new table
+        shares the vocabularies of the current table.
+        """
+
+        return MatchTable({name: getattr(self, name)[indices] for name in COLUMNS}, self.players, self.tournaments,
+                          self.texts)
+
+
+def _count_pairs(index, player1, player2, winner, sign):
+    """
+    Auxiliary function that adds (sign 1) or removes (sign -1) the given games from a head_to_head_index() dictionary.
+    """
+
+    for id1, id2, won in zip(player1.tolist(), player2.tolist(), winner.tolist()):
+        pair = (min(id1, id2), max(id1, id2))
+        games, low_wins, high_wins = index.get(pair, (0, 0, 0))
+        games += sign
+        low_wins += sign * (won == pair[0])
+        high_wins += sign * (won == pair[1])
+        if games:
+            index[pair] = (games, low_wins, high_wins)
+        else:
+            index.pop(pair, None)
+
+
+def first_appearance(player1, player2):
+    """
+    Function that returns the ids of the players of the given games ordered by their first appearance, where player1
+    of a game is met before player2. This is the insertion order of the player dictionaries of the list version.
+
+    Args:
+
+    player1, player2: int arrays of player ids
+
+    """
+
+    interleaved = np.column_stack((player1, player2)).ravel()
+    players, first_index = np.unique(interleaved, return_index=True)
+    return players[np.argsort(first_index)]
+
+
+def first_appearance_by_year(player1, player2, year, n_years, n_players):
+    """
+    Function that returns the int64 array of shape (n_years, n_players) giving, for each year and player, the position
+    of the first appearance of the player among the given games of that year, where player1 of a game is met before
+    player2. Players who didn't play during a year are given NO_APPEARANCE. Since the positions of all the years are
+    comparable, the first appearance order of a period is the minimum over its years (see appearance_order()).
+
+    Args:
+
+    player1, player2: int arrays of player ids
+    year: int array giving the position of the year of each game, between 0 and n_years - 1
+    n_years, n_players: number of years and players
+
+    """
+
+    cells = np.repeat(np.asarray(year, dtype=np.int64), 2) * n_players + \
+            np.column_stack((player1, player2)).ravel().astype(np.int64)
+    cells, first_index = np.unique(cells, return_index=True)
+    first = np.full(n_years * n_players, NO_APPEARANCE, dtype=np.int64)
+    first[cells] = first_index
+    return first.reshape(n_years, n_players)
+
+
+def appearance_order(first):
+    """
+    Function that returns the ids of the players who appeared, ordered by their first appearance.
+
+    Args:
+
+    first: int64 array giving the position of the first appearance of each player (NO_APPEARANCE if he didn't play)
+
+    """
+
+    players = np.flatnonzero(first != NO_APPEARANCE)
+    return players[np.argsort(first[players], kind="stable")]
@@ -0,0 +1,165 @@
+from contextlib import contextmanager
+from functools import wraps
+import json
+import time
+import tracemalloc
+
+# Optional instrumentation of the pipeline. The annotation stages, the graph builds and the WbW iterations are
+# decorated with stage(), and the WbW iterations also report each iteration with trace(). Records are only built while
+# a profile() context is open: otherwise a decorated function is called directly after checking that no profiler is
+# registered, and the iterations only check a flag once per run, so the instrumentation costs nothing measurable when
+# disabled.
+#
+# Records are dictionaries with the keys:
+# "type": "stage" for a run of a stage, "iteration" for an iteration of the WbW algorithm
+# "stage": name of the stage
+# for a stage, "time" (wall time in seconds), "rows" (number of games, or of players for the WbW iterations, None if
+# unknown) and "memory" (peak memory allocated during the stage in bytes, None if memory isn't tracked)
+# for an iteration, "backend", "iteration" (starting at 1), "adjust_count" (number of adjustments in the ranking, None
+# when converging on a tolerance) and "residual" (change in scores during the iteration, or relative residual of the
+# linear system for the "krylov" backend)
+
+_profilers = [] # callbacks of the open profile() contexts, the instrumentation is disabled when empty
+_active = set() # stages running, so that a stage calling itself on another representation is only recorded once
+_memory = [] # [current memory at the start, peak memory of the inner stages] of each running stage if memory is tracked
+
+
+@contextmanager
+def profile(callback=None, log=None, memory=False):
+    """
+    Context manager that enables the instrumentation and returns the list of the records made inside it, in the order
+    in which they are emitted (a stage is emitted when it ends, after its inner stages and iterations).
+
+    Args:
+
+    callback: function called with each record as soon as it is emitted (None by default)
+    log: path of a file where the records are appended as JSON lines (None by default)
+    memory: if set to True (False as default value), the peak memory of each stage is tracked with tracemalloc, which
+    slows down the profiled code
+
+    """
+
+    records = []
+    log_file = open(log, "a") if log is not None else None
+
+    def record(item):
+        records.append(item)
+        if callback is not None:
+            callback(item)
+        if log_file is not None:
+            log_file.write(json.dumps(item, default=str) + "\n")
+
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    _profilers.append(record)
+    try:
+        yield records
+    finally:
+        _profilers.remove(record)
+        if started:
+            tracemalloc.stop()
+        if log_file is not None:
+            log_file.close()
+
+
+def enabled():
+    """
+    Function that returns whether a profile() context is open.
+    """
+
+    return bool(_profilers)
+
+
+def emit(record):
+    """
+    Function that sends the given record to the open profile() contexts.
+    """
+
+    for profiler in list(_profilers):
+        profiler(record)
+
+
+def trace(stage, backend, iteration, adjust_count, residual):
+    """
+    Function that emits the record of an iteration of the WbW algorithm. It should only be called when enabled() is
+    True.
+    """
+
+    emit({"type": "iteration", "stage": stage, "backend": backend, "iteration": iteration,
+          "adjust_count": adjust_count, "residual": residual})
+
+
+def stage(name, rows=None):
+    """
+    Decorator that records each run of the decorated function as the given stage while a profile() context is open.
+
+    Args:
+
+    name: name of the stage (string)
+    rows: function called with the returned value and the arguments of the decorated function, returning the number of
+    rows of the stage (by default, the length of the first argument)
+
+    """
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _profilers or name in _active:
+                return function(*args, **kwargs)
+
+            with measure(name) as record:
+                result = function(*args, **kwargs)
+                record["rows"] = rows(result, *args, **kwargs) if rows is not None else _length(args)
+            return result
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def measure(name):
+    """
+    Context manager that records the code run inside it as the given stage while a profile() context is open. It
+    returns the record, whose "rows" can be filled inside the context.
+    """
+
+    record = {"type": "stage", "stage": name, "time": None, "rows": None, "memory": None}
+    if not _profilers or name in _active:
+        yield record
+        return
+
+    _active.add(name)
+    tracking = tracemalloc.is_tracing()
+    if tracking:
+        if _memory: # the peak of the outer stage is saved before being reset
+            _memory[-1][1] = max(_memory[-1][1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        _memory.append([tracemalloc.get_traced_memory()[0], 0])
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["time"] = time.perf_counter() - start
+        if tracking:
+            current, inner_peak = _memory.pop()
+            peak = max(inner_peak, tracemalloc.get_traced_memory()[1])
+            record["memory"] = peak - current
+            if _memory:
+                _memory[-1][1] = max(_memory[-1][1], peak)
+        _active.discard(name)
+    emit(record)
+
+
+def _length(args):
+    try:
+        return len(args[0])
+    except (IndexError, TypeError):
+        return
+
+
+def graph_games(graph, *args, **kwargs):
+    """
+    Auxiliary function giving the rows of the graph builds: the number of games of the returned loss graph.
+    """
+
+    return sum(len(lost_against) for lost_against in graph[1].values())
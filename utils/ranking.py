@@ -0,0 +1,216 @@
+import heapq
+
+import numpy as np
+
+# Array-backed result of the rankings. A Ranking stores the ids of its players into a vocabulary of player names with
+# their scores, so that looking up a player, joining the ranking to external ranks or comparing two rankings are
+# vectorized operations instead of walks over the list of list. It still behaves as the usual ranking list of list
+# [player, score], ordered from the highest score to the lowest score.
+
+
+class Ranking:
+    """
+    Ranking of players backed by arrays. The players are sorted by decreasing score only when the whole order is
+    needed, players of equal score keeping the order in which they are given.
+
+    Args:
+
+    players: vocabulary of player names, e.g. the players of a MatchTable
+    ids: int array of the ids of the ranked players into the vocabulary, in the order used for players of equal score
+    scores: array of the score of each ranked player
+
+    """
+
+    def __init__(self, players, ids, scores):
+        self.players = players
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.scores = np.asarray(scores)
+        self._order = None # positions into ids of the players ordered from the highest score, sorted on demand
+        self._positions = None # position in the ranking of each player of the vocabulary, 0 if not ranked
+        self._player_index = None # id of each player name
+
+    @classmethod
+    def from_list(cls, rank, players=None):
+        """
+        Function that builds a Ranking from a ranking list of list [player, score], keeping the order of the list.
+
+        Args:
+
+        rank: ranking list of list, or list of tuples (player, score)
+        players: vocabulary of player names containing the ranked players (by default, the ranked players)
+
+        """
+
+        if players is None:
+            players = [item[0] for item in rank]
+            ids = np.arange(len(players))
+        else:
+            index = {name: i for i, name in enumerate(players)}
+            ids = [index[item[0]] for item in rank]
+
+        ranking = cls(players, ids, [item[1] for item in rank])
+        ranking._order = np.arange(len(ranking.ids))
+        return ranking
+
+    def order(self):
+        """
+        Function that returns the positions into ids and scores of the players, from the highest score to the lowest
+        score.
+        """
+
+        if self._order is None:
+            self._order = np.argsort(-self.scores, kind="stable")
+        return self._order
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        k = self.order()[i]
+        return [self.players[self.ids[k]], self.scores[k].item()]
+
+    def __iter__(self):
+        order = self.order()
+        for player, score in zip(self.ids[order].tolist(), self.scores[order].tolist()):
+            yield [self.players[player], score]
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return "Ranking(" + repr(self.to_list()) + ")"
+
+    def to_list(self):
+        """
+        Function that returns the ranking as a list of list [player, score].
+        """
+
+        return list(self)
+
+    def player_id(self, player):
+        """
+        Function that returns the id of the given player name into the vocabulary (-1 if not found).
+        """
+
+        if self._player_index is None:
+            self._player_index = {name: i for i, name in enumerate(self.players)}
+        return self._player_index.get(player, -1)
+
+    def positions(self):
+        """
+        Function that returns the int array giving, for each player of the vocabulary, his position in the ranking (1
+        for the best player), or 0 if he isn't ranked.
+        """
+
+        if self._positions is None:
+            self._positions = np.zeros(len(self.players), dtype=np.int64)
+            self._positions[self.ids[self.order()]] = np.arange(1, len(self) + 1)
+        return self._positions
+
+    def rank_of(self, player):
+        """
+        Function that returns the position of the given player in the ranking (1 for the best player), or None if he
+        isn't ranked.
+        """
+
+        player = self.player_id(player)
+        position = int(self.positions()[player]) if player >= 0 else 0
+        return position if position > 0 else None
+
+    def score_of(self, player):
+        """
+        Function that returns the score of the given player, or None if he isn't ranked.
+        """
+
+        position = self.rank_of(player)
+        if position is None:
+            return
+        return self.scores[self.order()[position - 1]].item()
+
+    def top(self, k):
+        """
+        Function that returns the list of list [player, score] of the k best players. If the ranking isn't sorted yet,
+        the k best players are selected with a heap instead of sorting all the players.
+
+        Args:
+
+        k: number of players (type int)
+
+        """
+
+        if self._order is not None:
+            return self[:k]
+
+        scores = self.scores.tolist()
+        best = heapq.nsmallest(k, range(len(scores)), key=lambda j: (-scores[j], j))
+        return [[self.players[self.ids[j]], scores[j]] for j in best]
+
+    def print_top_three(self):
+        """
+        Function that prints the three best players of the ranking with their associated scores, as done by the
+        rankings called with printer=True.
+        """
+
+        print("\nThe top three players for the given period are:")
+        for player, score in self.top(3):
+            print("Player: ", player, " Score: ", score)
+
+    def join(self, ranks):
+        """
+        Function that joins the ranking to external ranks, e.g. WTA ranks. Returns the float array of shape (players,
+        2) whose rows are [external rank, position in the ranking] for the ranked players whose external rank is known,
+        from the best player to the worst player.
+
+        Args:
+
+        ranks: array of the external rank of each player of the vocabulary (NaN if unknown), or dictionary where each
+        key is a player name and its value is his rank, missing ranks being empty strings or None
+
+        """
+
+        if isinstance(ranks, dict):
+            ranks = np.array([float(ranks[name]) if ranks.get(name) else np.nan for name in self.players])
+
+        external = np.asarray(ranks, dtype=np.float64)[self.ids[self.order()]]
+        known = ~np.isnan(external)
+        return np.column_stack((external[known], np.flatnonzero(known) + 1.0))
+
+    def diff(self, other):
+        """
+        Function that compares the ranking to another ranking, e.g. the ranking of a previous period. Returns a
+        dictionary with the keys:
+        "players": list of the players of both rankings, in the order of this ranking
+        "positions": int array of the positions gained by each of these players since the other ranking
+        "scores": array of the change in score of each of these players since the other ranking
+        "new": list of the players of this ranking missing from the other ranking
+
+        Args:
+
+        other: Ranking
+
+        """
+
+        if other.players is self.players:
+            other_positions = other.positions()
+        else: # the positions of the other ranking are moved to the vocabulary of this ranking
+            other_positions = np.zeros(len(self.players), dtype=np.int64)
+            ids = np.array([self.player_id(name) for name in other.players], dtype=np.int64)
+            found = ids >= 0
+            other_positions[ids[found]] = other.positions()[found]
+
+        order = self.order()
+        ids = self.ids[order]
+        before = other_positions[ids]
+        both = before > 0
+        positions = np.arange(1, len(self) + 1)
+        other_scores = other.scores[other.order()][before[both] - 1]
+
+        return {"players": [self.players[player] for player in ids[both].tolist()],
+                "positions": before[both] - positions[both],
+                "scores": self.scores[order][both] - other_scores,
+                "new": [self.players[player] for player in ids[~both].tolist()]}
@@ -0,0 +1,126 @@
+import math
+from datetime import timedelta
+
+import numpy as np
+from scipy import sparse
+
+from .match_table import MatchTable
+from .ranking import Ranking
+from .wbw_performance import modif_start_date
+
+# Rolling WW and WdL leaderboards. As in wbw_comparison(), a leaderboard is computed at the start date of each
+# tournament from the games of the tournaments that ended in the window_time before it. The games are ordered by end
+# date once, so that the window of each date is a contiguous slice of this stream. The scores of the window are kept in
+# a single running vector, moved from a date to the next by adding the games entering the window and subtracting the
+# games leaving it, so that all the leaderboards are given by a single pass over the games and the memory only grows
+# with the number of players, besides the returned leaderboards.
+
+
+def rolling_leaderboards(data, method="ww", window_time=timedelta(days=364), initializing_year=2007):
+    """
+    Function that returns the WW or WdL scores of the players at the start date of each tournament, based on the games
+    of the tournaments that ended in the window_time before this date (excluded), as wbw_ranking_past(). The start dates
+    are harmonized as in wbw_comparison(), without modifying the given dataset. The leaderboards are a dictionary with
+    the keys:
+    "dates": datetime64 array of the distinct tournament start dates, in increasing order
+    "players": list of the player names
+    "scores": scipy CSR matrix of shape (dates, players), holding the score of each player who won or lost a game inside
+    the window of the date, even if his score is 0. Other players are left out of the leaderboard of the date.
+
+    Args:
+
+    data: list of list, where the inner list contains each game details, or MatchTable
+    method: "ww" (default value) for the number of games won, as winners_win(), or "wdl" for the round weighted score
+    of winners_dont_lose(). The WdL scores are summed exactly and only rounded once when converted to float.
+    window_time: window time length for including completed past tournaments (timedelta object, 52 weeks by default)
+    initializing_year: only the tournaments that ended after this year are given a leaderboard (type int)
+
+    Prerequisite:
+    The dataset should be ordered by first tournament name and secondly by tournament start date.
+    correct_error() and winner() should be run on the dataset before running the function, as well as round() and
+    round_robin() for the "wdl" method.
+
+    """
+
+    if method not in ("ww", "wdl"):
+        raise ValueError('method should be "ww" or "wdl".')
+
+    # copy of the dataset whose start dates can be harmonized
+    table = data.take(np.arange(len(data))) if isinstance(data, MatchTable) else MatchTable.from_rows(data)
+    modif_start_date(table)
+    dates = np.unique(table.start[table.years("end") > initializing_year])
+    n_players = len(table.players)
+
+    # stream of the games with a winner ordered by end date, and slice of the stream inside the window of each date
+    rows = np.flatnonzero(table.winner >= 0)
+    rows = rows[np.argsort(table.end[rows], kind="stable")]
+    ends = table.end[rows]
+    first = np.searchsorted(ends, dates - np.timedelta64(window_time.days, "D"), "left")
+    last = np.searchsorted(ends, dates, "left")
+
+    # scores given by each game to its winner and to its loser, as integers
+    winner = table.winner[rows].astype(np.int64)
+    loser = np.where(table.player1[rows] == winner, table.player2[rows], table.player1[rows]).astype(np.int64)
+    if method == "ww":
+        denominator = 1
+        gains, losses = np.ones(len(rows), dtype=np.int64), np.zeros(len(rows), dtype=np.int64)
+    else:
+        # the WdL scores are integer multiples of 1 / lcm(1, ..., rounds)
+        round = table.round[rows].astype(np.int64)
+        denominator = math.lcm(*range(1, int(round.max()) + 1)) if len(rows) > 0 else 1
+        gains, losses = round * denominator, -(denominator // round)
+
+    # players and scores of the stream interleaved game by game, the game k being at [2 * k, 2 * k + 2)
+    player = np.column_stack((winner, loser)).ravel()
+    contribution = np.column_stack((gains, losses)).ravel()
+
+    # running scores and numbers of games of the players inside the window of the current date
+    score = np.zeros(n_players, dtype=np.int64)
+    games = np.zeros(n_players, dtype=np.int64)
+    entered = left = 0 # games of the stream added to and removed from the running vectors
+    indices, values, offsets = [], [], [0]
+    for a, b in zip(first.tolist(), last.tolist()):
+        _move(score, games, player[2 * entered:2 * b], contribution[2 * entered:2 * b], 1)
+        _move(score, games, player[2 * left:2 * a], contribution[2 * left:2 * a], -1)
+        entered, left = b, a
+        played = np.flatnonzero(games)
+        indices.append(played)
+        values.append(score[played])
+        offsets.append(offsets[-1] + len(played))
+
+    values = np.concatenate(values) if values else np.empty(0, dtype=np.int64)
+    if method == "wdl":
+        values = values / denominator
+    indices = np.concatenate(indices) if indices else np.empty(0, dtype=np.int64)
+    scores = sparse.csr_matrix((values, indices, offsets), shape=(len(dates), n_players))
+    return {"dates": dates, "players": table.players, "scores": scores}
+
+
+def _move(score, games, player, contribution, sign):
+    """
+    Auxiliary function of rolling_leaderboards() that adds (sign 1) or subtracts (sign -1) the given contributions of
+    games to the running scores and numbers of games of the players.
+    """
+
+    np.add.at(score, player, sign * contribution)
+    np.add.at(games, player, sign)
+
+
+def top_players(leaderboards, k=3):
+    """
+    Generator that yields, for each date of the given leaderboards, the tuple (date, rank) where rank is the list of list
+    of the k best players of the date with their score, ordered from the highest score to the lowest score. Players of
+    equal score are ordered by player id, which is their order of first appearance in the dataset. The k best players
+    are selected with Ranking.top(), without sorting the whole leaderboard.
+
+    Args:
+
+    leaderboards: dictionary returned by rolling_leaderboards()
+    k: number of players of each snapshot (type int and default value 3)
+
+    """
+
+    scores = leaderboards["scores"]
+    for i, date in enumerate(leaderboards["dates"].tolist()):
+        row = slice(scores.indptr[i], scores.indptr[i + 1])
+        yield date, Ranking(leaderboards["players"], scores.indices[row], scores.data[row]).top(k)
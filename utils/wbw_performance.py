@@ -1,5 +1,16 @@
+from bisect import insort
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from datetime import timedelta
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from functools import partial
+
+import numpy as np
+
+from .match_table import MatchTable
+from .profiling import graph_games, stage
+from .ranking import Ranking
+from .wbw_rank import WbwResult, defeated_graph, games_graph, wbw_iteration
 
 def modif_start_date(data):
     """ 
@@ -9,13 +20,17 @@ def modif_start_date(data):
     
     Args: 
     
-    data: list of list where the inner list contains the game's details
+    data: list of list where the inner list contains the game's details, or MatchTable
         
     Prerequisite: 
     The dataset should be ordered by firstly tournament name and secondly by tournament start date.
     
     """
 
+    if isinstance(data, MatchTable):
+        _modif_start_date_table(data)
+        return
+
     # variables detecting when moving to a new tournament
     tourn = None
     tourn_start_date = None
@@ -38,7 +53,8 @@ def modif_start_date(data):
             data[i][1] = tourn_start_date
 
 
-def wbw_ranking_tourn(data, period, adjust_max=10, iteration_max=100):
+def wbw_ranking_tourn(data, period, adjust_max=10, iteration_max=100, backend="dict", initial=None, tolerance=None,
+                      norm="l1", damping=0.85):
     """
     Auxiliary function that will help initialize our WbW ranking for the year 2007. The function returns the ranking
     for a year according to completed tournaments that took place in that given year. The ranking is a list of list where
@@ -47,11 +63,20 @@ def wbw_ranking_tourn(data, period, adjust_max=10, iteration_max=100):
 
     Args:
 
-    data: list of list, where the inner list contains each game details
+    data: list of list, where the inner list contains each game details, or MatchTable
     period: considered period for the ranking of type int or list
     adjust_max: sets the maximum number of allowed adjustments for convergence (type int and default value 10)
     iteration_max: sets the maximum number of allowed iterations (integer greater than 0 and default value 100). If the
     number of iterations before convergence exceeds iterations_max, the algorithm stops.
+    backend: "dict" (default value), "sparse" to run the WbW iterations as sparse matrix-vector products, or "solve"
+    and "krylov" to solve the exact scores, see wbw_ranking()
+    initial: dictionary where each key is a player and its value is his initial score, e.g. the scores of a previous
+    ranking (uniform scores by default)
+    tolerance: if given, the algorithm converges when the change in scores between two iterations is lower or equal to
+    the tolerance instead of using adjust_max (None by default)
+    norm: "l1" (default value) or "linf", norm used to measure the change in scores when a tolerance is given
+    damping: share of his score that each player gives to the players he lost against at each iteration, the rest
+    being spread equally among all the players (default value 0.85)
 
     Prerequisite:
     The dataset should be ordered by first tournament name and secondly by tournament start date.
@@ -59,106 +84,78 @@ def wbw_ranking_tourn(data, period, adjust_max=10, iteration_max=100):
 
     """
 
+    rank = wbw_iteration(*tourn_graph(data, period), adjust_max, iteration_max, backend, initial, tolerance, norm,
+                         damping)
+    if not rank.converged: # if algorithm didn't converge after maximum number of iterations
+        print("Initializer algorithm couldn't converge, please modify inputted arguments.")
+
+    return positions(rank)
+
+
+@stage("graph_build", rows=graph_games)
+def tourn_graph(data, period):
+    """
+    Auxiliary function that returns the updated_rank and defeated_dic variables of wbw_ranking_tourn(), built from the
+    games of the tournaments that ended in the given period.
+
+    Args:
+
+    data: list of list, where the inner list contains each game details, or MatchTable
+    period: considered period for the ranking of type int or list
+
+    """
+
     if type(period) == int: # if given period is a single year of type int
         period = [period]
 
-    updated_rank = OrderedDict() # OrderedDict where key is a player with its associated score
-    defeated_dic = {} # dictionary where each key is a player and its value is the list of players against whom he lost
-
-    # building updated_rank and defeated_dic variables
-    for i in range(len(data)):
-        if data[i][2].year in period: # focusing on tournaments that ended in the given year
-            if data[i][3] not in updated_rank and data[i][4] not in updated_rank:
-                updated_rank[data[i][3]] = 0
-                updated_rank[data[i][4]] = 0
-                if data[i][3] == data[i][11]:
-                    defeated_dic[data[i][3]] = []
-                    defeated_dic[data[i][4]] = [data[i][3]]
-                elif data[i][4] == data[i][11]:
-                    defeated_dic[data[i][4]] = []
-                    defeated_dic[data[i][3]] = [data[i][4]]
-
-            elif data[i][3] in updated_rank and data[i][4] not in updated_rank:
-                updated_rank[data[i][4]] = 0
-                if data[i][3] == data[i][11]:
-                    defeated_dic[data[i][4]] = [data[i][3]]
-                elif data[i][4] == data[i][11]:
-                    defeated_dic[data[i][4]] = []
-                    defeated_dic[data[i][3]].append(data[i][4])
-
-            elif data[i][3] not in updated_rank and data[i][4] in updated_rank:
-                updated_rank[data[i][3]] = 0
-                if data[i][3] == data[i][11]:
-                    defeated_dic[data[i][3]] = []
-                    defeated_dic[data[i][4]].append(data[i][3])
-
-                elif data[i][4] == data[i][11]:
-                    defeated_dic[data[i][3]] = [data[i][4]]
-
-            elif data[i][3] in updated_rank and data[i][4] in updated_rank:
-                if data[i][3] == data[i][11]:
-                    defeated_dic[data[i][4]].append(data[i][3])
-
-                elif data[i][4] == data[i][11]:
-                    defeated_dic[data[i][3]].append(data[i][4])
-
-    total_players = len(updated_rank) # number of unique players
-    rank = OrderedDict((key, 1/total_players) for key in updated_rank) # initializing scores of each player
-
-    iteration = 0 # iteration counter
-    adjust_count = adjust_max + 1 # counts the number of adjustments made before next iteration
-
-    # while loop that stops when the number of adjustment made is lower or equal to the limit
-    while adjust_count > adjust_max:
-
-        # updating variables
-        adjust_count = 0
-        iteration += 1
-
-        # Distributing shares among players
-        for player, lost_against in defeated_dic.items():
-            loss_count = len(lost_against) # number of players he lost against
-
-            if loss_count > 0:
-                share_to_give = rank[player] / loss_count
-                for item in lost_against:
-                    updated_rank[item] += share_to_give
-
-            elif loss_count == 0: # case if player never lost
-                updated_rank[player] = rank[player]
-
-        # Rescaling scores
-        for item in updated_rank:
-            updated_rank[item] = updated_rank[item]*0.85 + 0.15/total_players
-
-        # Ordering the OrderedDict according to each player's score
-        updated_rank = OrderedDict(sorted(updated_rank.items(), key=lambda item: -item[1]))
-        rank = OrderedDict(sorted(rank.items(), key=lambda item: -item[1]))
-
-        # Obtaining the number of adjustments made over the iteration
-        for u, j in zip(rank.items(), updated_rank.items()):
-            if u[0] != j[0]:
-                adjust_count += 1
-
-        # Updating the dictionaries for the next iteration
-        if adjust_count > adjust_max:
-            rank = updated_rank
-            updated_rank = OrderedDict((key, 0) for key in rank)
-
-        elif adjust_count <= adjust_max: # if algorithm converged returns ranking list
-            final_rank = []
-            position = 0 # rank counter
-            for item in updated_rank:
-                position += 1
-                final_rank.append([item, position])
-            return final_rank
-
-        if iteration == iteration_max: # if algorithm didn't converge after maximum number of iterations
-            print("Initializer algorithm couldn't converge, please modify inputted arguments.")
-            break
-
-
-def wbw_ranking_past(data, past_period, days_before, adjust_max=10, iteration_max=100):
+    if isinstance(data, MatchTable): # vectorized selection of the tournaments that ended in the given period
+        updated_rank, defeated_dic = defeated_graph(data, data.rows_in_years(period, "end"))
+    else:
+        updated_rank = OrderedDict() # OrderedDict where key is a player with its associated score
+        defeated_dic = {} # dictionary where each key is a player and its value is the list of players against whom he lost
+
+        # building updated_rank and defeated_dic variables
+        for i in range(len(data)):
+            if data[i][2].year in period: # focusing on tournaments that ended in the given year
+                if data[i][3] not in updated_rank and data[i][4] not in updated_rank:
+                    updated_rank[data[i][3]] = 0
+                    updated_rank[data[i][4]] = 0
+                    if data[i][3] == data[i][11]:
+                        defeated_dic[data[i][3]] = []
+                        defeated_dic[data[i][4]] = [data[i][3]]
+                    elif data[i][4] == data[i][11]:
+                        defeated_dic[data[i][4]] = []
+                        defeated_dic[data[i][3]] = [data[i][4]]
+
+                elif data[i][3] in updated_rank and data[i][4] not in updated_rank:
+                    updated_rank[data[i][4]] = 0
+                    if data[i][3] == data[i][11]:
+                        defeated_dic[data[i][4]] = [data[i][3]]
+                    elif data[i][4] == data[i][11]:
+                        defeated_dic[data[i][4]] = []
+                        defeated_dic[data[i][3]].append(data[i][4])
+
+                elif data[i][3] not in updated_rank and data[i][4] in updated_rank:
+                    updated_rank[data[i][3]] = 0
+                    if data[i][3] == data[i][11]:
+                        defeated_dic[data[i][3]] = []
+                        defeated_dic[data[i][4]].append(data[i][3])
+
+                    elif data[i][4] == data[i][11]:
+                        defeated_dic[data[i][3]] = [data[i][4]]
+
+                elif data[i][3] in updated_rank and data[i][4] in updated_rank:
+                    if data[i][3] == data[i][11]:
+                        defeated_dic[data[i][4]].append(data[i][3])
+
+                    elif data[i][4] == data[i][11]:
+                        defeated_dic[data[i][3]].append(data[i][4])
+
+    return updated_rank, defeated_dic
+
+
+def wbw_ranking_past(data, past_period, days_before, adjust_max=10, iteration_max=100, backend="dict",
+                     initial=None, tolerance=None, norm="l1", damping=0.85):
     """
     Auxiliary function that returns the WbW ranking of each player based only on tournament that took place before a
     specified date. The ranking is a list of list where the inner list first element consists of the player name
@@ -166,12 +163,21 @@ def wbw_ranking_past(data, past_period, days_before, adjust_max=10, iteration_ma
 
     Args:
 
-    data: list of list, where the inner list contains each game details
+    data: list of list, where the inner list contains each game details, or MatchTable
     past_period: looking at tournaments that occurred before the past_period date (datetime object)
     days_before: controls the window time length for including completed past tournaments (timedelta object)
     adjust_max: sets the maximum number of allowed adjustments for convergence (type int and default value 10)
     iteration_max: sets the maximum number of allowed iterations (integer greater than 0 and default value 100). If the
     number of iterations before convergence exceeds iterations_max, the algorithm stops.
+    backend: "dict" (default value), "sparse" to run the WbW iterations as sparse matrix-vector products, or "solve"
+    and "krylov" to solve the exact scores, see wbw_ranking()
+    initial: dictionary where each key is a player and its value is his initial score, e.g. the scores of a previous
+    ranking (uniform scores by default)
+    tolerance: if given, the algorithm converges when the change in scores between two iterations is lower or equal to
+    the tolerance instead of using adjust_max (None by default)
+    norm: "l1" (default value) or "linf", norm used to measure the change in scores when a tolerance is given
+    damping: share of his score that each player gives to the players he lost against at each iteration, the rest
+    being spread equally among all the players (default value 0.85)
 
     Prerequisite:
     The dataset should be ordered by first tournament name and secondly by tournament start date.
@@ -179,105 +185,204 @@ def wbw_ranking_past(data, past_period, days_before, adjust_max=10, iteration_ma
 
     """
 
-    updated_rank = OrderedDict() # OrderedDict where key is a player with its associated score
-    defeated_dic = {} # dictionary where each key is a player and its value is the list of players against whom he lost
+    rank = wbw_iteration(*past_graph(data, past_period, days_before), adjust_max, iteration_max, backend, initial,
+                         tolerance, norm, damping)
+    if not rank.converged: # if algorithm didn't converge after maximum number of iterations
+        print("The algorithm for the WbW ranking based on the 52 weeks past tournaments couldn't converge, please modify inputted arguments.")
 
-    # building updated_rank and defeated_dic variables
-    for i in range(len(data)):
+    return positions(rank)
+
+
+@stage("graph_build", rows=graph_games)
+def past_graph(data, past_period, days_before):
+    """
+    Auxiliary function that returns the updated_rank and defeated_dic variables of wbw_ranking_past(), built from the
+    games of the tournaments that ended in the days_before preceding the past_period date (excluded).
 
-        # finding tournaments that occurred before the specified date
-        if days_before >= (past_period - data[i][2]) > timedelta(days=0):
-            if data[i][3] not in updated_rank and data[i][4] not in updated_rank:
-                updated_rank[data[i][3]] = 0
-                updated_rank[data[i][4]] = 0
-                if data[i][3] == data[i][11]:
-                    defeated_dic[data[i][3]] = []
-                    defeated_dic[data[i][4]] = [data[i][3]]
-                elif data[i][4] == data[i][11]:
-                    defeated_dic[data[i][4]] = []
-                    defeated_dic[data[i][3]] = [data[i][4]]
-
-            elif data[i][3] in updated_rank and data[i][4] not in updated_rank:
-                updated_rank[data[i][4]] = 0
-                if data[i][3] == data[i][11]:
-                    defeated_dic[data[i][4]] = [data[i][3]]
-                elif data[i][4] == data[i][11]:
-                    defeated_dic[data[i][4]] = []
-                    defeated_dic[data[i][3]].append(data[i][4])
-
-            elif data[i][3] not in updated_rank and data[i][4] in updated_rank:
-                updated_rank[data[i][3]] = 0
-                if data[i][3] == data[i][11]:
-                    defeated_dic[data[i][3]] = []
-                    defeated_dic[data[i][4]].append(data[i][3])
-
-                elif data[i][4] == data[i][11]:
-                    defeated_dic[data[i][3]] = [data[i][4]]
-
-            elif data[i][3] in updated_rank and data[i][4] in updated_rank:
-                if data[i][3] == data[i][11]:
-                    defeated_dic[data[i][4]].append(data[i][3])
-
-                elif data[i][4] == data[i][11]:
-                    defeated_dic[data[i][3]].append(data[i][4])
-
-    total_players = len(updated_rank) # number of unique players
-    rank = OrderedDict((key, 1/total_players) for key in updated_rank) # initializing scores of each player
-
-    iteration = 0 # iteration counter
-    adjust_count = adjust_max + 1 # counts the number of adjustments made before next iteration
-
-    while adjust_count > adjust_max: # while loop that stops when adjustment made is lower or equal to adjust max
-        # updating variables
-        adjust_count = 0
-        iteration += 1
-
-        # Distributing shares among players
-        for player, lost_against in defeated_dic.items():
-            loss_count = len(lost_against) # number of players he lost against
-
-            if loss_count > 0:
-                share_to_give = rank[player] / loss_count
-                for item in lost_against:
-                    updated_rank[item] += share_to_give
-
-            elif loss_count == 0: # case if player never lost
-                updated_rank[player] = rank[player]
-
-        # Rescaling scores
-        for item in updated_rank:
-            updated_rank[item] = updated_rank[item]*0.85 + 0.15/total_players
-
-        # Ordering the OrderedDict according to each player's score
-        updated_rank = OrderedDict(sorted(updated_rank.items(), key=lambda item: -item[1]))
-        rank = OrderedDict(sorted(rank.items(), key=lambda item: -item[1]))
-
-        # Obtaining the number of adjustments made over the iteration
-        for u, j in zip(rank.items(), updated_rank.items()): # iterating over dictionary elements
-            if u[0] != j[0]:
-                adjust_count += 1
-
-        # Updating the dictionaries for the next iteration
-        if adjust_count > adjust_max:
-            rank = updated_rank
-            updated_rank = OrderedDict((key, 0) for key in rank)
-
-        # if algorithm converged returns list
-        elif adjust_count <= adjust_max:
-            final_rank = []
-            position = 0 # rank counter
-            for item in updated_rank:
-                position += 1
-                final_rank.append([item, position])
-            return final_rank
-
-        # if algorithm didn't converge after maximum number of iterations
-        if iteration == iteration_max:
+    Args:
+
+    data: list of list, where the inner list contains each game details, or MatchTable
+    past_period: looking at tournaments that occurred before the past_period date (datetime object)
+    days_before: controls the window time length for including completed past tournaments (timedelta object)
+
+    """
+
+    if isinstance(data, MatchTable): # binary search of the tournaments that ended in the window
+        updated_rank, defeated_dic = defeated_graph(data, data.between(past_period - days_before, past_period))
+    else:
+        updated_rank = OrderedDict() # OrderedDict where key is a player with its associated score
+        defeated_dic = {} # dictionary where each key is a player and its value is the list of players against whom he lost
+
+        # building updated_rank and defeated_dic variables
+        for i in range(len(data)):
+
+            # finding tournaments that occurred before the specified date
+            if days_before >= (past_period - data[i][2]) > timedelta(days=0):
+                if data[i][3] not in updated_rank and data[i][4] not in updated_rank:
+                    updated_rank[data[i][3]] = 0
+                    updated_rank[data[i][4]] = 0
+                    if data[i][3] == data[i][11]:
+                        defeated_dic[data[i][3]] = []
+                        defeated_dic[data[i][4]] = [data[i][3]]
+                    elif data[i][4] == data[i][11]:
+                        defeated_dic[data[i][4]] = []
+                        defeated_dic[data[i][3]] = [data[i][4]]
+
+                elif data[i][3] in updated_rank and data[i][4] not in updated_rank:
+                    updated_rank[data[i][4]] = 0
+                    if data[i][3] == data[i][11]:
+                        defeated_dic[data[i][4]] = [data[i][3]]
+                    elif data[i][4] == data[i][11]:
+                        defeated_dic[data[i][4]] = []
+                        defeated_dic[data[i][3]].append(data[i][4])
+
+                elif data[i][3] not in updated_rank and data[i][4] in updated_rank:
+                    updated_rank[data[i][3]] = 0
+                    if data[i][3] == data[i][11]:
+                        defeated_dic[data[i][3]] = []
+                        defeated_dic[data[i][4]].append(data[i][3])
+
+                    elif data[i][4] == data[i][11]:
+                        defeated_dic[data[i][3]] = [data[i][4]]
+
+                elif data[i][3] in updated_rank and data[i][4] in updated_rank:
+                    if data[i][3] == data[i][11]:
+                        defeated_dic[data[i][4]].append(data[i][3])
+
+                    elif data[i][4] == data[i][11]:
+                        defeated_dic[data[i][3]].append(data[i][4])
+
+    return updated_rank, defeated_dic
+
+
+class WbwWindow:
+    """
+    Sliding window over the completed tournaments used by wbw_comparison(). Instead of rebuilding the loss graph from
+    the whole dataset at every tournament as wbw_ranking_past() does, the window keeps it up to date in place: games are
+    added when their tournament end date enters the window and removed when it leaves it. Moving the window therefore
+    costs the number of games that changed between two tournaments instead of the dataset size.
+
+    Each game keeps its index within the dataset, so that the players and their losses are given to the iterations in
+    the same order as in wbw_ranking_past() and both functions return identical rankings.
+
+    Args:
+
+    games: list of tuples (tournament end date, player1, player2, winner) in the order of the dataset
+    window_time: window time length for including completed past tournaments (timedelta object)
+
+    """
+
+    def __init__(self, games, window_time):
+        # games ordered by tournament end date, and by index within the dataset for the same end date
+        self.games = sorted(((game[0], i) + tuple(game[1:]) for i, game in enumerate(games) if game[3] is not None),
+                            key=lambda x: x[:2])
+        self.window_time = window_time
+        self.first = 0 # index of the oldest game inside the window
+        self.last = 0 # index of the first game that didn't enter the window yet
+        self.appearances = {} # dictionary where each key is a player and its value is the sorted list of his games
+        self.lost = {} # dictionary where each key is a player and its value is the sorted list of the games he lost
+
+    def move_to(self, past_period):
+        """
+        Function that moves the window so that it contains the games of the tournaments that ended in the window_time
+        before the past_period date (excluded), as wbw_ranking_past().
+
+        Args:
+
+        past_period: date of the end of the window (date object), later or equal to the previous one
+
+        """
+
+        # adding the games of tournaments that ended before past_period
+        while self.last < len(self.games) and past_period - self.games[self.last][0] > timedelta(days=0):
+            self.add(*self.games[self.last][1:])
+            self.last += 1
+
+        # removing the games of tournaments that ended more than window_time before past_period
+        while self.first < self.last and past_period - self.games[self.first][0] > self.window_time:
+            self.remove(*self.games[self.first][1:])
+            self.first += 1
+
+    def add(self, i, player1, player2, winner):
+        # appearances are stored as (game index, 0 for player1 or 1 for player2, whether the player won)
+        insort(self.appearances.setdefault(player1, []), (i, 0, winner == player1))
+        insort(self.appearances.setdefault(player2, []), (i, 1, winner == player2))
+        insort(self.lost.setdefault(player2 if winner == player1 else player1, []), (i, winner))
+
+    def remove(self, i, player1, player2, winner):
+        loser = player2 if winner == player1 else player1
+        self.lost[loser].remove((i, winner))
+        if not self.lost[loser]:
+            del self.lost[loser]
+        for player, side in ((player1, 0), (player2, 1)):
+            self.appearances[player].remove((i, side, winner == player))
+            if not self.appearances[player]: # player has no game left inside the window
+                del self.appearances[player]
+
+    @stage("graph_build", rows=graph_games)
+    def defeated_graph(self):
+        """
+        Function that returns the updated_rank and defeated_dic variables of the games inside the window, with the
+        players inserted in the same order as in wbw_ranking_past().
+        """
+
+        # players are inserted at their first game, player1 before player2 in updated_rank and the winner before the
+        # loser in defeated_dic
+        updated_rank = OrderedDict((player, 0) for player in
+                                   sorted(self.appearances, key=lambda player: self.appearances[player][0][:2]))
+        defeated_dic = {player: [item[1] for item in self.lost.get(player, [])] for player in
+                        sorted(self.appearances, key=lambda player: (self.appearances[player][0][0],
+                                                                     not self.appearances[player][0][2]))}
+        return updated_rank, defeated_dic
+
+    def games_inside(self):
+        """
+        Function that returns the (player1, player2, winner) tuples of the games inside the window, in the order of the
+        dataset. This is the only data needed to compute the ranking of the window with games_graph().
+        """
+
+        return [game[2:] for game in sorted(self.games[self.first:self.last], key=lambda game: game[1])]
+
+    def ranking(self, adjust_max=10, iteration_max=100, backend="dict", initial=None, tolerance=None, norm="l1",
+                damping=0.85):
+        """
+        Function that returns the WbW ranking of the players of the window, in the same format as wbw_ranking_past().
+        """
+
+        rank = wbw_iteration(*self.defeated_graph(), adjust_max, iteration_max, backend, initial, tolerance, norm,
+                             damping)
+        if not rank.converged: # if algorithm didn't converge after maximum number of iterations
             print("The algorithm for the WbW ranking based on the 52 weeks past tournaments couldn't converge, please modify inputted arguments.")
-            break
 
+        return positions(rank)
+
+
+def _window_games(data):
+    """
+    Auxiliary function that returns the (tournament end date, player1, player2, winner) tuples of the games of the
+    dataset, used to build a WbwWindow. Games without winner are given a None winner and never enter the window.
+    """
+
+    if isinstance(data, MatchTable):
+        names = data.players
+        return [(end, names[player1], names[player2], names[winner] if winner >= 0 else None) for
+                end, player1, player2, winner in zip(data.end.tolist(), data.player1.tolist(), data.player2.tolist(),
+                                                     data.winner.tolist())]
+    return [(match[2], match[3], match[4], match[11]) for match in data]
 
-def wbw_comparison(data, adjust_max=10, iteration_max=100, window_time=timedelta(days=364), initializing_year=2007):
+
+def _year_games(games, year):
+    """
+    Auxiliary function that returns the (player1, player2, winner) tuples of the games of tournaments that ended in the
+    given year, from the tuples returned by _window_games(). These are the games of tourn_graph(data, year).
+    """
+
+    return [game[1:] for game in games if game[0].year == year and game[3] is not None]
+
+
+def wbw_comparison(data, adjust_max=10, iteration_max=100, window_time=timedelta(days=364), initializing_year=2007,
+                   incremental=True, backend="dict", warm_start=False, tolerance=None, norm="l1", workers=None,
+                   damping=0.85):
     """
     Function that computes the WbW ranking at the start of each tournament based on the tournament that occurred in
     the past 52 weeks by default. Then returns a list of list, where the first element of the list is the calculated WbW
@@ -285,12 +390,28 @@ def wbw_comparison(data, adjust_max=10, iteration_max=100, window_time=timedelta
     or with unknown WTA ranking are not included in the list of points.
 
     Args:
-    data: list of list, where the inner list contains each game details
+    data: list of list, where the inner list contains each game details, or MatchTable
     adjust_max: sets the maximum number of allowed adjustments for convergence (type int and default value 10)
     iteration_max: sets the maximum number of allowed iterations (integer greater than 0 and default value 100). If the
     number of iterations before convergence exceeds iterations_max, the algorithm stops.
     window_time: used for establishing the WbW ranking of each player before each tournament (timedelta object)
     initializing_year: considered year for initializing first WbW ranking (type int)
+    incremental: if set to True (default value), the loss graph of the past tournaments is updated in place with a
+    WbwWindow when moving from a tournament to the next one. Otherwise, it is rebuilt from the whole dataset at each
+    tournament with wbw_ranking_past().
+    backend: "dict" (default value), "sparse" to run the WbW iterations as sparse matrix-vector products, or "solve"
+    and "krylov" to solve the exact scores, see wbw_ranking()
+    warm_start: if set to True (False as default value), the iterations of each ranking start from the scores of the
+    previous ranking instead of uniform scores. Consecutive windows mostly share the same games, so much fewer
+    iterations are needed.
+    tolerance: if given, each ranking converges when the change in scores between two iterations is lower or equal to
+    the tolerance instead of using adjust_max (None by default)
+    norm: "l1" (default value) or "linf", norm used to measure the change in scores when a tolerance is given
+    workers: number of worker processes (None by default for a single process run). The rankings of the tournaments
+    are independent of each other, so they are spread over a ProcessPoolExecutor while the next windows are built, each
+    worker receiving only the games inside the window of its tournaments. The list of points is identical to the single
+    process run. It can't be used with warm_start, where each ranking starts from the previous one.
+    damping: damping of the WbW iterations (default value 0.85), see wbw_ranking()
 
     Prerequisite:
     The dataset should be ordered by first tournament name and secondly by tournament start date.
@@ -298,93 +419,310 @@ def wbw_comparison(data, adjust_max=10, iteration_max=100, window_time=timedelta
 
     """
 
+    if workers is not None and warm_start:
+        raise ValueError("warm_start can't be used with workers, each ranking depending on the previous one.")
+
+    if isinstance(data, MatchTable):
+        return _wbw_comparison_table(data, adjust_max, iteration_max, window_time, initializing_year, incremental,
+                                     backend, warm_start, tolerance, norm, workers, damping)
+
     modif_start_date(data)  # modifying start date of special case tournament
     data.sort(key=lambda x: x[1])  # sorting the data by tournaments start date
+    games = _window_games(data)
+    window = WbwWindow(games, window_time) if incremental or workers is not None else None
 
     wta_rank = {} # dictionary of players with their associated WTA rank for each tournament
     points = [] # list of points to be returned
 
     ranking_initialized = False # variable that determines whether the first WbW ranking has been initialized
+    scores = {} # scores of the previous WbW ranking
 
     # variables detecting when moving to a new tournament
     tournament_name = None
     tournament_start_date = None
     tournament_end_date = None
 
-    # obtaining the WTA ranking for players of the same tournament
-    for i in range(len(data)):
-        if data[i][2].year > initializing_year:
-
-            # initializing variables
-            if tournament_end_date is None and tournament_name is None:
-                tournament_name = data[i][0]
-                tournament_start_date = data[i][1]
-                tournament_end_date = data[i][2]
-                wta_rank[data[i][3]] = data[i][5]
-                wta_rank[data[i][4]] = data[i][6]
-
-            # constructing wta_rank dictionary
-            elif data[i][2] == tournament_end_date and data[i][0] == tournament_name:
-                if data[i][3] not in wta_rank and data[i][4] not in wta_rank:
+    # the windows are ranked by the worker processes while the next ones are built
+    with _window_pool(workers, adjust_max, iteration_max, backend, tolerance, norm, damping) as pool:
+        # obtaining the WTA ranking for players of the same tournament
+        for i in range(len(data)):
+            if data[i][2].year > initializing_year:
+
+                # initializing variables
+                if tournament_end_date is None and tournament_name is None:
+                    tournament_name = data[i][0]
+                    tournament_start_date = data[i][1]
+                    tournament_end_date = data[i][2]
                     wta_rank[data[i][3]] = data[i][5]
                     wta_rank[data[i][4]] = data[i][6]
 
-                elif data[i][3] in wta_rank and data[i][4] not in wta_rank:
-                    wta_rank[data[i][4]] = data[i][6]
-
-                elif data[i][3] not in wta_rank and data[i][4] in wta_rank:
-                    wta_rank[data[i][3]] = data[i][5]
+                # constructing wta_rank dictionary
+                elif data[i][2] == tournament_end_date and data[i][0] == tournament_name:
+                    if data[i][3] not in wta_rank and data[i][4] not in wta_rank:
+                        wta_rank[data[i][3]] = data[i][5]
+                        wta_rank[data[i][4]] = data[i][6]
+
+                    elif data[i][3] in wta_rank and data[i][4] not in wta_rank:
+                        wta_rank[data[i][4]] = data[i][6]
+
+                    elif data[i][3] not in wta_rank and data[i][4] in wta_rank:
+                        wta_rank[data[i][3]] = data[i][5]
+
+                # moved to a new tournament
+                elif data[i][0] != tournament_name or (data[i][0] == tournament_name and
+                                                       data[i][2] != tournament_end_date):
+
+                    # the ranking is computed later by a worker process, from the games inside the window only
+                    if workers is not None:
+                        if not ranking_initialized:
+                            ranking_initialized = True
+                            pool.add(_year_games(games, initializing_year), wta_rank)
+                        else:
+                            window.move_to(tournament_start_date)
+                            pool.add(window.games_inside(), wta_rank)
+
+                    else:
+                        # initializing first WbW ranking only once
+                        if not ranking_initialized:
+                            ranking_initialized = True
+                            graph = tourn_graph(data, initializing_year)
+
+                        # WbW ranking based on completed tournament occurred before tournament start date
+                        elif incremental:
+                            window.move_to(tournament_start_date)
+                            graph = window.defeated_graph()
+                        else:
+                            graph = past_graph(data, tournament_start_date, window_time)
+
+                        scores = _comparison_scores(graph, adjust_max, iteration_max, backend,
+                                                    scores if warm_start else None, tolerance, norm, damping)
+                        _append_points(points, scores, wta_rank)
+
+                    # updating variables for next tournament
+                    wta_rank = {data[i][3]: data[i][5], data[i][4]: data[i][6]}
+                    tournament_name = data[i][0]
+                    tournament_start_date = data[i][1]
+                    tournament_end_date = data[i][2]
+
+    if workers is not None:
+        return pool.points
+    return points
 
-            # moved to a new tournament
-            elif data[i][0] != tournament_name or (data[i][0] == tournament_name and data[i][2] != tournament_end_date):
 
-                # initializing first WbW ranking only once
-                if not ranking_initialized:
-                    ranking_initialized = True
-                    wbw_rank = wbw_ranking_tourn(data, initializing_year, adjust_max, iteration_max)
+def _comparison_scores(graph, adjust_max, iteration_max, backend, initial, tolerance, norm, damping):
+    """
+    Auxiliary function that returns the OrderedDict of the players of the given (updated_rank, defeated_dic) graph with
+    their WbW score, ordered from the highest score to the lowest score.
+    """
 
-                    # appending points list
-                    for item in wbw_rank:
-                        if item[0] in wta_rank and wta_rank[item[0]]: # removing missing values
-                            points.append([float(wta_rank[item[0]]), item[1]]) # converts WTA rank to float
+    rank = wbw_iteration(*graph, adjust_max, iteration_max, backend, initial, tolerance, norm, damping)
+    if not rank.converged: # if algorithm didn't converge after maximum number of iterations
+        print("The WbW ranking algorithm couldn't converge, please modify inputted arguments.")
+    return OrderedDict(rank)
 
-                else:
-                    # WbW ranking based on completed tournament occurred before tournament start date
-                    wbw_rank = wbw_ranking_past(data, tournament_start_date, window_time, adjust_max, iteration_max)
 
-                    # appending points list
-                    for item in wbw_rank:
-                        if item[0] in wta_rank and wta_rank[item[0]]: # removing missing values
-                            points.append([float(wta_rank[item[0]]), item[1]]) # converts WTA rank to float
+def _append_points(points, scores, wta_rank):
+    """
+    Auxiliary function that appends to points the WTA rank and WbW position of the ranked players whose WTA rank is
+    known, joined with Ranking.join().
+    """
 
-                # updating variables for next tournament
-                wta_rank = {data[i][3]: data[i][5], data[i][4]: data[i][6]}
-                tournament_name = data[i][0]
-                tournament_start_date = data[i][1]
-                tournament_end_date = data[i][2]
+    joined = Ranking.from_list(list(scores.items())).join(wta_rank) # missing WTA ranks are removed
+    points.extend([wta, int(position)] for wta, position in joined.tolist())
 
-    return points
 
+def _slice_rankings(windows, adjust_max, iteration_max, backend, tolerance, norm, damping):
+    """
+    Auxiliary function run by the worker processes of wbw_comparison(), returning the list of the WbwResult of the given
+    window games.
+    """
 
+    return [wbw_iteration(*games_graph(games), adjust_max, iteration_max, backend, None, tolerance, norm, damping)
+            for games in windows]
 
 
+def _window_pool(workers, adjust_max, iteration_max, backend, tolerance, norm, damping):
+    """
+    Auxiliary function that returns the context of the _WindowPool of wbw_comparison(), or an empty context for a
+    single process run.
+    """
 
+    if workers is None:
+        return nullcontext()
+    return _WindowPool(workers, adjust_max, iteration_max, backend, tolerance, norm, damping)
 
 
+class _WindowPool:
+    """
+    Auxiliary class of wbw_comparison() that ranks the windows given to add() over a ProcessPoolExecutor while the next
+    windows are being built. The windows are sent by chunks of chunksize windows, with at most two chunks per worker
+    waiting or running, so that the parent process only holds the games of a few windows at a time. The points are
+    collected in the order of the windows, so the list of points is identical to the single process run.
+    """
 
+    chunksize = 16
+
+    def __init__(self, workers, adjust_max, iteration_max, backend, tolerance, norm, damping):
+        self.ranking = partial(_slice_rankings, adjust_max=adjust_max, iteration_max=iteration_max, backend=backend,
+                               tolerance=tolerance, norm=norm, damping=damping)
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.in_flight = 2 * workers # maximal number of chunks sent and not collected
+        self.windows = [] # games of the windows of the next chunk
+        self.ranks = [] # WTA ranks of the windows of the next chunk
+        self.pending = deque() # (future, WTA ranks) of the chunks sent
+        self.points = [] # list of points collected
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, error, *args):
+        try:
+            if error is None: # the remaining chunks are sent and collected
+                self._send()
+                while self.pending:
+                    self._collect()
+        finally:
+            self.executor.shutdown(cancel_futures=error is not None)
+
+    def add(self, games, wta_rank):
+        """
+        Method that adds the window of the given (player1, player2, winner) games to be ranked, with the WTA ranks of
+        the players of its tournament.
+        """
+
+        self.windows.append(games)
+        self.ranks.append(wta_rank)
+        if len(self.windows) == self.chunksize:
+            self._send()
+
+    def _send(self):
+        if self.windows:
+            self.pending.append((self.executor.submit(self.ranking, self.windows), self.ranks))
+            self.windows = []
+            self.ranks = []
+        while len(self.pending) > self.in_flight:
+            self._collect()
+
+    def _collect(self):
+        future, ranks = self.pending.popleft()
+        for rank, wta_rank in zip(future.result(), ranks):
+            if not rank.converged: # if algorithm didn't converge after maximum number of iterations
+                print("The WbW ranking algorithm couldn't converge, please modify inputted arguments.")
+            _append_points(self.points, OrderedDict(rank), wta_rank)
+
+
+def positions(rank):
+    """
+    Function that converts a ranking ordered from the highest score to the lowest score into a list of list where the
+    inner list first element consists of the player name and the second element is the player's position within the
+    ranking. The iterations, residual and convergence of a WbwResult are kept.
+    """
 
+    final_rank = []
+    position = 0 # rank counter
+    for item in rank:
+        position += 1
+        final_rank.append([item[0], position])
 
+    if isinstance(rank, WbwResult):
+        return WbwResult(final_rank, rank.iterations, rank.residual, rank.converged)
+    return final_rank
 
 
+def _runs(*columns):
+    """
+    Auxiliary function that returns the start and stop indexes of the runs of consecutive games sharing the same values
+    for all the given columns.
+    """
 
+    change = np.zeros(len(columns[0]), dtype=bool)
+    change[:1] = True
+    for column in columns:
+        change[1:] |= column[1:] != column[:-1]
+    starts = np.flatnonzero(change)
+    return starts, np.append(starts[1:], len(columns[0]))
 
 
+def _modif_start_date_table(table):
+    """
+    MatchTable version of modif_start_date(). Games sharing the same tournament and start date always follow the same
+    branch of the list version, so the dates are harmonized run by run instead of game by game.
+    """
 
+    tourn = None
+    tourn_start_date = None
+    start = table.start.copy() # start dates before modification
+    table.clear_indexes()
 
+    for a, b in zip(*_runs(table.tournament, start)):
+        if tourn is None or table.tournament[a] != tourn:
+            tourn = table.tournament[a]
+            tourn_start_date = start[a]
+        elif abs((start[a] - tourn_start_date).astype(int)) > 30:
+            tourn_start_date = start[a]
+        else: # same tournament starting at most 30 days later
+            table.start[a:b] = tourn_start_date
 
 
+def _first_ranks(table, rows):
+    """
+    Auxiliary function that returns the dictionary of the players of the given games with the WTA rank of their first
+    game. Players whose first WTA rank is missing are left out.
+    """
 
+    players = np.column_stack((table.player1[rows], table.player2[rows])).ravel()
+    ranks = np.column_stack((table.rank1[rows], table.rank2[rows])).ravel()
+    players, first_index = np.unique(players, return_index=True)
+    return {table.players[player]: float(rank) for player, rank in zip(players, ranks[first_index]) if
+            not np.isnan(rank)}
 
 
+def _wbw_comparison_table(table, adjust_max, iteration_max, window_time, initializing_year, incremental, backend,
+                          warm_start, tolerance, norm, workers, damping):
+    """
+    MatchTable version of wbw_comparison(). The tournaments are found as runs of games sharing the same tournament and
+    end date, and the WTA ranks of each tournament are read with vectorized operations.
+    """
 
+    modif_start_date(table)  # modifying start date of special case tournament
+    table.sort("start")  # sorting the data by tournaments start date
+    games = _window_games(table)
+    window = WbwWindow(games, window_time) if incremental or workers is not None else None
 
+    points = [] # list of points to be returned
+    scores = {} # scores of the previous WbW ranking
+    rows = np.flatnonzero(table.years("end") > initializing_year)
+    starts, stops = _runs(table.tournament[rows], table.end[rows])
+
+    # the last tournament is never compared, as in the list version
+    with _window_pool(workers, adjust_max, iteration_max, backend, tolerance, norm, damping) as pool:
+        for k in range(len(starts) - 1):
+            tournament_rows = rows[starts[k]:stops[k]]
+            wta_rank = _first_ranks(table, tournament_rows)
+
+            # the ranking is computed later by a worker process, from the games inside the window only
+            if workers is not None:
+                if k == 0:
+                    pool.add(_year_games(games, initializing_year), wta_rank)
+                else:
+                    window.move_to(table.start[tournament_rows[0]].item())
+                    pool.add(window.games_inside(), wta_rank)
+                continue
+
+            if k == 0: # initializing first WbW ranking only once
+                graph = tourn_graph(table, initializing_year)
+
+            # WbW ranking based on completed tournament occurred before tournament start date
+            elif incremental:
+                window.move_to(table.start[tournament_rows[0]].item())
+                graph = window.defeated_graph()
+            else:
+                graph = past_graph(table, table.start[tournament_rows[0]].item(), window_time)
+
+            scores = _comparison_scores(graph, adjust_max, iteration_max, backend, scores if warm_start else None,
+                                        tolerance, norm, damping)
+            _append_points(points, scores, wta_rank)
+
+    if workers is not None:
+        return pool.points
+    return points
@@ -1,12 +1,21 @@
 from collections import OrderedDict
 
+import numpy as np
+
+from .match_table import MatchTable
+from . import profiling
+from .profiling import graph_games, stage
+from .ranking import Ranking
+from .wbw_sparse import WbwSolver, component_iteration, linear_iteration, sparse_iteration, sparse_sweep
+
 # I used the OrderedDict data type to avoid the repetitive conversion of rank and updated_rank variables
 # to an ordered list. Indeed, the algorithm only relies on two variables instead of four, for each iteration.
 # After having taken the mean running time for 1000 calls of the function without OrderedDict and with OrderedDict,
 # I found that the function using OrderedDict is slightly slower (~0.01 second), but I believe that the function with
 # OrederedDict has a better space-complexity.
 
-def wbw_ranking(data, period, adjust_max=10, iteration_max =500,printer=False):
+def wbw_ranking(data, period, adjust_max=10, iteration_max =500,printer=False, backend="dict", initial=None,
+                tolerance=None, norm="l1", damping=0.85):
     """
     Function that returns the ranking for the given period based on the "Winners beat other Winners" technique. The
     ranking is an ordered list of list where the first element of the inner list is the player name and the second
@@ -14,12 +23,32 @@ def wbw_ranking(data, period, adjust_max=10, iteration_max =500,printer=False):
 
     Args:
 
-    data: list of list, where the inner list contains each game details
+    data: list of list, where the inner list contains each game details, or MatchTable
     period: considered period for the ranking of type int or list
     adjust_max: sets the maximum number of allowed adjustments for convergence (type int and default value 10)
     iteration_max: sets the maximum number of allowed iterations (integer greater than 0 and default value 500). If the
     number of iterations before convergence exceeds iterations_max, the algorithm stops.
     printer: if set to True (False as default value), the function prints the top three players for the given period.
+    backend: "dict" (default value) to run the iterations over the dictionaries, or "sparse" to run them as sparse
+    matrix-vector products (faster for periods with many players, same scores up to floating point rounding). "solve"
+    or "krylov" give instead the exact scores the iterations converge to, by solving the linear system of the scores
+    with a sparse LU decomposition or with a Krylov solver (see linear_iteration()). adjust_max isn't used by these
+    backends and the tolerance of "krylov" is the relative residual of the linear system. "components" runs the
+    iterations one strongly connected component of the loss graph after the other, in topological order, until the
+    scores change by at most the tolerance (by default, the change the global iterations are sure to reach within
+    iteration_max iterations, see component_iteration()). It only needs fewer iterations on loss graphs with many small
+    components, the periods of the bundled data being dominated by one large component.
+    initial: dictionary where each key is a player and its value is his initial score, e.g. the scores of a previous
+    ranking. Players missing from it start with the uniform score and players that didn't play in the period are
+    ignored. By default, all players start with the uniform score.
+    tolerance: if given, the algorithm converges when the change in scores between two iterations is lower or equal to
+    the tolerance instead of using adjust_max (None by default)
+    norm: "l1" (default value) or "linf", norm used to measure the change in scores when a tolerance is given
+    damping: share of his score that each player gives to the players he lost against at each iteration, the rest
+    being spread equally among all the players (default value 0.85)
+
+    The returned ranking is a WbwResult, which also gives the number of iterations, the final residual and whether the
+    algorithm converged.
 
     Prerequisite:
     The dataset should be ordered by first tournament name and secondly by tournament start date.
@@ -30,58 +59,211 @@ def wbw_ranking(data, period, adjust_max=10, iteration_max =500,printer=False):
     if type(period) == int: # if given period is a single year of type int
         period = [period]
 
-    updated_rank = OrderedDict() # OrderedDict where key is a player with its associated score
-    defeated_dic = {} # dictionary where each key is a player and its value is the list of players against whom he lost
-
-    # building updated_rank and defeated_dic variables
-    for i in range(len(data)):
-        if data[i][1].year in period: # focusing on games played in the given year
-            if data[i][3] not in updated_rank and data[i][4] not in updated_rank:
-                updated_rank[data[i][3]] = 0
-                updated_rank[data[i][4]] = 0
-                if data[i][3] == data[i][11]:
-                    defeated_dic[data[i][3]] = []
-                    defeated_dic[data[i][4]] = [data[i][3]]
-                elif data[i][4] == data[i][11]:
-                    defeated_dic[data[i][4]] = []
-                    defeated_dic[data[i][3]] = [data[i][4]]
-
-            elif data[i][3] in updated_rank and data[i][4] not in updated_rank:
-                updated_rank[data[i][4]] = 0
-                if data[i][3] == data[i][11]:
-                    defeated_dic[data[i][4]] = [data[i][3]]
-                elif data[i][4] == data[i][11]:
-                    defeated_dic[data[i][4]] = []
-                    defeated_dic[data[i][3]].append(data[i][4])
-
-            elif data[i][3] not in updated_rank and data[i][4] in updated_rank:
-                updated_rank[data[i][3]] = 0
-                if data[i][3] == data[i][11]:
-                    defeated_dic[data[i][3]] = []
-                    defeated_dic[data[i][4]].append(data[i][3])
-
-                elif data[i][4] == data[i][11]:
-                    defeated_dic[data[i][3]] = [data[i][4]]
-
-            elif data[i][3] in updated_rank and data[i][4] in updated_rank:
-                if data[i][3] == data[i][11]:
-                    defeated_dic[data[i][4]].append(data[i][3])
-
-                elif data[i][4] == data[i][11]:
-                    defeated_dic[data[i][3]].append(data[i][4])
-
-    total_players = len(updated_rank) # number of unique players
-    rank = OrderedDict((key, 1/total_players) for key in updated_rank) # initializing scores of each player
+    updated_rank, defeated_dic = period_graph(data, period)
 
     if adjust_max is None:
         adjust_max = 15
 
+    rank = wbw_iteration(updated_rank, defeated_dic, adjust_max, iteration_max, backend, initial, tolerance, norm,
+                         damping)
+    if not rank.converged: # if algorithm didn't converge after maximum number of iterations
+        print("The algorithm couldn't converge, please modify inputted arguments.")
+
+    if printer:
+        Ranking.from_list(rank).print_top_three()
+    return rank
+
+
+def wbw_sweep(data, period, dampings=(0.85,), teleports=None, adjust_max=10, iteration_max=500, initial=None,
+              tolerance=None, norm="l1", backend="sparse"):
+    """
+    Function that returns the WbW rankings of the given period for several damping values and teleport vectors,
+    computed together by sparse_sweep(): a sweep over the parameters costs about as much as a single ranking. The
+    function returns the list of the WbwResult of each pair (damping, teleport vector), ordered by damping value first
+    and then by teleport vector. Each ranking is identical to the one of wbw_ranking() with backend="sparse" and the same
+    damping, for the uniform teleport vector.
+
+    Args:
+
+    data: list of list, where the inner list contains each game details, or MatchTable
+    period: considered period for the ranking of type int or list
+    dampings: list of damping values (default value (0.85,)), see wbw_ranking()
+    teleports: list of dictionaries where each key is a player and its value is his weight in the share of the scores
+    spread among all the players. Players missing from a dictionary have a null weight and the weights are normalized.
+    None for the uniform vector (by default, only the uniform vector).
+    adjust_max: sets the maximum number of allowed adjustments for convergence (type int and default value 10)
+    iteration_max: sets the maximum number of allowed iterations (integer greater than 0 and default value 500)
+    initial: dictionary where each key is a player and its value is his initial score, shared by all the rankings
+    (uniform scores by default)
+    tolerance: if given, the rankings converge when the change in scores between two iterations is lower or equal to
+    the tolerance instead of using adjust_max (None by default)
+    norm: "l1" (default value) or "linf", norm used to measure the change in scores when a tolerance is given
+    backend: "sparse" (default value) to run the iterations of all the rankings together, or "solve" to give their
+    exact scores with a WbwSolver for each damping value, whose factorization is shared by all the teleport vectors
+    (adjust_max, iteration_max, initial and tolerance are then ignored)
+
+    Prerequisite:
+    The dataset should be ordered by first tournament name and secondly by tournament start date.
+    correct_error() and winner() should be run on the dataset before running the function.
+
+    """
+
+    if backend not in ("sparse", "solve"):
+        raise ValueError("Unknown WbW backend: " + str(backend))
+    if norm not in ("l1", "linf"):
+        raise ValueError("Unknown norm: " + str(norm))
+    if any(not 0 <= damping <= 1 for damping in dampings):
+        raise ValueError("The damping should be between 0 and 1.")
+
+    if type(period) == int: # if given period is a single year of type int
+        period = [period]
+
+    updated_rank, defeated_dic = period_graph(data, period)
+
+    if teleports is not None: # converting the weights into vectors in the order of updated_rank
+        vectors = []
+        for teleport in teleports:
+            if teleport is None:
+                vectors.append(None)
+                continue
+            weights = np.array([float(teleport.get(player, 0)) for player in updated_rank])
+            if weights.sum() <= 0:
+                raise ValueError("A teleport vector should give a positive weight to a player of the period.")
+            vectors.append(weights / weights.sum())
+        teleports = vectors
+
+    if backend == "solve": # the system of each damping value is factorized once for all the teleport vectors
+        runs = []
+        for damping in dampings:
+            solver = WbwSolver(updated_rank, defeated_dic, damping)
+            runs += [solver.result(solver.scores(teleport), 0, True, teleport, norm) for teleport in teleports or [None]]
+    else:
+        runs = sparse_sweep(updated_rank, defeated_dic, dampings, teleports, adjust_max, iteration_max,
+                            list(initial_scores(updated_rank, initial).values()), tolerance, norm)
+    ranks = [WbwResult(*run) for run in runs]
+    if not all(rank.converged for rank in ranks): # if algorithm didn't converge after maximum number of iterations
+        print("The algorithm couldn't converge, please modify inputted arguments.")
+    return ranks
+
+
+@stage("graph_build", rows=graph_games)
+def period_graph(data, period):
+    """
+    Auxiliary function that returns the updated_rank and defeated_dic variables of wbw_ranking(), built from the games
+    played in the given period.
+
+    Args:
+
+    data: list of list, where the inner list contains each game details, or MatchTable
+    period: considered period for the ranking of type list
+
+    """
+
+    if isinstance(data, MatchTable): # vectorized selection of the games played in the given period
+        updated_rank, defeated_dic = defeated_graph(data, data.rows_in_years(period))
+    else:
+        updated_rank = OrderedDict() # OrderedDict where key is a player with its associated score
+        defeated_dic = {} # dictionary where each key is a player and its value is the list of players against whom he lost
+
+        # building updated_rank and defeated_dic variables
+        for i in range(len(data)):
+            if data[i][1].year in period: # focusing on games played in the given year
+                if data[i][3] not in updated_rank and data[i][4] not in updated_rank:
+                    updated_rank[data[i][3]] = 0
+                    updated_rank[data[i][4]] = 0
+                    if data[i][3] == data[i][11]:
+                        defeated_dic[data[i][3]] = []
+                        defeated_dic[data[i][4]] = [data[i][3]]
+                    elif data[i][4] == data[i][11]:
+                        defeated_dic[data[i][4]] = []
+                        defeated_dic[data[i][3]] = [data[i][4]]
+
+                elif data[i][3] in updated_rank and data[i][4] not in updated_rank:
+                    updated_rank[data[i][4]] = 0
+                    if data[i][3] == data[i][11]:
+                        defeated_dic[data[i][4]] = [data[i][3]]
+                    elif data[i][4] == data[i][11]:
+                        defeated_dic[data[i][4]] = []
+                        defeated_dic[data[i][3]].append(data[i][4])
+
+                elif data[i][3] not in updated_rank and data[i][4] in updated_rank:
+                    updated_rank[data[i][3]] = 0
+                    if data[i][3] == data[i][11]:
+                        defeated_dic[data[i][3]] = []
+                        defeated_dic[data[i][4]].append(data[i][3])
+
+                    elif data[i][4] == data[i][11]:
+                        defeated_dic[data[i][3]] = [data[i][4]]
+
+                elif data[i][3] in updated_rank and data[i][4] in updated_rank:
+                    if data[i][3] == data[i][11]:
+                        defeated_dic[data[i][4]].append(data[i][3])
+
+                    elif data[i][4] == data[i][11]:
+                        defeated_dic[data[i][3]].append(data[i][4])
+
+    return updated_rank, defeated_dic
+
+
+@stage("power_iteration")
+def wbw_iteration(updated_rank, defeated_dic, adjust_max=10, iteration_max=500, backend="dict", initial=None,
+                  tolerance=None, norm="l1", damping=0.85):
+    """
+    Function that runs the WbW iterations over the given loss graph. Each player shares his score equally among the
+    players he lost against, and the scores are rescaled until the algorithm converges. By default, the algorithm
+    converges when the number of adjustments in the ranking is lower or equal to adjust_max, which requires sorting the
+    players at every iteration. If a tolerance is given, it converges instead when the change in scores between two
+    iterations is lower or equal to the tolerance, and the players are only sorted once at the end.
+
+    The function returns a WbwResult: the list of tuples where the first element is the player name and the second
+    element is his associated score, ordered from the highest score to the lowest score, together with the number of
+    iterations, the final residual and whether the algorithm converged before iteration_max iterations.
+
+    Args:
+
+    updated_rank: OrderedDict where each key is a player (the values are ignored)
+    defeated_dic: dictionary where each key is a player and its value is the list of players against whom he lost
+    adjust_max: sets the maximum number of allowed adjustments for convergence (type int and default value 10)
+    iteration_max: sets the maximum number of allowed iterations (default value 500, 0 for no limit)
+    backend: "dict" (default value), "sparse" to use sparse_iteration(), "solve" and "krylov" to use
+    linear_iteration() with the direct and Krylov solvers, or "components" to use component_iteration()
+    initial: dictionary where each key is a player and its value is his initial score (uniform scores by default)
+    tolerance: maximum change in scores for convergence (None by default to use adjust_max)
+    norm: norm used to measure the change in scores, "l1" (default value) for the sum of the absolute changes or
+    "linf" for the largest absolute change
+    damping: share of his score that each player gives to the players he lost against, the scores being rescaled as
+    score * damping + (1 - damping) / players (default value 0.85)
+
+    """
+
+    if norm not in ("l1", "linf"):
+        raise ValueError("Unknown norm: " + str(norm))
+    if not 0 <= damping <= 1:
+        raise ValueError("The damping should be between 0 and 1.")
+
+    rank = initial_scores(updated_rank, initial) # initializing scores of each player
+
+    if backend == "sparse":
+        return WbwResult(*sparse_iteration(updated_rank, defeated_dic, adjust_max, iteration_max, list(rank.values()),
+                                           tolerance, norm, damping))
+    elif backend == "components":
+        return WbwResult(*component_iteration(updated_rank, defeated_dic, iteration_max, list(rank.values()), tolerance,
+                                              norm, damping))
+    elif backend in ("solve", "krylov"):
+        return WbwResult(*linear_iteration(updated_rank, defeated_dic, "direct" if backend == "solve" else "krylov",
+                                           iteration_max, list(rank.values()), tolerance, norm, damping))
+    elif backend != "dict":
+        raise ValueError("Unknown WbW backend: " + str(backend))
+
+    updated_rank = OrderedDict((key, 0) for key in updated_rank)
+    total_players = len(updated_rank) # number of unique players
+    tracing = profiling.enabled() # whether each iteration is reported to the profilers
+
     iteration = 0 # iteration counter
-    adjust_count = adjust_max + 1 # counts the number of adjustments made before next iteration
 
-    while adjust_count > adjust_max: # while loop that stops when adjustment made is lower or equal to adjust max
+    while True:
         # updating variables
-        adjust_count = 0
+        adjust_count = 0 # counts the number of adjustments made before next iteration
         iteration += 1
 
         # Distributing shares among players
@@ -98,31 +280,134 @@ def wbw_ranking(data, period, adjust_max=10, iteration_max =500,printer=False):
 
         # Rescaling scores
         for item in updated_rank:
-            updated_rank[item] = updated_rank[item]*0.85 + 0.15/total_players
+            updated_rank[item] = updated_rank[item]*damping + (1 - damping)/total_players
+
+        # Change in scores between the iterations
+        if norm == "l1":
+            residual = sum(abs(updated_rank[item] - rank[item]) for item in updated_rank)
+        else:
+            residual = max(abs(updated_rank[item] - rank[item]) for item in updated_rank)
 
-        # Ordering the OrderedDict according to each player's score
-        updated_rank = OrderedDict(sorted(updated_rank.items(), key=lambda item: -item[1]))
-        rank = OrderedDict(sorted(rank.items(), key=lambda item: -item[1]))
+        if tolerance is None:
+            # Ordering the OrderedDict according to each player's score
+            updated_rank = OrderedDict(sorted(updated_rank.items(), key=lambda item: -item[1]))
+            rank = OrderedDict(sorted(rank.items(), key=lambda item: -item[1]))
 
-        # Obtaining the number of adjustments made between the iterations
-        for u, j in zip(rank.items(), updated_rank.items()): # iterating over dictionary elements
-            if u[0] != j[0]:
-                adjust_count += 1
+            # Obtaining the number of adjustments made between the iterations
+            for u, j in zip(rank.items(), updated_rank.items()): # iterating over dictionary elements
+                if u[0] != j[0]:
+                    adjust_count += 1
+            converged = adjust_count <= adjust_max
+        else:
+            converged = residual <= tolerance
+
+        if tracing:
+            profiling.trace("power_iteration", "dict", iteration, adjust_count if tolerance is None else None, residual)
+
+        # if algorithm converged or didn't converge after maximum number of iterations, returns list
+        if converged or iteration == iteration_max:
+            return WbwResult(sorted(updated_rank.items(), key=lambda item: -item[1]), iteration, residual, converged)
 
         # Updating the dictionaries for the next iteration
-        if adjust_count > adjust_max:
-            rank = updated_rank
-            updated_rank = OrderedDict((key, 0) for key in rank)
-
-        elif adjust_count <= adjust_max: # if algorithm converged returns list
-            updated_rank = list(updated_rank.items())
-            if printer:
-                print("\nThe top three players for the given period are:")
-                for i in range(3):
-                    print("Player: ", updated_rank[i][0], " Score: ", updated_rank[i][1])
-            return updated_rank
-
-        if iteration == iteration_max: # if algorithm didn't converge after maximum number of iterations
-            print("The algorithm couldn't converge, please modify inputted arguments.")
-            break
+        rank = updated_rank
+        updated_rank = OrderedDict((key, 0) for key in rank)
+
+
+class WbwResult(list):
+    """
+    Result of the WbW rankings. It is the usual ranking list, ordered from the highest score to the lowest score, with
+    the following attributes:
+
+    iterations: number of iterations run
+    residual: change in scores during the last iteration
+    converged: False if the algorithm stopped after iteration_max iterations without converging
+
+    """
+
+    def __init__(self, rank, iterations, residual, converged):
+        super().__init__(rank)
+        self.iterations = iterations
+        self.residual = residual
+        self.converged = converged
+
+
+def initial_scores(updated_rank, initial=None):
+    """
+    Function that returns the OrderedDict of the initial score of each player of updated_rank. Without initial scores,
+    each player starts with 1/total_players. Otherwise, players found in initial keep their score, new players start
+    with 1/total_players, players of initial that are not in updated_rank are removed, and the scores are rescaled so
+    that they sum to 1 as the uniform scores.
+
+    Args:
+
+    updated_rank: OrderedDict where each key is a player
+    initial: dictionary where each key is a player and its value is his initial score (None by default)
+
+    """
+
+    total_players = len(updated_rank) # number of unique players
+    if not initial:
+        return OrderedDict((key, 1/total_players) for key in updated_rank)
+
+    rank = OrderedDict((key, initial.get(key, 1/total_players)) for key in updated_rank)
+    total_score = sum(rank.values())
+    return OrderedDict((key, score / total_score) for key, score in rank.items())
+
+
+@stage("graph_build", rows=graph_games)
+def defeated_graph(table, rows):
+    """
+    Function that builds the updated_rank and defeated_dic variables of the WbW rankings from the given games of a
+    MatchTable. Players are inserted in both dictionaries in the same order as in the list
+    version, so the rankings obtained from a MatchTable and from the list of list are identical.
+
+    Args:
+
+    table: MatchTable
+    rows: indexes of the considered games in the order of the table (or boolean mask)
+
+    """
+
+    if rows.dtype == bool:
+        rows = np.flatnonzero(rows)
+    rows = rows[table.winner[rows] >= 0]
+    updated_rank, defeated_dic = games_graph(zip(table.player1[rows].tolist(), table.player2[rows].tolist(),
+                                                 table.winner[rows].tolist()))
+
+    # converting player ids to player names
+    names = table.players
+    updated_rank = OrderedDict((names[player], 0) for player in updated_rank)
+    defeated_dic = {names[player]: [names[item] for item in lost_against] for player, lost_against in
+                    defeated_dic.items()}
+    return updated_rank, defeated_dic
+
+
+@stage("graph_build", rows=graph_games)
+def games_graph(games):
+    """
+    Function that builds the updated_rank and defeated_dic variables of the WbW rankings from a sequence of games, with
+    the players inserted in the same order as in the list version.
+
+    Args:
+
+    games: iterable of tuples (player1, player2, winner) in the order of the dataset, where every game has a winner
+
+    """
+
+    updated_rank = OrderedDict() # OrderedDict where key is a player with its associated score
+    defeated_dic = {} # dictionary where each key is a player and its value is the list of players he lost against
+
+    for player1, player2, winner in games:
+        loser = player2 if winner == player1 else player1
+        if player1 not in updated_rank:
+            updated_rank[player1] = 0
+        if player2 not in updated_rank:
+            updated_rank[player2] = 0
+        if winner not in defeated_dic:
+            defeated_dic[winner] = []
+        if loser not in defeated_dic:
+            defeated_dic[loser] = [winner]
+        else:
+            defeated_dic[loser].append(winner)
 
+    return updated_rank, defeated_dic
@@ -0,0 +1,487 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import bicgstab, splu
+
+from . import profiling
+
+# Sparse backend of the WbW iterations. Instead of walking the lists of defeated_dic in nested Python loops, the loss
+# graph is converted once into a CSR transition matrix, so that each iteration is a single sparse matrix-vector
+# product. The matrix follows exactly the updates of the dictionary version, so both backends give the same scores up
+# to floating point rounding.
+#
+# The scores the iterations converge to are the solution of the linear system (I - damping * M) x = (1 - damping) / n,
+# which the "solve" and "krylov" backends solve directly instead of iterating until the positions stop moving. The
+# "components" backend splits this system along the strongly connected components of the loss graph: a component only
+# receives shares from the components before it in topological order, so the components are solved one level after
+# the other, each from the final scores of the previous levels.
+
+
+def transition_matrix(updated_rank, defeated_dic):
+    """
+    Function that returns the CSR transition matrix M of the given loss graph, so that the shares received by the
+    players during an iteration are M @ rank. Column j of M spreads the score of player j equally among the players he
+    lost against. A player who never lost keeps his own score (M[j, j] = 1).
+
+    As in the dictionary version, where the score of a player who never lost is overwritten when he is reached in
+    defeated_dic, such a player only receives the shares of the players that come after him in defeated_dic.
+
+    Args:
+
+    updated_rank: OrderedDict where each key is a player, giving the position of each player in the score vector
+    defeated_dic: dictionary where each key is a player and its value is the list of players against whom he lost
+
+    """
+
+    index = {player: k for k, player in enumerate(updated_rank)} # position of each player in the score vector
+    order = {player: k for k, player in enumerate(defeated_dic)} # order in which players are reached in defeated_dic
+
+    rows, columns, values = [], [], []
+    for player, lost_against in defeated_dic.items():
+        loss_count = len(lost_against) # number of players he lost against
+
+        if loss_count > 0:
+            for item in lost_against:
+                # shares given to a player who never lost before he is reached are overwritten
+                if defeated_dic[item] or order[item] < order[player]:
+                    rows.append(index[item])
+                    columns.append(index[player])
+                    values.append(1 / loss_count)
+
+        elif loss_count == 0: # case if player never lost
+            rows.append(index[player])
+            columns.append(index[player])
+            values.append(1.0)
+
+    n = len(index)
+    return sparse.csr_matrix((values, (rows, columns)), shape=(n, n)) # duplicated losses are summed
+
+
+def sparse_iteration(updated_rank, defeated_dic, adjust_max=10, iteration_max=500, initial=None, tolerance=None,
+                     norm="l1", damping=0.85):
+    """
+    Sparse version of wbw_iteration(). The number of adjustments between two iterations is computed on the stable
+    ordering of the scores, as with the sorted OrderedDict of the dictionary version, so both backends stop at the same
+    iteration. If a tolerance is given, the players are only sorted once the change in scores is lower or equal to it.
+    Returns the list of tuples (player, score) ordered from the highest score to the lowest score, the number of
+    iterations, the final residual and whether the algorithm converged.
+
+    Args:
+
+    updated_rank: OrderedDict where each key is a player (the values are ignored)
+    defeated_dic: dictionary where each key is a player and its value is the list of players against whom he lost
+    adjust_max: sets the maximum number of allowed adjustments for convergence (type int and default value 10)
+    iteration_max: sets the maximum number of allowed iterations (default value 500, 0 for no limit)
+    initial: initial score of each player, in the order of updated_rank (uniform scores by default)
+    tolerance: maximum change in scores for convergence (None by default to use adjust_max)
+    norm: "l1" (default value) or "linf", norm used to measure the change in scores
+    damping: share of his score that each player gives to the players he lost against (default value 0.85)
+
+    """
+
+    players = list(updated_rank)
+    total_players = len(players) # number of unique players
+    matrix = transition_matrix(updated_rank, defeated_dic)
+
+    # initializing scores of each player
+    rank = np.full(total_players, 1 / total_players) if initial is None else np.asarray(initial, dtype=np.float64)
+    order = np.argsort(-rank, kind="stable") # players ordered by score, ties kept in their previous order
+    tie_order = np.arange(total_players) # order of the players before sorting the new scores
+    tracing = profiling.enabled() # whether each iteration is reported to the profilers
+
+    iteration = 0 # iteration counter
+    while True:
+        iteration += 1
+        updated_rank = matrix @ rank * damping + (1 - damping) / total_players
+
+        # change in scores between the iterations
+        change = np.abs(updated_rank - rank)
+        residual = float(change.sum() if norm == "l1" else change.max())
+
+        if tolerance is None:
+            # ordering the players according to their new score and counting the adjustments
+            updated_order = tie_order[np.argsort(-updated_rank[tie_order], kind="stable")]
+            adjust_count = int(np.count_nonzero(updated_order != order))
+            converged = adjust_count <= adjust_max
+        else:
+            adjust_count = None
+            converged = residual <= tolerance
+
+        if tracing:
+            profiling.trace("power_iteration", "sparse", iteration, adjust_count, residual)
+
+        # if algorithm converged or didn't converge after maximum number of iterations, returns list
+        if converged or iteration == iteration_max:
+            if tolerance is not None:
+                updated_order = np.argsort(-updated_rank, kind="stable")
+            return [(players[k], float(updated_rank[k])) for k in updated_order], iteration, residual, converged
+
+        rank = updated_rank
+        if tolerance is None:
+            order = tie_order = updated_order
+
+
+def sparse_sweep(updated_rank, defeated_dic, dampings, teleports=None, adjust_max=10, iteration_max=500, initial=None,
+                 tolerance=None, norm="l1"):
+    """
+    Batched version of sparse_iteration(), running the WbW iterations for several damping values and teleport vectors
+    at once. The scores of all the runs are the columns of a single matrix, multiplied by the shared transition matrix
+    at each iteration, so that the runs cost about as much as a single one. Each run stops at its own convergence, as
+    if it were run alone, and its scores are identical to those of sparse_iteration() for the uniform teleport vector.
+
+    The function returns the list of the results of the runs, in the same format as sparse_iteration(). The runs are
+    ordered by damping value first and then by teleport vector.
+
+    Args:
+
+    updated_rank: OrderedDict where each key is a player (the values are ignored)
+    defeated_dic: dictionary where each key is a player and its value is the list of players against whom he lost
+    dampings: list of damping values
+    teleports: list of teleport vectors, each giving the share of the rescaling received by each player in the order of
+    updated_rank and summing to 1, or None for the uniform vector (by default, only the uniform vector)
+    adjust_max: sets the maximum number of allowed adjustments for convergence (type int and default value 10)
+    iteration_max: sets the maximum number of allowed iterations (default value 500, 0 for no limit)
+    initial: initial score of each player, in the order of updated_rank, shared by all the runs (uniform by default)
+    tolerance: maximum change in scores for convergence (None by default to use adjust_max)
+    norm: "l1" (default value) or "linf", norm used to measure the change in scores
+
+    """
+
+    players = list(updated_rank)
+    total_players = len(players) # number of unique players
+    matrix = transition_matrix(updated_rank, defeated_dic)
+
+    if teleports is None:
+        teleports = [None]
+    runs = [(damping, teleport) for damping in dampings for teleport in teleports]
+    damping = np.array([run[0] for run in runs], dtype=np.float64)
+
+    # part of the scores given back to the players at each iteration, one column per run
+    jump = np.empty((total_players, len(runs)))
+    for k, (run_damping, teleport) in enumerate(runs):
+        if teleport is None:
+            jump[:, k] = (1 - run_damping) / total_players
+        else:
+            jump[:, k] = (1 - run_damping) * np.asarray(teleport, dtype=np.float64)
+
+    # initializing scores of each player, the columns of the runs that converged are removed
+    rank = np.full(total_players, 1 / total_players) if initial is None else np.asarray(initial, dtype=np.float64)
+    rank = np.repeat(rank[:, None], len(runs), axis=1)
+    order = np.argsort(-rank, axis=0, kind="stable") # players ordered by score in each run
+    tie_order = np.repeat(np.arange(total_players)[:, None], len(runs), axis=1)
+    active = np.arange(len(runs)) # runs that didn't converge yet
+
+    results = [None] * len(runs)
+    iteration = 0 # iteration counter
+    while True:
+        iteration += 1
+        updated_rank = matrix @ rank * damping[active] + jump[:, active]
+
+        # change in scores between the iterations, each column being summed as a contiguous row so that the rounding is
+        # the same as in sparse_iteration()
+        change = np.abs(updated_rank - rank).T.copy()
+        residual = change.sum(axis=1) if norm == "l1" else change.max(axis=1)
+
+        if tolerance is None:
+            # ordering the players according to their new score and counting the adjustments of each run
+            scores = np.take_along_axis(updated_rank, tie_order, axis=0)
+            updated_order = np.take_along_axis(tie_order, np.argsort(-scores, axis=0, kind="stable"), axis=0)
+            converged = np.count_nonzero(updated_order != order, axis=0) <= adjust_max
+        else:
+            converged = residual <= tolerance
+
+        # runs that converged or didn't converge after maximum number of iterations
+        finished = converged | (iteration == iteration_max)
+        for j in np.flatnonzero(finished).tolist():
+            scores = updated_rank[:, j]
+            final_order = updated_order[:, j] if tolerance is None else np.argsort(-scores, kind="stable")
+            results[active[j]] = ([(players[k], score) for k, score in zip(final_order.tolist(),
+                                                                           scores[final_order].tolist())],
+                                  iteration, float(residual[j]), bool(converged[j]))
+
+        active = active[~finished]
+        if len(active) == 0:
+            return results
+
+        rank = updated_rank[:, ~finished]
+        if tolerance is None:
+            order = tie_order = updated_order[:, ~finished]
+
+
+class WbwSolver:
+    """
+    Exact solver of the WbW scores of a loss graph. The scores are the solution of the linear system
+    (I - damping * M) x = (1 - damping) * teleport, where M is the transition_matrix() of the graph and teleport the
+    uniform vector 1 / players by default. The system is factorized once with a sparse LU decomposition, on the first
+    solve, so that the scores of further teleport vectors only cost two triangular solves.
+
+    Args:
+
+    updated_rank: OrderedDict where each key is a player (the values are ignored)
+    defeated_dic: dictionary where each key is a player and its value is the list of players against whom he lost
+    damping: share of his score that each player gives to the players he lost against (default value 0.85). It should
+    be lower than 1, the system being singular otherwise when a player never lost.
+
+    """
+
+    def __init__(self, updated_rank, defeated_dic, damping=0.85):
+        if not 0 <= damping < 1:
+            raise ValueError("The damping should be at least 0 and lower than 1 to solve the WbW scores.")
+
+        self.players = list(updated_rank)
+        self.damping = damping
+        self.matrix = transition_matrix(updated_rank, defeated_dic)
+        self.system = (sparse.identity(len(self.players), format="csc") - damping * self.matrix).tocsc()
+        self._factorization = None # sparse LU decomposition of the system, computed on the first solve
+
+    def right_hand_side(self, teleport=None):
+        """
+        Function that returns the right hand side (1 - damping) * teleport of the system.
+
+        Args:
+
+        teleport: teleport vector in the order of updated_rank summing to 1, or array of shape (players, k) of k
+        teleport vectors (None by default for the uniform vector)
+
+        """
+
+        if teleport is None:
+            return np.full(len(self.players), (1 - self.damping) / len(self.players))
+        return (1 - self.damping) * np.asarray(teleport, dtype=np.float64)
+
+    def scores(self, teleport=None):
+        """
+        Function that returns the array of the exact WbW scores of the players, in the order of updated_rank (of shape
+        (players, k) for k teleport vectors).
+
+        Args:
+
+        teleport: see right_hand_side()
+
+        """
+
+        if self._factorization is None:
+            self._factorization = splu(self.system)
+        return self._factorization.solve(self.right_hand_side(teleport))
+
+    def residual(self, scores, teleport=None, norm="l1"):
+        """
+        Function that returns the change in scores that one more WbW iteration would make to the given scores, as
+        reported by the iterative backends.
+        """
+
+        change = np.abs(self.matrix @ scores * self.damping + self.right_hand_side(teleport) - scores)
+        return float(change.sum() if norm == "l1" else change.max())
+
+    def result(self, scores, iterations, converged, teleport=None, norm="l1"):
+        """
+        Function that returns the given scores in the same format as sparse_iteration(): the list of tuples (player,
+        score) ordered from the highest score to the lowest score, players of equal score being kept in the order of
+        updated_rank, the number of iterations, the residual() of the scores and whether the solver converged.
+        """
+
+        order = np.argsort(-scores, kind="stable")
+        return ([(self.players[k], score) for k, score in zip(order.tolist(), scores[order].tolist())], iterations,
+                self.residual(scores, teleport, norm), converged)
+
+
+def linear_iteration(updated_rank, defeated_dic, solver="direct", iteration_max=500, initial=None, tolerance=None,
+                     norm="l1", damping=0.85):
+    """
+    Linear solve version of sparse_iteration(), returning the scores the WbW iterations converge to instead of stopping
+    when the positions of the players stop moving. The scores are given by WbwSolver for the "direct" solver, or by the
+    BiCGSTAB Krylov solver for the "krylov" solver, which only needs matrix-vector products and can start from the
+    scores of a previous ranking. Players of equal score are kept in the order of updated_rank. Returns the list of
+    tuples (player, score) ordered from the highest score to the lowest score, the number of iterations (0 for the
+    direct solver), the change in scores that one more WbW iteration would make and whether the solver converged.
+
+    Args:
+
+    updated_rank: OrderedDict where each key is a player (the values are ignored)
+    defeated_dic: dictionary where each key is a player and its value is the list of players against whom he lost
+    solver: "direct" (default value) or "krylov"
+    iteration_max: maximum number of iterations of the Krylov solver (default value 500, 0 for no limit)
+    initial: initial score of each player for the Krylov solver, in the order of updated_rank (uniform by default)
+    tolerance: relative residual of the linear system at which the Krylov solver stops (1e-10 by default)
+    norm: "l1" (default value) or "linf", norm used to measure the returned change in scores
+    damping: share of his score that each player gives to the players he lost against (default value 0.85)
+
+    """
+
+    wbw_solver = WbwSolver(updated_rank, defeated_dic, damping)
+
+    if solver == "direct":
+        return wbw_solver.result(wbw_solver.scores(), 0, True, norm=norm)
+    elif solver == "krylov":
+        iterations = 0 # iteration counter, incremented by the solver at each iteration
+        tracing = profiling.enabled() # whether each iteration is reported to the profilers
+        right_hand_side = wbw_solver.right_hand_side()
+
+        def count(scores):
+            nonlocal iterations
+            iterations += 1
+            if tracing: # the residual of a Krylov iteration is the relative residual of the linear system
+                residual = np.linalg.norm(right_hand_side - wbw_solver.system @ scores) / \
+                           np.linalg.norm(right_hand_side)
+                profiling.trace("power_iteration", "krylov", iterations, None, float(residual))
+
+        total_players = len(wbw_solver.players) # number of unique players
+        start = np.full(total_players, 1 / total_players) if initial is None else np.asarray(initial, dtype=np.float64)
+        scores, info = bicgstab(wbw_solver.system, right_hand_side, start,
+                                rtol=1e-10 if tolerance is None else tolerance, atol=0.0,
+                                maxiter=iteration_max if iteration_max else None, callback=count)
+        return wbw_solver.result(scores, iterations, info == 0, norm=norm)
+
+    raise ValueError("Unknown solver: " + str(solver))
+
+
+# largest number of players of the components of a level solved exactly by component_iteration()
+DIRECT_SIZE = 32
+
+
+def component_levels(matrix):
+    """
+    Function that returns the strongly connected component of each player of the given transition matrix and the
+    topological level of each player: the players of level 0 receive no share from other components, and the players of
+    a component only receive shares from the components of lower levels. Components of the same level don't give each
+    other any share.
+
+    Args:
+
+    matrix: transition_matrix() of the loss graph
+
+    """
+
+    n_components, labels = connected_components(matrix, directed=True, connection="strong")
+
+    # condensed graph, with an edge from the component of each player to the components of the players he lost against
+    matrix = matrix.tocoo()
+    source, target = labels[matrix.col], labels[matrix.row]
+    between = source != target
+    condensed = sparse.csr_matrix((np.ones(np.count_nonzero(between)), (source[between], target[between])),
+                                  shape=(n_components, n_components))
+    condensed.sum_duplicates()
+
+    # Kahn's algorithm, one level at a time
+    indegree = np.diff(condensed.tocsc().indptr)
+    level = np.zeros(n_components, dtype=np.int64)
+    frontier = np.flatnonzero(indegree == 0)
+    depth = 0
+    while len(frontier) > 0:
+        level[frontier] = depth
+        # successors of the components of the frontier, read from the rows of the condensed graph
+        starts = condensed.indptr[frontier]
+        lengths = condensed.indptr[frontier + 1] - starts
+        successors = condensed.indices[np.repeat(starts - np.cumsum(lengths) + lengths, lengths) +
+                                       np.arange(lengths.sum())]
+        np.subtract.at(indegree, successors, 1)
+        frontier = np.unique(successors[indegree[successors] == 0])
+        depth += 1
+
+    return labels, level[labels]
+
+
+def component_iteration(updated_rank, defeated_dic, iteration_max=500, initial=None, tolerance=None, norm="l1",
+                        damping=0.85):
+    """
+    Version of sparse_iteration() solving the strongly connected components of the loss graph in topological order.
+    The shares received from the previous levels are fixed once they are solved, so that a player alone in his
+    component, e.g. a player who never lost or who never won, gets his score in closed form, the components of a level
+    with at most DIRECT_SIZE players in total are solved exactly, and the WbW iterations are only run over the players
+    of the larger components, until the change in their scores is lower or equal to the tolerance. The scores converge
+    to the same values as the global iterations with a tolerance. Returns the list of tuples (player, score) ordered
+    from the highest score to the lowest score, the total number of iterations over the levels, the change in scores
+    that one more global iteration would make and whether all the levels converged.
+
+    Args:
+
+    updated_rank: OrderedDict where each key is a player (the values are ignored)
+    defeated_dic: dictionary where each key is a player and its value is the list of players against whom he lost
+    iteration_max: sets the maximum number of allowed iterations of each level (default value 500, 0 for no limit)
+    initial: initial score of each player, in the order of updated_rank (uniform scores by default)
+    tolerance: maximum change in the scores of a level for convergence. By default, the change that the global
+    iterations are sure to reach within iteration_max iterations: the l1 change of the scores, at most 2 after the
+    first iteration, is multiplied by at most damping at each iteration, and a level only holds part of the scores.
+    The tolerance is at least 1e-12.
+    norm: "l1" (default value) or "linf", norm used to measure the change in scores
+    damping: share of his score that each player gives to the players he lost against (default value 0.85). It should
+    be lower than 1, the score of a player alone in his component being undefined otherwise when he never lost.
+
+    """
+
+    if not 0 <= damping < 1:
+        raise ValueError("The damping should be at least 0 and lower than 1 to solve the WbW scores by component.")
+
+    players = list(updated_rank)
+    total_players = len(players) # number of unique players
+    matrix = transition_matrix(updated_rank, defeated_dic)
+    if tolerance is None: # accuracy of the global iterations within the budget of the caller
+        tolerance = max(1e-12, 2 * damping ** (iteration_max - 1)) if iteration_max else 1e-12
+
+    labels, level = component_levels(matrix)
+    alone = np.bincount(labels)[labels] == 1 # players alone in their component
+    start = np.full(total_players, 1 / total_players) if initial is None else np.asarray(initial, dtype=np.float64)
+    tracing = profiling.enabled() # whether each iteration is reported to the profilers
+
+    # players ordered by level, the players of the larger components of each level before the players alone in their
+    # component, so that the rows of a level and of its larger components are slices of the permuted matrix
+    order = np.lexsort((alone, level))
+    permuted = matrix[order][:, order]
+    diagonal = permuted.diagonal()
+    alone, start = alone[order], start[order]
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(level[order])) + 1, [total_players]))
+
+    scores = np.zeros(total_players) # scores of the solved levels in the permuted order, 0 for the others
+    iteration = 0 # iteration counter over all the levels
+    converged = True
+    for first, last in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        # shares received from the previous levels and rescaling, fixed for the players of the level
+        fixed = permuted[first:last] @ scores * damping + (1 - damping) / total_players
+
+        # a player alone in his component only receives from himself, if he never lost
+        grouped = first + int(np.count_nonzero(~alone[first:last])) # end of the larger components of the level
+        scores[grouped:last] = fixed[grouped - first:] / (1 - damping * diagonal[grouped:last])
+        if grouped == first:
+            continue
+
+        block = permuted[first:grouped, first:grouped]
+        fixed = fixed[:grouped - first]
+
+        # the small components are solved exactly, their cycles making the iterations as slow as on the whole graph
+        if grouped - first <= DIRECT_SIZE:
+            scores[first:grouped] = np.linalg.solve(np.eye(grouped - first) - damping * block.toarray(), fixed)
+            continue
+
+        # WbW iterations over the components of the level, which don't give each other any share
+
+        # the initial scores are rescaled so that their sum is kept by an iteration, as the sum of the scores of the
+        # global iterations: the slowest mode of the iterations, which changes the sum of the scores, is then removed
+        rank = start[first:grouped]
+        kept = rank.sum() - damping * (block @ rank).sum()
+        if kept > 0:
+            rank = rank * (fixed.sum() / kept)
+        level_iteration = 0
+        while True:
+            level_iteration += 1
+            updated_rank = block @ rank * damping + fixed
+            change = np.abs(updated_rank - rank)
+            residual = float(change.sum() if norm == "l1" else change.max())
+            if tracing:
+                profiling.trace("power_iteration", "components", iteration + level_iteration, None, residual)
+            if residual <= tolerance or level_iteration == iteration_max:
+                break
+            rank = updated_rank
+
+        scores[first:grouped] = updated_rank
+        iteration += level_iteration
+        converged = converged and residual <= tolerance
+
+    scores[order] = scores.copy() # back to the order of updated_rank
+
+    # change in scores that one more global iteration would make
+    change = np.abs(matrix @ scores * damping + (1 - damping) / total_players - scores)
+    residual = float(change.sum() if norm == "l1" else change.max())
+
+    final_order = np.argsort(-scores, kind="stable")
+    return ([(players[k], score) for k, score in zip(final_order.tolist(), scores[final_order].tolist())], iteration,
+            residual, converged)
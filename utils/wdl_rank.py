@@ -1,16 +1,32 @@
+import math
 
-def winners_dont_lose(data, period, printer=False):
+import numpy as np
+
+from .match_table import MatchTable, NO_APPEARANCE, first_appearance, first_appearance_by_year, appearance_order
+from .ranking import Ranking
+
+
+def winners_dont_lose(data, period, printer=False, cube=None):
     """
     Function that returns the ranking for the given period where players who lost at small rounds lose more points and
     player who won at important rounds gain more points. The ranking is an ordered list of list where the first element
     of the inner list is the player name and the second element is his associated score. The list is ordered from the
-    highest score to the lowest score of each player.
+    highest score to the lowest score of each player. For a MatchTable or given a cube, the ranking is a Ranking,
+    backed by arrays, which behaves as this list of list.
 
     Args:
 
-    data: list of list, where the inner list contains each game details
+    data: list of list, where the inner list contains each game details, or MatchTable
     period: considered period for the ranking of type int or list
     printer: if set to True (False as default value), the function prints the top three players for the given period.
+    cube: per-year aggregates returned by scores_by_year(data), so that the ranking is computed from the aggregates of
+    the years of the period instead of reading the games (None by default). The aggregates aren't updated by
+    append_matches(): after new games are appended, scores_by_year() should be run again, otherwise the cube still gives
+    the rankings of the games it was built from.
+
+    Whatever the arguments, the scores are summed exactly as integer multiples of 1 / lcm(1, ..., rounds) and only
+    rounded once when converted to float, and players of equal score are ordered by first appearance, so that the list,
+    the MatchTable and the cube give the same ranking.
 
     Prerequisite:
     The dataset should be ordered by first tournament name and secondly by tournament start date.
@@ -21,6 +37,21 @@ def winners_dont_lose(data, period, printer=False):
     if type(period) == int:  # if period is only a year convert it to a list
         period = [period]
 
+    if cube is not None:
+        rank = _winners_dont_lose_cube(cube, period)
+        if printer:
+            rank.print_top_three()
+        return rank
+
+    if isinstance(data, MatchTable):
+        rank = _winners_dont_lose_table(data, period)
+        if printer:
+            rank.print_top_three()
+        return rank
+
+    # the scores are summed as integer multiples of 1 / denominator, a multiple of every round of the period
+    denominator = _denominator(max((game[12] for game in data if game[1].year in period and
+                                    game[11] in (game[3], game[4])), default=1))
     player_score = {} # dictionary where each key is a player and its associated value is the player's score
 
     # building dictionary
@@ -29,51 +60,137 @@ def winners_dont_lose(data, period, printer=False):
             if data[i][3] not in player_score and data[i][4] not in player_score:
                 # case if both players not in dictionary
                 if data[i][3] == data[i][11]: # if player1 won the game
-                    player_score[data[i][3]] = data[i][12]
-                    player_score[data[i][4]] = - 1 / data[i][12]
+                    player_score[data[i][3]] = data[i][12] * denominator
+                    player_score[data[i][4]] = -(denominator // data[i][12])
                 elif data[i][4] == data[i][11]: # if player2 won the game
-                    player_score[data[i][3]] = -1 / data[i][12]
-                    player_score[data[i][4]] = data[i][12]
+                    player_score[data[i][3]] = -(denominator // data[i][12])
+                    player_score[data[i][4]] = data[i][12] * denominator
 
             elif data[i][3] in player_score and data[i][4] not in player_score:
                 # case if player1 in dictionary but player2 not in dictionary
                 if data[i][3] == data[i][11]:
-                    player_score[data[i][4]] = -1 / data[i][12]
-                    player_score[data[i][3]] += data[i][12]
+                    player_score[data[i][4]] = -(denominator // data[i][12])
+                    player_score[data[i][3]] += data[i][12] * denominator
 
                 elif data[i][4] == data[i][11]:
-                    player_score[data[i][4]] = data[i][12]
-                    player_score[data[i][3]] -= 1 / data[i][12]
+                    player_score[data[i][4]] = data[i][12] * denominator
+                    player_score[data[i][3]] -= denominator // data[i][12]
 
             elif data[i][3] not in player_score and data[i][4] in player_score:
                 # case if player1 not in dictionary but player2 in dictionary
                 if data[i][3] == data[i][11]:
-                    player_score[data[i][3]] = data[i][12]
-                    player_score[data[i][4]] -= 1 / data[i][12]
+                    player_score[data[i][3]] = data[i][12] * denominator
+                    player_score[data[i][4]] -= denominator // data[i][12]
 
                 elif data[i][4] == data[i][11]:
-                    player_score[data[i][3]] = -1 / data[i][12]
-                    player_score[data[i][4]] += data[i][12]
+                    player_score[data[i][3]] = -(denominator // data[i][12])
+                    player_score[data[i][4]] += data[i][12] * denominator
 
             elif data[i][3] in player_score and data[i][4] in player_score:
                 # case if both player in dictionary
                 if data[i][3] == data[i][11]:
-                    player_score[data[i][3]] += data[i][12]
-                    player_score[data[i][4]] -= 1 / data[i][12]
+                    player_score[data[i][3]] += data[i][12] * denominator
+                    player_score[data[i][4]] -= denominator // data[i][12]
 
                 elif data[i][4] == data[i][11]:
-                    player_score[data[i][4]] += data[i][12]
-                    player_score[data[i][3]] -= 1 / data[i][12]
+                    player_score[data[i][4]] += data[i][12] * denominator
+                    player_score[data[i][3]] -= denominator // data[i][12]
 
-    # converting the dictionary into an ordered list since we can't rely on the dictionary order
-    rank = sorted([[player, score] for player, score in player_score.items()], key=lambda x: -x[1])
+    # converting the dictionary into an ordered list since we can't rely on the dictionary order, players of equal score
+    # keeping their first appearance order
+    rank = [[player, score / denominator] for player, score in sorted(player_score.items(), key=lambda x: -x[1])]
 
     # if printer argument is true, the function prints the top three players with their associated scores
     if printer:
-        print("\nThe top three players for the given period are:")
-        for i in range(3):
-            print("Player: ", rank[i][0], " Score: ", rank[i][1])
+        Ranking.from_list(rank).print_top_three()
 
     return rank
 
 
+def _winners_dont_lose_table(table, period):
+    """
+    Vectorized version of winners_dont_lose() for a MatchTable. The winner of each game gains the round number and the
+    loser loses its inverse, both summed with np.bincount as integer multiples of 1 / lcm(1, ..., rounds), which are
+    exact in float64.
+    """
+
+    rows = table.rows_in_years(period) # games of the period found with the start date index
+    rows = rows[table.winner[rows] >= 0]
+    winner = table.winner[rows]
+    loser = np.where(table.player1[rows] == winner, table.player2[rows], table.player1[rows])
+    round = table.round[rows].astype(np.int64)
+    denominator = _denominator(int(round.max()) if len(rows) > 0 else 1)
+
+    numerator = np.bincount(np.concatenate((winner, loser)), minlength=len(table.players),
+                            weights=np.concatenate((round * denominator, -(denominator // round))))
+    players = first_appearance(table.player1[rows], table.player2[rows])
+
+    return Ranking(table.players, players, numerator[players] / denominator)
+
+
+def scores_by_year(data):
+    """
+    Function that returns the per-year aggregates of winners_dont_lose(), built in a single pass over the games. Given
+    these aggregates, the ranking of any period is the sum of the rows of its years, whose cost only depends on the
+    number of players. As the score of a player is the sum of the rounds he won minus the sum of the inverses of the
+    rounds he lost, the lost games are counted by round so that the scores of a period are summed exactly. The
+    aggregates are a dictionary with the keys:
+    "years": int array of the years (of the start date) with at least one game
+    "players": list of the player names
+    "points": int64 array of shape (years, players) of the sum of the rounds won by each player each year
+    "losses": int64 array of shape (years, players, rounds) of the number of games lost by each player each year at
+    each round, round r being at position r - 1
+    "first": int64 array of shape (years, players) of the first appearance of each player each year, which gives the
+    order of the players of equal score
+
+    Args:
+
+    data: list of list, where the inner list contains each game details, or MatchTable
+
+    Prerequisite:
+    The dataset should be ordered by first tournament name and secondly by tournament start date.
+    correct_error(), winner(), round() and round_robin() should be run on the dataset before running the function.
+
+    """
+
+    table = data if isinstance(data, MatchTable) else MatchTable.from_rows(data)
+    rows = np.flatnonzero(table.winner >= 0) # as in the list version, games without winner are ignored
+    years, year = np.unique(table.years("start")[rows], return_inverse=True)
+    n_years, n_players = len(years), len(table.players)
+
+    winner = table.winner[rows].astype(np.int64)
+    loser = np.where(table.player1[rows] == winner, table.player2[rows], table.player1[rows]).astype(np.int64)
+    round = table.round[rows].astype(np.int64)
+    n_rounds = int(round.max()) if len(rows) > 0 else 1
+
+    points = np.bincount(year * n_players + winner, weights=round, minlength=n_years * n_players).astype(np.int64)
+    losses = np.bincount((year * n_players + loser) * n_rounds + round - 1, minlength=n_years * n_players * n_rounds)
+    first = first_appearance_by_year(table.player1[rows], table.player2[rows], year, n_years, n_players)
+    return {"years": years, "players": table.players, "points": points.reshape(n_years, n_players),
+            "losses": losses.reshape(n_years, n_players, n_rounds), "first": first}
+
+
+def _winners_dont_lose_cube(cube, period):
+    """
+    Version of winners_dont_lose() computed from the per-year aggregates of scores_by_year(). The scores are computed
+    as integer multiples of 1 / lcm(1, ..., rounds) and only rounded once when converted to float.
+    """
+
+    years = np.isin(cube["years"], period)
+    n_rounds = cube["losses"].shape[2]
+    denominator = _denominator(n_rounds)
+
+    # score of each player multiplied by the denominator, an exact integer
+    numerator = cube["points"][years].sum(axis=0) * denominator - \
+                cube["losses"][years].sum(axis=0) @ (denominator // np.arange(1, n_rounds + 1))
+    players = appearance_order(cube["first"][years].min(axis=0, initial=NO_APPEARANCE))
+    return Ranking(cube["players"], players, numerator[players] / denominator)
+
+
+def _denominator(n_rounds):
+    """
+    Auxiliary function that returns lcm(1, ..., n_rounds), so that the WdL scores of games played up to round n_rounds
+    are integer multiples of its inverse.
+    """
+
+    return math.lcm(*range(1, n_rounds + 1))
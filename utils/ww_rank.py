@@ -1,15 +1,25 @@
+import numpy as np
 
-def winners_win(data, period, printer=False):
+from .match_table import MatchTable, NO_APPEARANCE, first_appearance, first_appearance_by_year, appearance_order
+from .ranking import Ranking
+
+
+def winners_win(data, period, printer=False, cube=None):
     """
     Function that returns the ranking for the given period based on the player's with the most wins. The ranking is an 
     ordered list of list where the first element of the inner list is the player name and the second element is his 
-    associated score. The list is ordered from the highest score to the lowest score of each player.   
+    associated score. The list is ordered from the highest score to the lowest score of each player. For a MatchTable
+    or given a cube, the ranking is a Ranking, backed by arrays, which behaves as this list of list.
 
     Args:
         
-    data: list of list, where the inner list contains each game details
+    data: list of list, where the inner list contains each game details, or MatchTable
     period: considered period for the ranking of type int or list
     printer: if set to True (False as default value), the function prints the top three players for the given period.
+    cube: per-year aggregates returned by wins_by_year(data), so that the ranking is computed from the aggregates of
+    the years of the period instead of reading the games (None by default). The aggregates aren't updated by
+    append_matches(): after new games are appended, wins_by_year() should be run again, otherwise the cube still gives
+    the rankings of the games it was built from.
 
     Prerequisite:
     The dataset should be ordered by first tournament name and secondly by tournament start date.
@@ -19,6 +29,19 @@ def winners_win(data, period, printer=False):
 
     if type(period) == int: # if period is only a year of type we convert it to a list
         period = [period]
+
+    if cube is not None:
+        rank = _winners_win_cube(cube, period)
+        if printer:
+            rank.print_top_three()
+        return rank
+
+    if isinstance(data, MatchTable):
+        rank = _winners_win_table(data, period)
+        if printer:
+            rank.print_top_three()
+        return rank
+
     player_score = {} # dictionary where each key is a player and its associated value is the number of games won
 
     # building the dictionary
@@ -64,9 +87,62 @@ def winners_win(data, period, printer=False):
 
     # if printer argument is true, the function prints the top three players with their associated scores
     if printer:
-        print("\nThe top three players for the given period are:")
-        for i in range(3):
-            print("Player: ", rank[i][0], " Score: ", rank[i][1])
+        Ranking.from_list(rank).print_top_three()
     return rank
 
 
+def _winners_win_table(table, period):
+    """
+    Vectorized version of winners_win() for a MatchTable: the wins of each player are counted with np.bincount over the
+    games of the period, which are found with the start date index of the table.
+    """
+
+    rows = table.rows_in_years(period) # games of the period found with the start date index
+    rows = rows[table.winner[rows] >= 0]
+    wins = np.bincount(table.winner[rows], minlength=len(table.players))
+    players = first_appearance(table.player1[rows], table.player2[rows])
+
+    # players are listed in order of first appearance before the stable sort, as the dictionary of the list version
+    return Ranking(table.players, players, wins[players])
+
+
+def wins_by_year(data):
+    """
+    Function that returns the per-year aggregates of winners_win(), built in a single pass over the games. Given these
+    aggregates, the ranking of any period is the sum of the rows of its years, whose cost only depends on the number of
+    players. The aggregates are a dictionary with the keys:
+    "years": int array of the years (of the start date) with at least one game
+    "players": list of the player names
+    "wins": int64 array of shape (years, players) of the number of games won by each player each year
+    "first": int64 array of shape (years, players) of the first appearance of each player each year, which gives the
+    order of the players of equal score
+
+    Args:
+
+    data: list of list, where the inner list contains each game details, or MatchTable
+
+    Prerequisite:
+    The dataset should be ordered by first tournament name and secondly by tournament start date.
+    correct_error() and winner() should be run on the dataset before running the function.
+
+    """
+
+    table = data if isinstance(data, MatchTable) else MatchTable.from_rows(data)
+    rows = np.flatnonzero(table.winner >= 0) # as in the list version, games without winner are ignored
+    years, year = np.unique(table.years("start")[rows], return_inverse=True)
+    n_players = len(table.players)
+
+    wins = np.bincount(year * n_players + table.winner[rows], minlength=len(years) * n_players)
+    first = first_appearance_by_year(table.player1[rows], table.player2[rows], year, len(years), n_players)
+    return {"years": years, "players": table.players, "wins": wins.reshape(len(years), n_players), "first": first}
+
+
+def _winners_win_cube(cube, period):
+    """
+    Version of winners_win() computed from the per-year aggregates of wins_by_year().
+    """
+
+    years = np.isin(cube["years"], period)
+    wins = cube["wins"][years].sum(axis=0)
+    players = appearance_order(cube["first"][years].min(axis=0, initial=NO_APPEARANCE))
+    return Ranking(cube["players"], players, wins[players])